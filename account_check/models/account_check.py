@@ -145,15 +145,23 @@ class AccountCheck(models.Model):
 
     @api.depends("amount", "currency_id", "issue_date", "company_id")
     def _compute_amount_company_currency(self):
+        # Same as _convert, with one rate lookup per currency, company and date
+        rates = {}
         for rec in self:
             company = rec.company_id or self.env.user.company_id
             company_currency = rec.company_currency_id or company.currency_id
-            rec.amount_company_currency = rec.currency_id._convert(
-                rec.amount,
-                company_currency,
-                company,
-                rec.issue_date,
-            )
+            currency = rec.currency_id or company_currency
+            if currency == company_currency:
+                amount = rec.amount
+            elif rec.amount:
+                key = (currency, company_currency, company, rec.issue_date)
+                if key not in rates:
+                    rates[key] = currency._get_conversion_rate(*key)
+                amount = rec.amount * rates[key]
+            else:
+                rec.amount_company_currency = 0.0
+                continue
+            rec.amount_company_currency = company_currency.round(amount)
 
     @api.depends("operation_ids.partner_id")
     def _compute_first_partner(self):
@@ -1,7 +1,7 @@
 from . import export_purchase_order_xlsx
 from . import export_account_move_xlsx
-from . import export_partner_currency_statement
 from . import export_partner_statement
+from . import export_partner_currency_statement
 from . import export_account_payment_xlsx
 from . import export_account_move_line_xlsx
 from . import export_account_move_kviks_xlsx
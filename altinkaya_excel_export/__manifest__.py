@@ -9,8 +9,13 @@
     "website": "https://github.com/altinkaya-opensource/odoo-addons",
     "license": "LGPL-3",
     "category": "Uncategorized",
-    "version": "16.0.1.0.0",
-    "depends": ["excel_import_export", "purchase", "account"],
+    "version": "16.0.1.1.0",
+    "depends": [
+        "excel_import_export",
+        "purchase",
+        "account",
+        "currency_rate_turkey",
+    ],
     "data": [
         # Purchase
         "export_purchase_order_xlsx/reports.xml",
@@ -1,17 +1,16 @@
 # Copyright 2025 Ismail Cagan Yilmaz (https://github.com/milleniumkid)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from datetime import date, datetime
+from datetime import date
 
 from odoo import _, fields, models
 from odoo.exceptions import UserError
-from odoo.tools.misc import formatLang
 
 
 class ReportPartnerStatementCurrency(models.TransientModel):
     _name = "report.partner.statement.currency"
     _description = "Wizard for report.partner.statement"
-    _inherit = "xlsx.report"
+    _inherit = "partner.statement.xlsx"
 
     def _default_date_start(self):
         return date(date.today().year, 1, 1).strftime("%Y-%m-%d")
@@ -42,138 +41,174 @@ class ReportPartnerStatementCurrency(models.TransientModel):
     default_currency = fields.Many2one(
         "res.currency", string="Currency", default=_default_comp_curr
     )
-    results = fields.Many2many(
-        comodel_name="partner.statement.lines",
-        string="Statement Lines",
-        compute="_compute_lines",
-        help="Use compute fields, so there is nothing stored in database",
-    )
 
-    def _compute_lines(self):
-        for rec in self:
-            rec.results = self._get_statement_data(self.partner_id)
+    # The company block starts after the secondary currency columns
+    _statement_title_columns = 6
 
-    def _get_statement_data(self, partner_id):
-        cr = self.env.cr
-        statement_data = []
-        diff_inv_journal = self.env["account.journal"].search(
-            [("code", "=", "KFARK")], limit=1
-        )
-        balance, sec_curr_balance, seq = 0.00, 0.00, 0
-        start_date = self.date_start
-        partner = partner_id
-        end_date = self.date_end
-        currency = self.env["res.currency"]
-        move_type = ("asset_receivable", "liability_payable")
-        if not (
+    def _statement_columns(self):
+        partner = self.partner_id
+        currency_name = (
             partner.property_account_receivable_id.currency_id
             or partner.property_account_payable_id.currency_id
-        ):
+        ).name
+        return [
+            ("sequence", "NO", 6.71, "center"),
+            ("number", "Sayı", 21.86, "text"),
+            ("date", "Tarih", 13.0, "text"),
+            ("due_date", "Vadesi", 13.0, "text"),
+            ("description", "Açıklama", 25.29, "text"),
+            ("sec_curr_debit", "%s Borç" % currency_name, 16.71, "amount"),
+            ("sec_curr_credit", "%s Alacak" % currency_name, 16.14, "amount"),
+            ("sec_curr_balance", "%s Bakiye" % currency_name, 15.88, "amount"),
+            ("sec_curr_dc", "B/A", 10.58, "center"),
+            ("currency_rate", "Kur", 18.71, "rate"),
+            ("debit", "TL Borç", 18.71, "amount"),
+            ("credit", "TL Alacak", 18.29, "amount"),
+            ("balance", "TL Bakiye", 16.87, "amount"),
+            ("dc", "B/A", 10.58, "center"),
+        ]
+
+    def _statement_header_cells(self):
+        partner = self.partner_id
+        return [
+            (1, 0, "Cari :"),
+            (1, 1, partner.name),
+            (1, 6, "Vergi Dairesi:"),
+            (1, 7, partner.tax_office_name),
+            (1, 8, "Vergi No:"),
+            (1, 9, partner.vat),
+            (1, 11, "Tarih:"),
+            (1, 12, self.date_now.strftime("%d.%m.%Y")),
+            (2, 0, "Tel :"),
+            (2, 1, partner.phone or partner.mobile),
+        ]
+
+    def _statement_total_cells(self):
+        return [
+            (6, None),
+            (7, "sec_curr_total"),
+            (8, "sec_curr_dc"),
+            (11, None),
+            (12, "total"),
+            (13, "dc"),
+        ]
+
+    def _get_secondary_rates(self, secondary_currency, where, params):
+        """
+        Rates of the secondary currency on the move dates of the statement,
+        resolved with one bulk lookup.
+        :return: dict {date: rate}
+        """
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT l.date
+              FROM account_move_line l
+              JOIN account_account a ON a.id = l.account_id
+              JOIN account_move am ON am.id = l.move_id
+             WHERE {where}
+            """.format(
+                where=where
+            ),
+            params,
+        )
+        move_dates = [row[0] for row in self.env.cr.fetchall()]
+        company = self.env.company
+        rates = self.env["res.currency"]._convert_bulk(
+            [
+                (
+                    1.0,
+                    company.currency_id,
+                    secondary_currency,
+                    company,
+                    move_date,
+                    "rate",
+                )
+                for move_date in move_dates
+            ],
+            round=False,
+        )
+        return dict(zip(move_dates, rates))
+
+    def _iter_statement_lines(self):
+        partner = self.partner_id
+        secondary_currency = partner.property_account_receivable_id.currency_id
+        if not (secondary_currency or partner.property_account_payable_id.currency_id):
             raise UserError(
                 _(
                     """Bu müşteri için dövizli ekstre çıkartamazsınız.
                     Müşteri hesaplarının dövizli olduğunu kontrol ediniz."""
                 )
             )
-        cr.execute(
-            """SELECT aj.id as journal_id, aj.name as
-            journal, l.date_maturity as due_date,
-            l.date, am.name, am.state, move_id,
-            SUM(l.debit) AS debit, SUM(l.credit) AS credit,\
-                        l.amount_currency as amount_currency,l.currency_id as
-                        currency_id,l.company_currency_id as company_currency_id\
-                        FROM account_move_line AS l \
-                        LEFT JOIN account_account a ON (l.account_id=a.id) \
-                        LEFT JOIN account_move am ON (l.move_id=am.id) \
-                        LEFT JOIN account_journal aj ON (am.journal_id=aj.id) \
-                        WHERE (l.date BETWEEN %s AND %s)
-                        AND l.partner_id = %s AND a.account_type IN  %s
-            GROUP BY aj.id,aj.name,move_id,am.name,am.state,l.date,l.date_maturity
-            ,l.amount_currency,l.currency_id,l.company_currency_id\
-                    ORDER BY l.date , l.currency_id """,
-            (
-                str(start_date),
-                str(end_date),
-                str(partner.commercial_partner_id.id),
-                move_type,
-            ),
+        diff_inv_journal = self.env["account.journal"].search(
+            [("code", "=", "KFARK")], limit=1
         )
-        for each_dict in self.env.cr.dictfetchall():
-            seq += 1
-            balance = (each_dict["debit"] - each_dict["credit"]) + balance
-            debit = 0.0
+        where = """
+            l.date BETWEEN %(date_start)s AND %(date_end)s
+            AND l.partner_id = %(partner_id)s
+            AND a.account_type IN ('asset_receivable', 'liability_payable')
+        """
+        params = {
+            "lang": self.env.lang or "en_US",
+            "date_start": self.date_start,
+            "date_end": self.date_end,
+            "partner_id": partner.commercial_partner_id.id,
+            "diff_journal_id": diff_inv_journal.id or 0,
+        }
+        rates = {}
+        if secondary_currency:
+            rates = self._get_secondary_rates(
+                secondary_currency,
+                where + " AND am.journal_id != %(diff_journal_id)s",
+                params,
+            )
+        query = """
+            SELECT ROW_NUMBER() OVER w AS sequence,
+                   CASE WHEN am.state = 'draft' THEN '*' || am.id
+                        ELSE am.name
+                   END AS number,
+                   l.date AS move_date,
+                   to_char(l.date, 'DD.MM.YYYY') AS date,
+                   to_char(l.date_maturity, 'DD.MM.YYYY') AS due_date,
+                   LEFT(COALESCE(aj.name->>%(lang)s, aj.name->>'en_US'), 30)
+                       AS description,
+                   aj.id = %(diff_journal_id)s AS difference,
+                   GREATEST(SUM(l.debit) - SUM(l.credit), 0.0) AS debit,
+                   GREATEST(SUM(l.credit) - SUM(l.debit), 0.0) AS credit,
+                   SUM(SUM(l.debit) - SUM(l.credit)) OVER w AS total
+              FROM account_move_line l
+              JOIN account_account a ON a.id = l.account_id
+              JOIN account_move am ON am.id = l.move_id
+              JOIN account_journal aj ON aj.id = am.journal_id
+             WHERE {where}
+             GROUP BY aj.id, am.id, l.date, l.date_maturity, l.amount_currency,
+                      l.currency_id, l.company_currency_id
+            WINDOW w AS (
+                ORDER BY l.date, l.currency_id, am.id, l.date_maturity,
+                         l.amount_currency
+                ROWS UNBOUNDED PRECEDING
+            )
+             ORDER BY l.date, l.currency_id, am.id, l.date_maturity,
+                      l.amount_currency
+        """.format(
+            where=where
+        )
+        sec_curr_balance = 0.0
+        for line in self._iter_query(query, params):
             rate = 1.0
-            credit = 0.0
-            sec_curr_debit = 0.00
-            sec_curr_credit = 0.00
-            currency_id = currency.browse(each_dict["company_currency_id"])
-            if (each_dict["debit"] - each_dict["credit"]) > 0.0:
-                debit = each_dict["debit"] - each_dict["credit"]
-            else:
-                credit = each_dict["credit"] - each_dict["debit"]
-
-            if (
-                partner.property_account_receivable_id.currency_id
-                and each_dict["journal_id"] != diff_inv_journal.id
-            ):
-                move_date = each_dict["date"].strftime("%Y-%m-%d")
-                cr.execute(
-                    "SELECT rate\
-                        FROM res_currency_rate\
-                    WHERE currency_id = %s\
-                    AND name <= %s\
-                    ORDER BY name desc LIMIT 1",
-                    (partner.property_account_receivable_id.currency_id.id, move_date),
-                )
-                if cr.rowcount:
-                    rate = cr.fetchall()[0][0]
-
-                sec_curr_debit = debit * rate
-                sec_curr_credit = credit * rate
-                sec_curr_balance = (sec_curr_debit - sec_curr_credit) + sec_curr_balance
-
-            statement_data.append(
-                self.env["partner.statement.lines"]
-                .create(
-                    vals_list={
-                        "sequence": seq,
-                        "number": each_dict["state"] == "draft"
-                        and "*" + str(each_dict["move_id"])
-                        or each_dict["name"],
-                        "date": each_dict["date"]
-                        and datetime.strptime(
-                            str(each_dict["date"]), "%Y-%m-%d"
-                        ).strftime("%d.%m.%Y")
-                        or False,
-                        "due_date": each_dict["due_date"]
-                        and datetime.strptime(
-                            str(each_dict["due_date"]), "%Y-%m-%d"
-                        ).strftime("%d.%m.%Y")
-                        or False,
-                        "description": len(each_dict["journal"]) >= 30
-                        and each_dict["journal"][0:30]
-                        or each_dict["journal"],
-                        "debit": formatLang(self.env, debit),
-                        "credit": formatLang(self.env, credit),
-                        "sec_curr_debit": formatLang(self.env, sec_curr_debit),
-                        "sec_curr_credit": formatLang(self.env, sec_curr_credit),
-                        "currency_rate": "%.4f" % (1 / rate),
-                        "sec_curr_balance": formatLang(self.env, abs(sec_curr_balance))
-                        or "0,00",
-                        "sec_curr_dc": sec_curr_balance > 0.01 and "B" or "A",
-                        "balance": formatLang(self.env, abs(balance)) or "0,00",
-                        "dc": balance > 0.01 and "B" or "A",
-                        "sec_curr_total": formatLang(self.env, sec_curr_balance)
-                        or "0,00",
-                        "total": formatLang(self.env, balance) or "0,00",
-                        "secondary_currency": (
-                            partner.property_account_receivable_id.currency_id.id
-                        )
-                        or currency_id.id,
-                        "primary_currency": currency_id.id,
-                    }
-                )
-                .id
+            sec_curr_debit = sec_curr_credit = 0.0
+            if secondary_currency and not line["difference"]:
+                rate = rates[line["move_date"]]
+                sec_curr_debit = line["debit"] * rate
+                sec_curr_credit = line["credit"] * rate
+                sec_curr_balance += sec_curr_debit - sec_curr_credit
+            line.update(
+                sec_curr_debit=sec_curr_debit,
+                sec_curr_credit=sec_curr_credit,
+                currency_rate=1 / rate,
+                sec_curr_balance=abs(sec_curr_balance),
+                sec_curr_dc=sec_curr_balance > 0.01 and "B" or "A",
+                sec_curr_total=sec_curr_balance,
+                balance=abs(line["total"]),
+                dc=line["total"] > 0.01 and "B" or "A",
             )
-
-        return statement_data
+            yield line
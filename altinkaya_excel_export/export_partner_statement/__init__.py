@@ -1 +1,2 @@
+from . import partner_statement_xlsx
 from . import partner_statement_export
@@ -1,16 +1,15 @@
 # Copyright 2025 Ismail Cagan Yilmaz (https://github.com/milleniumkid)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from datetime import date, datetime
+from datetime import date
 
 from odoo import fields, models
-from odoo.tools.misc import formatLang
 
 
 class ReportPartnerStatement(models.TransientModel):
     _name = "report.partner.statement"
     _description = "Wizard for report.partner.statement"
-    _inherit = "xlsx.report"
+    _inherit = "partner.statement.xlsx"
 
     def _default_date_start(self):
         return date(date.today().year, 1, 1).strftime("%Y-%m-%d")
@@ -41,111 +40,75 @@ class ReportPartnerStatement(models.TransientModel):
     default_currency = fields.Many2one(
         "res.currency", string="Currency", default=_default_comp_curr
     )
-    results = fields.Many2many(
-        comodel_name="partner.statement.lines",
-        string="Statement Lines",
-        compute="_compute_lines",
-        help="Use compute fields, so there is nothing stored in database",
-    )
-
-    def _compute_lines(self):
-        for rec in self:
-            rec.results = self._get_statement_data()
 
-    def _get_statement_data(self):
-        statement_data = []
-        balance, seq = 0.0, 0
-        start_date = self.date_start
+    def _statement_columns(self):
+        return [
+            ("sequence", "NO", 6.11, "center"),
+            ("number", "Sayı", 20.37, "text"),
+            ("date", "Tarih", 13.19, "text"),
+            ("due_date", "Vade", 13.06, "text"),
+            ("description", "Açıklama", 27.78, "text"),
+            ("debit", "Borç", 14.31, "amount"),
+            ("credit", "Alacak", 14.31, "amount"),
+            ("balance", "Bakiye", 14.31, "amount"),
+            ("dc", "B/A", 5.14, "center"),
+        ]
+
+    def _statement_header_cells(self):
         partner = self.partner_id
-        end_date = self.date_end
-        # Currency = self.env["res.currency"]
-        move_type = ("asset_receivable", "liability_payable")
-        self.env.cr.execute(
-            """SELECT aj.name as journal, l.date_maturity as due_date,
-            l.date, am.name, am.state, move_id, SUM(l.debit)
-            AS debit, SUM(l.credit) AS credit,
-                        l.amount_currency as amount_currency,l.currency_id as
-                        currency_id,l.company_currency_id as company_currency_id
-                        FROM account_move_line AS l
-                        LEFT JOIN account_account a ON (l.account_id=a.id)
-                        LEFT JOIN account_move am ON (l.move_id=am.id)
-                        LEFT JOIN account_journal aj ON (am.journal_id=aj.id)
-                        WHERE (l.date BETWEEN %s AND %s)
-                        AND l.partner_id = %s AND  a.account_type IN %s
-            GROUP BY aj.name,move_id,am.name,am.state,l.date,l.date_maturity
-            ,l.amount_currency,l.currency_id,l.company_currency_id\
-                         ORDER BY l.date , l.currency_id """,
-            (
-                str(start_date),
-                str(end_date),
-                str(partner.commercial_partner_id.id),
-                move_type,
-            ),
-        )
-        for each_dict in self.env.cr.dictfetchall():
-            seq += 1
-            balance = (each_dict["debit"] - each_dict["credit"]) + balance
-            debit = 0.0
-            credit = 0.0
-            # currency_id = Currency.browse(each_dict["company_currency_id"])
-            if (each_dict["debit"] - each_dict["credit"]) > 0.0:
-                debit = each_dict["debit"] - each_dict["credit"]
-            else:
-                credit = each_dict["credit"] - each_dict["debit"]
-
-            statement_data.append(
-                self.env["partner.statement.lines"]
-                .create(
-                    vals_list={
-                        "sequence": seq,
-                        "number": each_dict["state"] == "draft"
-                        and "*" + str(each_dict["move_id"])
-                        or each_dict["name"],
-                        "date": each_dict["date"]
-                        and datetime.strptime(
-                            str(each_dict["date"]), "%Y-%m-%d"
-                        ).strftime("%d.%m.%Y")
-                        or False,
-                        "due_date": each_dict["due_date"]
-                        and datetime.strptime(
-                            str(each_dict["due_date"]), "%Y-%m-%d"
-                        ).strftime("%d.%m.%Y")
-                        or False,
-                        "description": len(each_dict["journal"]) >= 30
-                        and each_dict["journal"][0:30]
-                        or each_dict["journal"],
-                        "debit": formatLang(self.env, debit),
-                        "credit": formatLang(self.env, credit),
-                        "balance": formatLang(self.env, abs(balance)) or "0,00",
-                        "dc": balance > 0.01 and "B" or "A",
-                        "total": formatLang(self.env, balance) or "0,00",
-                    }
-                )
-                .id
+        return [
+            (1, 0, "Cari :"),
+            (1, 1, partner.name),
+            (1, 4, "Vergi No:"),
+            (1, 5, partner.vat),
+            (1, 6, "Vergi Dairesi:"),
+            (1, 7, partner.tax_office_name),
+            (2, 0, "Tel :"),
+            (2, 1, partner.phone or partner.mobile),
+            (2, 6, "Tarih:"),
+            (2, 7, self.date_now.strftime("%d.%m.%Y")),
+        ]
+
+    def _statement_total_cells(self):
+        return [(6, None), (7, "total"), (8, "dc")]
+
+    def _iter_statement_lines(self):
+        query = """
+            SELECT ROW_NUMBER() OVER w AS sequence,
+                   CASE WHEN am.state = 'draft' THEN '*' || am.id
+                        ELSE am.name
+                   END AS number,
+                   to_char(l.date, 'DD.MM.YYYY') AS date,
+                   to_char(l.date_maturity, 'DD.MM.YYYY') AS due_date,
+                   LEFT(COALESCE(aj.name->>%(lang)s, aj.name->>'en_US'), 30)
+                       AS description,
+                   GREATEST(SUM(l.debit) - SUM(l.credit), 0.0) AS debit,
+                   GREATEST(SUM(l.credit) - SUM(l.debit), 0.0) AS credit,
+                   SUM(SUM(l.debit) - SUM(l.credit)) OVER w AS total
+              FROM account_move_line l
+              JOIN account_account a ON a.id = l.account_id
+              JOIN account_move am ON am.id = l.move_id
+              JOIN account_journal aj ON aj.id = am.journal_id
+             WHERE l.date BETWEEN %(date_start)s AND %(date_end)s
+               AND l.partner_id = %(partner_id)s
+               AND a.account_type IN ('asset_receivable', 'liability_payable')
+             GROUP BY aj.id, am.id, l.date, l.date_maturity, l.amount_currency,
+                      l.currency_id, l.company_currency_id
+            WINDOW w AS (
+                ORDER BY l.date, l.currency_id, am.id, l.date_maturity,
+                         l.amount_currency
+                ROWS UNBOUNDED PRECEDING
             )
-
-        return statement_data
-
-
-class StatementLines(models.TransientModel):
-    _name = "partner.statement.lines"
-    _description = "Transient model for partner statement"
-
-    sequence = fields.Integer()
-    number = fields.Char()
-    date = fields.Char()
-    due_date = fields.Char()
-    description = fields.Char()
-    debit = fields.Char()
-    credit = fields.Char()
-    balance = fields.Char()
-    currency_rate = fields.Char()
-    sec_curr_debit = fields.Char()
-    sec_curr_credit = fields.Char()
-    sec_curr_balance = fields.Char()
-    dc = fields.Char()
-    sec_curr_dc = fields.Char()
-    total = fields.Char()
-    sec_curr_total = fields.Char()
-    primary_currency = fields.Many2one("res.currency")
-    secondary_currency = fields.Many2one("res.currency")
+             ORDER BY l.date, l.currency_id, am.id, l.date_maturity,
+                      l.amount_currency
+        """
+        params = {
+            "lang": self.env.lang or "en_US",
+            "date_start": self.date_start,
+            "date_end": self.date_end,
+            "partner_id": self.partner_id.commercial_partner_id.id,
+        }
+        for line in self._iter_query(query, params):
+            line["balance"] = abs(line["total"])
+            line["dc"] = line["total"] > 0.01 and "B" or "A"
+            yield line
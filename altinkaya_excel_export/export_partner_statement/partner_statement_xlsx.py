@@ -0,0 +1,194 @@
+# Copyright 2025 Ismail Cagan Yilmaz (https://github.com/milleniumkid)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import base64
+import io
+from uuid import uuid4
+
+import xlsxwriter
+
+from odoo import models
+from odoo.tools.image import image_process
+
+STATEMENT_FETCH_SIZE = 2000
+
+
+class PartnerStatementXlsx(models.AbstractModel):
+    """
+    Partner statements written straight into xlsxwriter in constant memory
+    mode. Lines are streamed from a server side cursor, so neither the
+    lines nor the rows of the sheet are held in memory.
+    """
+
+    _name = "partner.statement.xlsx"
+    _description = "Partner Statement Excel Writer"
+    _inherit = "xlsx.report"
+
+    # Columns of the title, the company block spans the others
+    _statement_title_columns = 3
+
+    def _statement_columns(self):
+        """
+        :return: list of (line key, header, width, format name) of the
+            statement columns, format name is one of _statement_formats
+        """
+        raise NotImplementedError()
+
+    def _statement_header_cells(self):
+        """
+        :return: list of (row, column, value) of the partner informations
+            written between the title and the column headers
+        """
+        return []
+
+    def _statement_total_cells(self):
+        """
+        :return: list of (column, line key) of the total row, the value of
+            the last line is written, a cell without key is labeled
+        """
+        return []
+
+    def _iter_statement_lines(self):
+        """
+        :return: generator of statement line dicts
+        """
+        raise NotImplementedError()
+
+    def _iter_query(self, query, params):
+        """
+        Stream the rows of a query from a server side cursor, only
+        STATEMENT_FETCH_SIZE rows are held in memory at a time.
+        :return: generator of row dicts
+        """
+        self.env.flush_all()
+        cursor = self.env.cr._cnx.cursor(name="partner_statement_%s" % uuid4().hex)
+        cursor.itersize = STATEMENT_FETCH_SIZE
+        try:
+            cursor.execute(query, params)
+            columns = None
+            for row in cursor:
+                if columns is None:
+                    columns = [column[0] for column in cursor.description]
+                yield dict(zip(columns, row))
+        finally:
+            cursor.close()
+
+    def _statement_formats(self, workbook):
+        border = {"border": 1, "valign": "vcenter"}
+        return {
+            "title": workbook.add_format(
+                {"bold": True, "font_size": 14, "align": "center", "valign": "vcenter"}
+            ),
+            "company": workbook.add_format(
+                {"text_wrap": True, "align": "right", "valign": "vcenter"}
+            ),
+            "label": workbook.add_format({"bold": True}),
+            "header": workbook.add_format(dict(border, bold=True, align="center")),
+            "text": workbook.add_format(dict(border, align="left")),
+            "center": workbook.add_format(dict(border, align="center")),
+            "amount": workbook.add_format(dict(border, num_format="#,##0.00")),
+            "rate": workbook.add_format(dict(border, num_format="0.0000")),
+            "total": workbook.add_format({"bold": True, "num_format": "#,##0.00"}),
+        }
+
+    def _write_statement_title(self, worksheet, formats, column_count):
+        company = self.env.company
+        worksheet.set_row(0, 60)
+        worksheet.merge_range(
+            0,
+            0,
+            0,
+            self._statement_title_columns - 1,
+            "CARİ HESAP EKSTRESİ",
+            formats["title"],
+        )
+        company_lines = [
+            company.name,
+            company.partner_id._display_address(without_company=True),
+            " ".join(
+                info for info in (company.phone, company.website, company.email) if info
+            ),
+        ]
+        worksheet.merge_range(
+            0,
+            self._statement_title_columns,
+            0,
+            column_count - 1,
+            "\n".join(line for line in company_lines if line),
+            formats["company"],
+        )
+        if company.logo:
+            worksheet.insert_image(
+                0,
+                self._statement_title_columns,
+                "logo.png",
+                {
+                    "image_data": io.BytesIO(
+                        image_process(base64.b64decode(company.logo), size=(270, 40))
+                    ),
+                    "x_offset": 10,
+                    "y_offset": 20,
+                },
+            )
+
+    def _write_statement_xlsx(self, output):
+        """
+        Write the statement workbook, rows must be written in order in
+        constant memory mode.
+        :param output: file object receiving the workbook
+        :return: number of written lines
+        """
+        columns = self._statement_columns()
+        workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+        worksheet = workbook.add_worksheet("Ekstre")
+        formats = self._statement_formats(workbook)
+        for index, (_key, _header, width, _format) in enumerate(columns):
+            worksheet.set_column(index, index, width)
+        self._write_statement_title(worksheet, formats, len(columns))
+        for row, column, value in sorted(
+            self._statement_header_cells(), key=lambda cell: cell[:2]
+        ):
+            worksheet.write(row, column, value or "", formats["label"])
+        header_row = 3
+        for index, (_key, header, _width, _format) in enumerate(columns):
+            worksheet.write_string(header_row, index, header, formats["header"])
+        row = header_row
+        count = 0
+        line = {}
+        for count, line in enumerate(self._iter_statement_lines(), 1):
+            row = header_row + count
+            for index, (key, _header, _width, format_name) in enumerate(columns):
+                value = line[key]
+                if value is None or value is False:
+                    value = ""
+                worksheet.write(row, index, value, formats[format_name])
+        totals = self._statement_total_cells()
+        if line and totals:
+            row += 2
+            for column, key in totals:
+                if key:
+                    worksheet.write(row, column, line[key], formats["total"])
+                else:
+                    worksheet.write_string(row, column, "Toplam:", formats["label"])
+        workbook.close()
+        return count
+
+    def report_xlsx(self):
+        self.ensure_one()
+        output = io.BytesIO()
+        self._write_statement_xlsx(output)
+        self.write(
+            {
+                "state": "get",
+                "data": base64.b64encode(output.getvalue()),
+                "name": self.template_id.fname or "%s.xlsx" % self._name,
+            }
+        )
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "view_mode": "form",
+            "res_id": self.id,
+            "views": [(False, "form")],
+            "target": "new",
+        }
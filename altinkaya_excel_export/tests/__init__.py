@@ -0,0 +1 @@
+from . import test_partner_statement_export
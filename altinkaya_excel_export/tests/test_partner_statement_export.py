@@ -0,0 +1,166 @@
+import base64
+import io
+import logging
+import time
+import tracemalloc
+import zipfile
+
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.addons.altinkaya_reports.tests.common import clone_invoice
+
+_logger = logging.getLogger(__name__)
+
+# Statement line counts of the export benchmark
+BENCH_LINES = (1000, 10000, 50000)
+
+
+class PartnerStatementExportCommon(AccountTestInvoicingCommon):
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.partner = cls.partner_a
+        cls.invoices = cls.env["account.move"]
+        for invoice_date in ("2024-02-01", "2024-03-01", "2024-04-01"):
+            cls.invoices |= cls.init_invoice(
+                "out_invoice",
+                partner=cls.partner,
+                invoice_date=invoice_date,
+                amounts=[100.0],
+                post=True,
+            )
+
+    def _export(self, model, template_xmlid):
+        wizard = self.env[model].create(
+            {
+                "partner_id": self.partner.id,
+                "date_start": "2024-01-01",
+                "date_end": "2024-12-31",
+                "template_id": self.env.ref(template_xmlid).id,
+            }
+        )
+        wizard.report_xlsx()
+        return wizard
+
+    def _sheet_rows(self, wizard):
+        with zipfile.ZipFile(io.BytesIO(base64.b64decode(wizard.data))) as xlsx:
+            sheet = xlsx.read("xl/worksheets/sheet1.xml").decode()
+        return sheet.count("<row ")
+
+
+@tagged("post_install", "-at_install")
+class TestPartnerStatementExport(PartnerStatementExportCommon):
+    def test_partner_statement_export(self):
+        wizard = self._export(
+            "report.partner.statement", "altinkaya_excel_export.partner_statement"
+        )
+        self.assertEqual(wizard.state, "get")
+        # title, partner, header, lines and total rows
+        self.assertEqual(self._sheet_rows(wizard), 4 + len(self.invoices) + 1)
+        self.assertNotIn("partner.statement.lines", self.env)
+
+    def test_partner_statement_lines(self):
+        wizard = self.env["report.partner.statement"].create(
+            {
+                "partner_id": self.partner.id,
+                "date_start": "2024-01-01",
+                "date_end": "2024-12-31",
+            }
+        )
+        lines = list(wizard._iter_statement_lines())
+        self.assertEqual([line["sequence"] for line in lines], [1, 2, 3])
+        self.assertEqual(lines[0]["date"], "01.02.2024")
+        total = sum(self.invoices.mapped("amount_total"))
+        self.assertAlmostEqual(lines[-1]["total"], total)
+        self.assertEqual(lines[-1]["dc"], "B")
+
+    def _set_currency_receivable(self):
+        currency = self.currency_data["currency"]
+        receivable = self.env["account.account"].create(
+            {
+                "name": "Receivable in currency",
+                "code": "120.CUR",
+                "account_type": "asset_receivable",
+                "reconcile": True,
+                "currency_id": currency.id,
+            }
+        )
+        self.partner.property_account_receivable_id = receivable
+        return currency
+
+    def test_currency_statement_export(self):
+        self._set_currency_receivable()
+        wizard = self._export(
+            "report.partner.statement.currency",
+            "altinkaya_excel_export.partner_statement_currency",
+        )
+        self.assertEqual(self._sheet_rows(wizard), 4 + len(self.invoices) + 1)
+
+    def test_currency_statement_rates(self):
+        currency = self._set_currency_receivable()
+        # The statement reads the rate column, not the main rate field
+        currency.main_rate_field = "tcmb_forex_buying"
+        company_currency = self.env.company.currency_id
+        self.env["res.currency.rate"].search(
+            [("currency_id", "in", (currency | company_currency).ids)]
+        ).unlink()
+        self.env["res.currency.rate"].create(
+            [
+                {
+                    "name": name,
+                    "currency_id": currency.id,
+                    "company_id": self.env.company.id,
+                    "rate": rate,
+                    "tcmb_forex_buying": rate / 2,
+                }
+                for name, rate in (("2024-01-01", 0.5), ("2024-03-01", 0.4))
+            ]
+        )
+        wizard = self.env["report.partner.statement.currency"].create(
+            {
+                "partner_id": self.partner.id,
+                "date_start": "2024-01-01",
+                "date_end": "2024-12-31",
+            }
+        )
+        lines = list(wizard._iter_statement_lines())
+        self.assertEqual(len(lines), len(self.invoices))
+        for line, rate in zip(lines, (0.5, 0.4, 0.4)):
+            self.assertAlmostEqual(line["currency_rate"], 1 / rate)
+            self.assertAlmostEqual(line["sec_curr_debit"], line["debit"] * rate)
+
+
+@tagged("post_install", "-at_install", "-standard", "benchmark")
+class TestPartnerStatementExportBenchmark(PartnerStatementExportCommon):
+    def _export_statement(self):
+        return self._export(
+            "report.partner.statement", "altinkaya_excel_export.partner_statement"
+        )
+
+    def test_export_benchmark(self):
+        exported = 0
+        for count in BENCH_LINES:
+            clone_invoice(self.invoices[0], count - exported, "2024-01-01", 365)
+            exported = count
+            start = time.perf_counter()
+            self._export_statement()
+            elapsed = time.perf_counter() - start
+            # The peak memory of the export alone, measured by a second export
+            # as tracing slows it down
+            self.env.invalidate_all()
+            tracemalloc.start()
+            try:
+                wizard = self._export_statement()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            _logger.info(
+                "Partner statement export of %s lines: %.3fs, peak memory %s kB",
+                count + len(self.invoices),
+                elapsed,
+                peak // 1024,
+            )
+            self.assertEqual(
+                self._sheet_rows(wizard), 4 + count + len(self.invoices) + 1
+            )
@@ -2,3 +2,5 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 from . import mrp_bom
 from . import mrp_bom_template_line
+from . import mrp_bom_explosion
+from . import product
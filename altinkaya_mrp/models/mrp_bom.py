@@ -1,6 +1,8 @@
 # Copyright 2023 Yiğit Budak (https://github.com/yibudak)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
-from odoo import _, fields, models
+from collections import defaultdict, deque
+
+from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 from odoo.tools import float_round
 
@@ -12,28 +14,136 @@ class MRPBoM(models.Model):
         "mrp.bom.template.line", "bom_id", "BoM Template Lines"
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        boms = super().create(vals_list)
+        self.env["mrp.bom.explosion"]._invalidate_templates(boms.product_tmpl_id)
+        return boms
+
+    def write(self, vals):
+        templates = self.product_tmpl_id
+        res = super().write(vals)
+        self.env["mrp.bom.explosion"]._invalidate_templates(
+            templates | self.product_tmpl_id
+        )
+        return res
+
+    def unlink(self):
+        self.env["mrp.bom.explosion"]._invalidate_templates(self.product_tmpl_id)
+        return super().unlink()
+
+    def _compute_line_quantity(self, line, product, current_qty):
+        """Quantity of a BoM (template) line for current_qty of product"""
+        return current_qty * line.product_qty
+
+    def _explode_add_edge(self, graph, source, target):
+        """
+        Add the source -> target product template edge to the explosion
+        graph. The graph is acyclic before the edge is added, so the edge
+        closes a cycle only if target already reaches source.
+        """
+        if target in graph[source]:
+            return
+        to_visit = [target]
+        visited = set()
+        while to_visit:
+            vertex = to_visit.pop()
+            if vertex == source:
+                raise UserError(
+                    _(
+                        "Recursion error!  A product with a "
+                        "Bill of Material should not have itself "
+                        "in its BoM or child BoMs!"
+                    )
+                )
+            if vertex not in visited:
+                visited.add(vertex)
+                to_visit.extend(graph[vertex])
+        graph[source].add(target)
+
+    def _explode_prepare_lines(
+        self, lines, product, quantity, parent_line, picking_type
+    ):
+        """
+        Resolve the component product, quantity and BoM of sibling lines,
+        with a single _bom_find call for all of them.
+        :param lines: list of (bom line or bom template line, line type)
+        :return: list of (line, product, line quantity, parent line,
+            component product, component BoM)
+        """
+        prepared = []
+        lines = [
+            (line, line_type)
+            for line, line_type in lines
+            if not line._skip_bom_line(product)
+        ]
+        template_lines = self.env["mrp.bom.template.line"].concat(
+            *[line for line, line_type in lines if line_type == "tmpl_line"]
+        )
+        variants = template_lines._match_possible_variants(product)
+        for line, line_type in lines:
+            line_quantity = self._compute_line_quantity(line, product, quantity)
+            if line_type == "bom_line":
+                line_product = line.product_id
+            else:
+                line_product = variants[line.id]
+                if not line_product:
+                    continue
+            prepared.append((line, product, line_quantity, parent_line, line_product))
+        if not prepared:
+            return []
+        boms = self._bom_find(
+            products=self.env["product.product"].browse(
+                {values[4].id for values in prepared}
+            ),
+            picking_type=picking_type,
+            company_id=self.company_id.id,
+        )
+        return [values + (boms[values[4]],) for values in prepared]
+
     def explode(self, product, quantity, picking_type=False):
         """
-        This method is copied from mrp/models/mrp_bom.py
-        and modified to use bom_template_line_ids within bom_line_ids
+        Serve the explosion from the flattened BoM table when this BoM,
+        product and picking type were exploded before and the BoM data did
+        not change since, whatever the quantity. Set no_bom_explosion_cache
+        in the context to always explode, e.g. for debugging.
         """
-        from collections import defaultdict
-
-        graph = defaultdict(list)
-        V = set()
-
-        def check_cycle(v, visited, recStack, graph):
-            visited[v] = True
-            recStack[v] = True
-            for neighbour in graph[v]:
-                if not visited[neighbour]:
-                    if check_cycle(neighbour, visited, recStack, graph):
-                        return True
-                elif recStack[neighbour]:
-                    return True
-            recStack[v] = False
-            return False
+        self.ensure_one()
+        picking_type = picking_type or self.picking_type_id
+        BomExplosion = self.env["mrp.bom.explosion"]
+        if (
+            self.env.context.get("no_bom_explosion_cache")
+            or not isinstance(self.id, int)
+            or not isinstance(product.id, int)
+            or BomExplosion._is_pending()
+        ):
+            return self._explode(product, quantity, picking_type=picking_type)
+        explosion = BomExplosion._lookup(self, product, quantity, picking_type)
+        if explosion is None:
+            levels = {"boms": [], "lines": []}
+            explosion = self._explode(
+                product, quantity, picking_type=picking_type, levels=levels
+            )
+            BomExplosion._store(self, product, picking_type, explosion, levels)
+        return explosion
 
+    def _explode(self, product, quantity, picking_type=False, levels=None):
+        """
+        This method is copied from mrp/models/mrp_bom.py
+        and modified to use bom_template_line_ids within bom_line_ids.
+        Lines are walked depth first through a deque, the BoMs of the
+        components of each level are found at once and cycles are detected
+        on one incremental product template graph.
+        :param levels: optional dict receiving in its "boms" and "lines"
+            lists the level of each entry of the result, the index in
+            boms_done of the BoM whose lines the entry comes from, None for
+            this BoM
+        """
+        if levels is None:
+            levels = {"boms": [], "lines": []}
+        levels["boms"].append(None)
+        picking_type = picking_type or self.picking_type_id
+        graph = defaultdict(set)
         boms_done = [
             (
                 self,
@@ -46,81 +156,60 @@ class MRPBoM(models.Model):
             )
         ]
         lines_done = []
-        V |= set([product.product_tmpl_id.id])
 
-        bom_lines = [
-            (bom_line, product, quantity, False, "bom_line")
-            for bom_line in self.bom_line_ids
-        ]
+        root_lines = [(line, "bom_line") for line in self.bom_line_ids]
         # Add bom template lines
-        bom_lines += [
-            (bom_line, product, quantity, False, "tmpl_line")
-            for bom_line in self.bom_template_line_ids
-        ]
+        root_lines += [(line, "tmpl_line") for line in self.bom_template_line_ids]
         for bom_line in self.bom_line_ids:
-            V |= set([bom_line.product_id.product_tmpl_id.id])
-            graph[product.product_tmpl_id.id].append(
+            graph[product.product_tmpl_id.id].add(
                 bom_line.product_id.product_tmpl_id.id
             )
-
-        # Add bom template lines
         for bom_line in self.bom_template_line_ids:
-            V |= set([bom_line.product_tmpl_id.id])
-            graph[product.product_tmpl_id.id].append(bom_line.product_tmpl_id.id)
-        while bom_lines:
-            current_line, current_product, current_qty, parent_line, line_type = (
-                bom_lines[0]
+            graph[product.product_tmpl_id.id].add(bom_line.product_tmpl_id.id)
+        bom_lines = deque(
+            values + (0,)
+            for values in self._explode_prepare_lines(
+                root_lines, product, quantity, False, picking_type
             )
-            bom_lines = bom_lines[1:]
-
-            if current_line._skip_bom_line(current_product):
-                continue
-
-            line_quantity = current_qty * current_line.product_qty
-            if line_type == "bom_line":
-                line_product = current_line.product_id
-            else:
-                line_product = current_line._match_possible_variant(current_product)
-                if not line_product:
-                    continue
+        )
+        while bom_lines:
+            (
+                current_line,
+                current_product,
+                line_quantity,
+                parent_line,
+                line_product,
+                bom,
+                level,
+            ) = bom_lines.popleft()
 
-            bom = self._bom_find(
-                products=line_product,
-                picking_type=picking_type or self.picking_type_id,
-                company_id=self.company_id.id,
-            )
-            bom = bom[line_product]
             if bom.type == "phantom":
                 converted_line_quantity = current_line.product_uom_id._compute_quantity(
                     line_quantity / bom.product_qty, bom.product_uom_id
                 )
-                bom_lines = [
-                    (
-                        line,
-                        current_line.product_id,
-                        converted_line_quantity,
-                        current_line,
-                    )
-                    for line in bom.bom_line_ids
-                ] + bom_lines
                 for bom_line in bom.bom_line_ids:
-                    graph[current_line.product_id.product_tmpl_id.id].append(
-                        bom_line.product_id.product_tmpl_id.id
-                    )
-                    if bom_line.product_id.product_tmpl_id.id in V and check_cycle(
-                        bom_line.product_id.product_tmpl_id.id,
-                        {key: False for key in V},
-                        {key: False for key in V},
+                    self._explode_add_edge(
                         graph,
-                    ):
-                        raise UserError(
-                            _(
-                                "Recursion error!  A product with a "
-                                "Bill of Material should not have itself "
-                                "in its BoM or child BoMs!"
+                        line_product.product_tmpl_id.id,
+                        bom_line.product_id.product_tmpl_id.id,
+                    )
+                # Children are exploded right after their parent line, on the
+                # level of the BoM appended below
+                bom_lines.extendleft(
+                    reversed(
+                        [
+                            values + (len(boms_done),)
+                            for values in self._explode_prepare_lines(
+                                [(line, "bom_line") for line in bom.bom_line_ids],
+                                line_product,
+                                converted_line_quantity,
+                                current_line,
+                                picking_type,
                             )
-                        )
-                    V |= set([bom_line.product_id.product_tmpl_id.id])
+                        ]
+                    )
+                )
+                levels["boms"].append(level)
                 boms_done.append(
                     (
                         bom,
@@ -139,6 +228,7 @@ class MRPBoM(models.Model):
                 line_quantity = float_round(
                     line_quantity, precision_rounding=rounding, rounding_method="UP"
                 )
+                levels["lines"].append(level)
                 lines_done.append(
                     (
                         current_line,
@@ -153,3 +243,27 @@ class MRPBoM(models.Model):
                 )
 
         return boms_done, lines_done
+
+
+class MrpBomLine(models.Model):
+    _inherit = "mrp.bom.line"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env["mrp.bom.explosion"]._invalidate_templates(
+            lines.bom_id.product_tmpl_id
+        )
+        return lines
+
+    def write(self, vals):
+        templates = self.bom_id.product_tmpl_id
+        res = super().write(vals)
+        self.env["mrp.bom.explosion"]._invalidate_templates(
+            templates | self.bom_id.product_tmpl_id
+        )
+        return res
+
+    def unlink(self):
+        self.env["mrp.bom.explosion"]._invalidate_templates(self.bom_id.product_tmpl_id)
+        return super().unlink()
@@ -0,0 +1,283 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+import json
+import logging
+
+import psycopg2
+
+from odoo import api, fields, models
+from odoo.tools import float_round
+
+_logger = logging.getLogger(__name__)
+
+# Key of the product template ids changed by the current transaction in the
+# precommit data of the cursor
+PENDING_TEMPLATES_KEY = "mrp.bom.explosion.templates"
+
+
+class MrpBomExplosionVersion(models.Model):
+    _name = "mrp.bom.explosion.version"
+    _description = "BoM Explosion Version of a Product Template"
+    _log_access = False
+
+    product_tmpl_id = fields.Many2one(
+        "product.template", required=True, ondelete="cascade"
+    )
+    version = fields.Integer(required=True)
+
+    _sql_constraints = [
+        (
+            "product_tmpl_uniq",
+            "unique(product_tmpl_id)",
+            "A product template has one explosion version.",
+        )
+    ]
+
+    def init(self):
+        self.env.cr.execute(
+            "CREATE SEQUENCE IF NOT EXISTS mrp_bom_explosion_version_seq"
+        )
+
+
+class MrpBomExplosion(models.Model):
+    _name = "mrp.bom.explosion"
+    _description = "Flattened BoM Explosion"
+    _log_access = False
+
+    bom_id = fields.Many2one("mrp.bom", required=True, ondelete="cascade", index=True)
+    product_id = fields.Many2one(
+        "product.product", required=True, ondelete="cascade", index=True
+    )
+    picking_type_id = fields.Many2one("stock.picking.type", ondelete="cascade")
+    stamp = fields.Integer(
+        required=True,
+        help="Sum of the versions of the product templates the explosion was "
+        "computed from",
+    )
+    data = fields.Text(required=True)
+
+    def init(self):
+        self.env.cr.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS mrp_bom_explosion_bom_product_uniq
+                ON mrp_bom_explosion (
+                    bom_id, product_id, COALESCE(picking_type_id, 0)
+                )
+            """
+        )
+
+    @api.model
+    def _invalidate_templates(self, templates):
+        """
+        Give the product templates a new explosion version when the
+        transaction commits. Until then, the transaction neither serves nor
+        stores explosions, they could be computed from uncommitted data.
+        :param templates: product.template records whose BoMs, BoM lines,
+            template lines or variants change
+        """
+        if not templates:
+            return
+        data = self.env.cr.precommit.data
+        if PENDING_TEMPLATES_KEY not in data:
+            data[PENDING_TEMPLATES_KEY] = set()
+            self.env.cr.precommit.add(self._bump_versions)
+        data[PENDING_TEMPLATES_KEY].update(templates.ids)
+
+    @api.model
+    def _bump_versions(self):
+        template_ids = self.env.cr.precommit.data.pop(PENDING_TEMPLATES_KEY, set())
+        if not template_ids:
+            return
+        # Versions come from one sequence, so that a new version is greater
+        # than all the previous ones and the sum of versions always grows
+        self.env.cr.execute(
+            """
+            INSERT INTO mrp_bom_explosion_version (product_tmpl_id, version)
+            SELECT id, nextval('mrp_bom_explosion_version_seq')
+              FROM product_template
+             WHERE id = ANY(%s)
+             ORDER BY id
+            ON CONFLICT (product_tmpl_id)
+            DO UPDATE SET version = EXCLUDED.version
+            """,
+            (sorted(template_ids),),
+        )
+
+    @api.model
+    def _is_pending(self):
+        """
+        :return: whether the transaction changed BoM data not committed yet
+        """
+        return bool(self.env.cr.precommit.data.get(PENDING_TEMPLATES_KEY))
+
+    @api.model
+    def _get_stamp(self, template_ids):
+        """
+        :param template_ids: ids of the product templates of an explosion
+        :return: stamp of the committed BoM data of the templates
+        """
+        self.env.cr.execute(
+            """
+            SELECT COALESCE(SUM(version), 0)
+              FROM mrp_bom_explosion_version
+             WHERE product_tmpl_id = ANY(%s)
+            """,
+            (list(template_ids),),
+        )
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _get_dependencies(self, bom, product, explosion):
+        """
+        :return: sorted ids of the product templates the explosion of the
+            BoM for the product depends on: the templates of the exploded
+            BoMs, of their components and of the product
+        """
+        boms_done, _lines_done = explosion
+        boms = self.env["mrp.bom"].concat(*[done_bom for done_bom, _v in boms_done])
+        template_ids = set(boms.product_tmpl_id.ids)
+        template_ids.add(product.product_tmpl_id.id)
+        template_ids.update(boms.bom_line_ids.product_id.product_tmpl_id.ids)
+        template_ids.update(bom.bom_template_line_ids.product_tmpl_id.ids)
+        return sorted(template_ids)
+
+    def _line_key(self, line):
+        return [line._name, line.id] if line else None
+
+    def _line_from_key(self, key):
+        return self.env[key[0]].browse(key[1]) if key else False
+
+    @api.model
+    def _lookup(self, bom, product, quantity, picking_type):
+        """
+        Replay the stored explosion of the BoM, product and picking type for
+        the quantity. The quantities are computed again level by level, as
+        _explode does, so an explosion serves any quantity.
+        :return: explode() result of the stored explosion, None on a miss or
+            when the BoM data changed since it was stored
+        """
+        self.env.cr.execute(
+            """
+            SELECT stamp, data
+              FROM mrp_bom_explosion
+             WHERE bom_id = %s
+               AND product_id = %s
+               AND COALESCE(picking_type_id, 0) = %s
+            """,
+            (bom.id, product.id, picking_type.id or 0),
+        )
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+        data = json.loads(row[1])
+        if self._get_stamp(data["template_ids"]) != row[0]:
+            return None
+        Bom = self.env["mrp.bom"]
+        Product = self.env["product.product"]
+        boms_done = []
+        level_quantities = []
+        for bom_id, product_id, parent_line, level in data["boms"]:
+            done_bom = Bom.browse(bom_id)
+            level_product = Product.browse(product_id)
+            parent_line = self._line_from_key(parent_line)
+            if level is None:
+                level_quantity = quantity
+            else:
+                line_quantity = bom._compute_line_quantity(
+                    parent_line, level_product, level_quantities[level]
+                )
+                level_quantity = parent_line.product_uom_id._compute_quantity(
+                    line_quantity / done_bom.product_qty, done_bom.product_uom_id
+                )
+            level_quantities.append(level_quantity)
+            boms_done.append(
+                (
+                    done_bom,
+                    {
+                        "qty": level_quantity,
+                        "product": level_product,
+                        "original_qty": quantity,
+                        "parent_line": parent_line,
+                    },
+                )
+            )
+        lines_done = []
+        for line, target_id, product_id, parent_line, level in data["lines"]:
+            line = self._line_from_key(line)
+            level_product = Product.browse(product_id)
+            line_quantity = float_round(
+                bom._compute_line_quantity(
+                    line, level_product, level_quantities[level]
+                ),
+                precision_rounding=line.product_uom_id.rounding,
+                rounding_method="UP",
+            )
+            lines_done.append(
+                (
+                    line,
+                    {
+                        "target_product": Product.browse(target_id),
+                        "qty": line_quantity,
+                        "product": level_product,
+                        "original_qty": quantity,
+                        "parent_line": self._line_from_key(parent_line),
+                    },
+                )
+            )
+        return boms_done, lines_done
+
+    @api.model
+    def _store(self, bom, product, picking_type, explosion, levels):
+        """
+        Keep the explosion as the one of the BoM, product and picking type.
+        The row is written by its own short transaction so that readers do
+        not hold locks on the table, and skipped when it cannot be written,
+        e.g. on a concurrent store.
+        :param levels: levels of the explosion entries, see _explode
+        """
+        boms_done, lines_done = explosion
+        template_ids = self._get_dependencies(bom, product, explosion)
+        data = {
+            "template_ids": template_ids,
+            "boms": [
+                (
+                    done_bom.id,
+                    values["product"].id,
+                    self._line_key(values["parent_line"]),
+                    level,
+                )
+                for (done_bom, values), level in zip(boms_done, levels["boms"])
+            ],
+            "lines": [
+                (
+                    self._line_key(line),
+                    values["target_product"].id,
+                    values["product"].id,
+                    self._line_key(values["parent_line"]),
+                    level,
+                )
+                for (line, values), level in zip(lines_done, levels["lines"])
+            ],
+        }
+        params = (
+            bom.id,
+            product.id,
+            picking_type.id or None,
+            self._get_stamp(template_ids),
+            json.dumps(data),
+        )
+        try:
+            with self.pool.cursor() as cr:
+                # Never wait for another transaction storing the same row
+                cr.execute("SET LOCAL lock_timeout = '1s'")
+                cr.execute(
+                    """
+                    INSERT INTO mrp_bom_explosion
+                           (bom_id, product_id, picking_type_id, stamp, data)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (bom_id, product_id, COALESCE(picking_type_id, 0))
+                    DO UPDATE SET stamp = EXCLUDED.stamp, data = EXCLUDED.data
+                    """,
+                    params,
+                )
+        except psycopg2.Error as e:
+            _logger.debug("BoM explosion of %s not stored: %s", bom, e)
@@ -76,6 +76,26 @@ class MrpBomTemplateLine(models.Model):
         string="Factor", help="Factor to multiply by the numeric value of attribute"
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env["mrp.bom.explosion"]._invalidate_templates(
+            lines.bom_id.product_tmpl_id
+        )
+        return lines
+
+    def write(self, vals):
+        templates = self.bom_id.product_tmpl_id
+        res = super().write(vals)
+        self.env["mrp.bom.explosion"]._invalidate_templates(
+            templates | self.bom_id.product_tmpl_id
+        )
+        return res
+
+    def unlink(self):
+        self.env["mrp.bom.explosion"]._invalidate_templates(self.bom_id.product_tmpl_id)
+        return super().unlink()
+
     @api.onchange("product_tmpl_id", "bom_product_id")
     def _product_onchange_domain(self):
         """
@@ -133,46 +153,61 @@ class MrpBomTemplateLine(models.Model):
     def _match_possible_variant(self, product):
         """Match attribute values as much as possible between bom line and product"""
         self.ensure_one()
+        return self._match_possible_variants(product)[self.id]
 
-        def match_products(products, attr_val_list):
-            """Recursive function to match attribute values"""
-            if not attr_val_list:
-                return products
-            attr_val = attr_val_list[0]
-            return match_products(
-                products.filtered(
-                    lambda p: attr_val
-                    in p.product_template_attribute_value_ids.product_attribute_value_id
-                ),
-                attr_val_list[1:],
+    def _match_possible_variants(self, product):
+        """
+        Resolve the variants of all the template lines for one finished
+        product. Candidate variants are narrowed by intersecting the variant
+        sets of the attribute value indexes of product.template, fetched
+        once for all the templates of the lines.
+        :param product: finished product.product
+        :return: dict {template line id: product.product or False}
+        """
+        product_values = product.product_template_attribute_value_ids.mapped(
+            "product_attribute_value_id"
+        )
+        Template = self.env["product.template"]
+        indexes = self.product_tmpl_id._get_variant_attribute_indexes()
+        result = {}
+        for line in self:
+            template = line.product_tmpl_id
+            variant_index = indexes[template.id]
+            result[line.id] = False
+
+            # Phase 1: match inherited attributes
+            common_attrs = product_values.filtered(
+                lambda a, line=line: a.attribute_id in line.inherited_attribute_ids
             )
+            if not common_attrs:
+                continue
+            matched_ids = Template._match_variants(variant_index, common_attrs.ids)
+            if not matched_ids:
+                continue
+
+            # Phase 2: match additional attributes
+            if line.attribute_value_ids:
+                # A single target value is expected, as with the "in" test of
+                # recordsets used before.
+                target_values = line.target_attribute_value_ids
+                if len(target_values) != 1:
+                    continue
+                matched_ids = Template._match_variants(
+                    variant_index, target_values.ids, matched_ids
+                )
+            else:
+                line_attributes = template.attribute_line_ids.attribute_id
+                additional_attr_vals = product_values.filtered(
+                    lambda a, attrs=line_attributes, common=common_attrs: (
+                        a.attribute_id in attrs and a not in common
+                    )
+                )
+                matched_ids = Template._match_variants(
+                    variant_index, additional_attr_vals.ids, matched_ids
+                )
 
-        target_products = self.mapped("product_tmpl_id.product_variant_ids")
-
-        # Phase 1: match inherited attributes
-        common_attrs = product.product_template_attribute_value_ids.filtered(
-            lambda a: a.attribute_id in self.inherited_attribute_ids
-        ).product_attribute_value_id
-        if not common_attrs:
-            return False
-        matched_products = match_products(target_products, common_attrs)
-        if not matched_products:
-            return False
-
-        # Phase 2: match additional attributes
-        if self.attribute_value_ids:
-            matched_products = matched_products.filtered(
-                lambda p: self.target_attribute_value_ids
-                in p.product_template_attribute_value_ids.product_attribute_value_id
+            # return single product if possible
+            result[line.id] = (
+                Template._first_variant(variant_index, matched_ids) or False
             )
-        else:
-            line_attribute_ids = self.mapped(
-                "product_tmpl_id.attribute_line_ids.attribute_id"
-            )
-            additional_attr_vals = product.product_template_attribute_value_ids.product_attribute_value_id.filtered(  # noqa
-                lambda a: a.attribute_id in line_attribute_ids and a not in common_attrs
-            )
-            matched_products = match_products(matched_products, additional_attr_vals)
-
-        # return single product if possible
-        return fields.first(matched_products) or False
+        return result
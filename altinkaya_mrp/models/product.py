@@ -0,0 +1,157 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+from odoo import api, models, tools
+
+# Fields of the variants the explosion of a BoM depends on
+EXPLOSION_VARIANT_FIELDS = {
+    "active",
+    "product_tmpl_id",
+    "product_template_attribute_value_ids",
+    "combination_indices",
+}
+
+# Key of the cache clearing of the variant attribute indexes in the
+# postcommit data of the cursor
+VARIANT_INDEX_KEY = "product.template.variant_index"
+
+
+class ProductTemplate(models.Model):
+    _inherit = "product.template"
+
+    def _get_variant_attribute_indexes(self):
+        """
+        Inverted indexes of the active variants of the templates, built from
+        product_variant_combination. An index is cached per template until
+        one of its variants is created, changed or removed, see
+        _clear_variant_attribute_index.
+        :return: dict {product.template id: (variant ids in
+            product_variant_ids order, {product.attribute.value id:
+            frozenset of variant ids})}
+        """
+        return {
+            template_id: self._get_cached_variant_attribute_index(template_id)
+            for template_id in self.ids
+        }
+
+    @api.model
+    @tools.ormcache("template_id")
+    def _get_cached_variant_attribute_index(self, template_id):
+        variant_ids = tuple(
+            self.env["product.product"]
+            .sudo()
+            .with_context(active_test=True)
+            ._search([("product_tmpl_id", "=", template_id)])
+        )
+        index = {}
+        if variant_ids:
+            self.env["product.product"].flush_model(
+                ["product_template_attribute_value_ids"]
+            )
+            self.env.cr.execute(
+                """
+                SELECT ptav.product_attribute_value_id,
+                       ARRAY_AGG(pvc.product_product_id)
+                  FROM product_variant_combination pvc
+                  JOIN product_template_attribute_value ptav
+                    ON ptav.id = pvc.product_template_attribute_value_id
+                 WHERE pvc.product_product_id IN %s
+                 GROUP BY ptav.product_attribute_value_id
+                """,
+                (variant_ids,),
+            )
+            index = {
+                value_id: frozenset(ids) for value_id, ids in self.env.cr.fetchall()
+            }
+        return variant_ids, index
+
+    @api.model
+    def _clear_variant_attribute_index(self):
+        """
+        Drop the cached variant attribute indexes, and again when the
+        transaction ends, so that an index built from its uncommitted
+        variants is not kept.
+        """
+        self.clear_caches()
+        data = self.env.cr.postcommit.data
+        if VARIANT_INDEX_KEY not in data:
+            data[VARIANT_INDEX_KEY] = True
+            self.env.cr.postcommit.add(self.clear_caches)
+            self.env.cr.postrollback.add(self.clear_caches)
+
+    @api.model
+    def _match_variants(self, variant_index, attribute_value_ids, variant_ids=None):
+        """
+        Variants of a template having all the given attribute values.
+        :param variant_index: index of the template, see
+            _get_variant_attribute_indexes
+        :param attribute_value_ids: product.attribute.value ids
+        :param variant_ids: optional set of variant ids to narrow
+        :return: set of variant ids
+        """
+        ordered_ids, index = variant_index
+        matched = set(ordered_ids) if variant_ids is None else set(variant_ids)
+        for value_id in attribute_value_ids:
+            if not matched:
+                break
+            matched &= index.get(value_id, frozenset())
+        return matched
+
+    @api.model
+    def _first_variant(self, variant_index, variant_ids):
+        """First variant of variant_ids in product_variant_ids order"""
+        ordered_ids = variant_index[0]
+        first_id = next((pid for pid in ordered_ids if pid in variant_ids), False)
+        return self.env["product.product"].browse(first_id)
+
+
+class ProductProduct(models.Model):
+    _inherit = "product.product"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        self.env["mrp.bom.explosion"]._invalidate_templates(products.product_tmpl_id)
+        self.env["product.template"]._clear_variant_attribute_index()
+        return products
+
+    def write(self, vals):
+        if EXPLOSION_VARIANT_FIELDS.isdisjoint(vals):
+            return super().write(vals)
+        templates = self.product_tmpl_id
+        res = super().write(vals)
+        self.env["mrp.bom.explosion"]._invalidate_templates(
+            templates | self.product_tmpl_id
+        )
+        self.env["product.template"]._clear_variant_attribute_index()
+        return res
+
+    def unlink(self):
+        self.env["mrp.bom.explosion"]._invalidate_templates(self.product_tmpl_id)
+        res = super().unlink()
+        self.env["product.template"]._clear_variant_attribute_index()
+        return res
+
+
+class ProductAttributeValue(models.Model):
+    _inherit = "product.attribute.value"
+
+    def _get_explosion_templates(self):
+        return (
+            self.env["product.template.attribute.value"]
+            .sudo()
+            .with_context(active_test=False)
+            .search([("product_attribute_value_id", "in", self.ids)])
+            .product_tmpl_id
+        )
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env["mrp.bom.explosion"]._invalidate_templates(
+            self._get_explosion_templates()
+        )
+        return res
+
+    def unlink(self):
+        self.env["mrp.bom.explosion"]._invalidate_templates(
+            self._get_explosion_templates()
+        )
+        return super().unlink()
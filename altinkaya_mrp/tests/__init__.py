@@ -0,0 +1,2 @@
+from . import test_mrp_bom_explode
+from . import test_variant_resolver
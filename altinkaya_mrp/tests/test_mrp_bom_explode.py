@@ -0,0 +1,203 @@
+import logging
+import time
+
+from odoo.tests import common
+from odoo.tools import float_round
+
+_logger = logging.getLogger(__name__)
+
+
+def legacy_explode(bom, product, quantity, picking_type=False):
+    """Previous implementation, one _bom_find per line and list slicing"""
+    bom_lines = [(line, product, quantity, False) for line in bom.bom_line_ids]
+    boms_done = [
+        (
+            bom,
+            {
+                "qty": quantity,
+                "product": product,
+                "original_qty": quantity,
+                "parent_line": False,
+            },
+        )
+    ]
+    lines_done = []
+    while bom_lines:
+        current_line, current_product, current_qty, parent_line = bom_lines[0]
+        bom_lines = bom_lines[1:]
+        if current_line._skip_bom_line(current_product):
+            continue
+        line_quantity = current_qty * current_line.product_qty
+        line_product = current_line.product_id
+        child_bom = bom._bom_find(
+            products=line_product,
+            picking_type=picking_type or bom.picking_type_id,
+            company_id=bom.company_id.id,
+        )[line_product]
+        if child_bom.type == "phantom":
+            converted_line_quantity = current_line.product_uom_id._compute_quantity(
+                line_quantity / child_bom.product_qty, child_bom.product_uom_id
+            )
+            bom_lines = [
+                (line, line_product, converted_line_quantity, current_line)
+                for line in child_bom.bom_line_ids
+            ] + bom_lines
+            boms_done.append(
+                (
+                    child_bom,
+                    {
+                        "qty": converted_line_quantity,
+                        "product": current_product,
+                        "original_qty": quantity,
+                        "parent_line": current_line,
+                    },
+                )
+            )
+        else:
+            line_quantity = float_round(
+                line_quantity,
+                precision_rounding=current_line.product_uom_id.rounding,
+                rounding_method="UP",
+            )
+            lines_done.append(
+                (
+                    current_line,
+                    {
+                        "target_product": line_product,
+                        "qty": line_quantity,
+                        "product": current_product,
+                        "original_qty": quantity,
+                        "parent_line": parent_line,
+                    },
+                )
+            )
+    return boms_done, lines_done
+
+
+class TestMrpBomExplode(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Product = cls.env["product.product"]
+        MrpBom = cls.env["mrp.bom"]
+        cls.leaves = Product.create(
+            [{"name": "Leaf %s" % i, "type": "product"} for i in range(20)]
+        )
+        # Deep: a chain of 5 nested kits, each with 20 leaf components
+        kits = Product.create(
+            [{"name": "Kit %s" % i, "type": "consu"} for i in range(5)]
+        )
+        for level, kit in enumerate(kits):
+            lines = [
+                (0, 0, {"product_id": leaf.id, "product_qty": level + 1})
+                for leaf in cls.leaves
+            ]
+            if level + 1 < len(kits):
+                lines.append((0, 0, {"product_id": kits[level + 1].id}))
+            MrpBom.create(
+                {
+                    "product_tmpl_id": kit.product_tmpl_id.id,
+                    "type": "phantom",
+                    "bom_line_ids": lines,
+                }
+            )
+        # Wide: the finished product uses the top kit on 10 lines
+        cls.product = Product.create({"name": "Finished", "type": "product"})
+        cls.bom = MrpBom.create(
+            {
+                "product_tmpl_id": cls.product.product_tmpl_id.id,
+                "type": "normal",
+                "bom_line_ids": [
+                    (0, 0, {"product_id": kits[0].id, "product_qty": i + 1})
+                    for i in range(10)
+                ]
+                + [(0, 0, {"product_id": leaf.id}) for leaf in cls.leaves],
+            }
+        )
+        cls.kits = kits
+        # The BoM data is committed
+        cls.env.cr.precommit.run()
+
+    def setUp(self):
+        super().setUp()
+        # Explosions are stored through a new cursor
+        self.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+
+    def _lookup(self, quantity):
+        return self.env["mrp.bom.explosion"]._lookup(
+            self.bom, self.product, quantity, self.bom.picking_type_id
+        )
+
+    def test_explode_same_as_legacy(self):
+        start = time.perf_counter()
+        expected = legacy_explode(self.bom, self.product, 3.0)
+        legacy_time = time.perf_counter() - start
+        self.env.invalidate_all()
+        start = time.perf_counter()
+        result = self.bom.with_context(no_bom_explosion_cache=True).explode(
+            self.product, 3.0
+        )
+        new_time = time.perf_counter() - start
+        _logger.info(
+            "Exploded %s lines: legacy %.3fs, deque %.3fs",
+            len(result[1]),
+            legacy_time,
+            new_time,
+        )
+        self.assertEqual(len(result[1]), 10 * 5 * 20 + 20)
+        self.assertEqual(result, expected)
+
+    def test_explode_cached(self):
+        expected = legacy_explode(self.bom, self.product, 2.0)
+        self.assertEqual(self.bom.explode(self.product, 2.0), expected)
+        self.env.invalidate_all()
+        start = time.perf_counter()
+        result = self._lookup(2.0)
+        _logger.info("Served stored explosion in %.3fs", time.perf_counter() - start)
+        self.assertEqual(result, expected)
+        self.assertEqual(self.bom.explode(self.product, 2.0), expected)
+
+    def test_explode_cached_any_quantity(self):
+        for quantity in (1.0, 2.0, 3.0):
+            self.bom.explode(self.product, quantity)
+        count = self.env["mrp.bom.explosion"].search_count(
+            [("bom_id", "=", self.bom.id), ("product_id", "=", self.product.id)]
+        )
+        self.assertEqual(count, 1)
+        # One stored explosion serves every quantity
+        for quantity in (0.5, 7.0, 1234.5):
+            self.assertEqual(
+                self._lookup(quantity),
+                legacy_explode(self.bom, self.product, quantity),
+            )
+
+    def test_explode_cache_invalidated(self):
+        BomExplosion = self.env["mrp.bom.explosion"]
+        self.bom.explode(self.product, 2.0)
+        self.assertTrue(self._lookup(2.0))
+        # Uncommitted changes are neither served nor stored, even after a
+        # second change in the same transaction
+        self.bom.bom_line_ids[-1].product_id = self.leaves[0]
+        self.assertTrue(BomExplosion._is_pending())
+        self.assertEqual(
+            self.bom.explode(self.product, 2.0),
+            legacy_explode(self.bom, self.product, 2.0),
+        )
+        self.bom.bom_line_ids[-1].product_id = self.leaves[1]
+        self.env.cr.precommit.run()
+        self.assertFalse(BomExplosion._is_pending())
+        self.assertIsNone(self._lookup(2.0))
+        self.assertEqual(
+            self.bom.explode(self.product, 2.0),
+            legacy_explode(self.bom, self.product, 2.0),
+        )
+        self.assertTrue(self._lookup(2.0))
+        # Removing a line of a nested kit changes the version of the kit
+        self.kits[-1].bom_ids.bom_line_ids[0].unlink()
+        self.env.cr.precommit.run()
+        self.assertIsNone(self._lookup(2.0))
+        self.assertEqual(
+            self.bom.explode(self.product, 2.0),
+            legacy_explode(self.bom, self.product, 2.0),
+        )
@@ -0,0 +1,152 @@
+from odoo import fields
+from odoo.tests import common
+
+
+def legacy_match_possible_variant(line, product):
+    """Previous implementation, recursive filtering of the variants"""
+
+    def match_products(products, attr_val_list):
+        if not attr_val_list:
+            return products
+        attr_val = attr_val_list[0]
+        return match_products(
+            products.filtered(
+                lambda p: attr_val
+                in p.product_template_attribute_value_ids.product_attribute_value_id
+            ),
+            attr_val_list[1:],
+        )
+
+    target_products = line.product_tmpl_id.product_variant_ids
+    common_attrs = product.product_template_attribute_value_ids.filtered(
+        lambda a: a.attribute_id in line.inherited_attribute_ids
+    ).product_attribute_value_id
+    if not common_attrs:
+        return False
+    matched_products = match_products(target_products, common_attrs)
+    if not matched_products:
+        return False
+    if line.attribute_value_ids:
+        matched_products = matched_products.filtered(
+            lambda p: line.target_attribute_value_ids
+            in p.product_template_attribute_value_ids.product_attribute_value_id
+        )
+    else:
+        line_attribute_ids = line.product_tmpl_id.attribute_line_ids.attribute_id
+        additional_attr_vals = product.product_template_attribute_value_ids.product_attribute_value_id.filtered(  # noqa
+            lambda a: a.attribute_id in line_attribute_ids and a not in common_attrs
+        )
+        matched_products = match_products(matched_products, additional_attr_vals)
+    return fields.first(matched_products) or False
+
+
+class TestVariantResolver(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Attribute = cls.env["product.attribute"]
+        cls.color, cls.size, cls.material = Attribute.create(
+            [
+                {
+                    "name": name,
+                    "value_ids": [(0, 0, {"name": value}) for value in values],
+                }
+                for name, values in (
+                    ("Color", ["Red", "Blue", "Grey"]),
+                    ("Size", ["S", "M", "L", "XL"]),
+                    ("Material", ["ABS", "PC"]),
+                )
+            ]
+        )
+        cls.finished = cls.env["product.template"].create(
+            {
+                "name": "Enclosure",
+                "attribute_line_ids": cls._attribute_lines(cls.color, cls.size),
+            }
+        )
+        cls.component = cls.env["product.template"].create(
+            {
+                "name": "Cover",
+                "attribute_line_ids": cls._attribute_lines(
+                    cls.color, cls.size, cls.material
+                ),
+            }
+        )
+        cls.bom = cls.env["mrp.bom"].create(
+            {
+                "product_tmpl_id": cls.finished.id,
+                "bom_template_line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "product_tmpl_id": cls.component.id,
+                            "inherited_attribute_ids": [(6, 0, cls.color.ids)],
+                        },
+                    ),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_tmpl_id": cls.component.id,
+                            "inherited_attribute_ids": [
+                                (6, 0, (cls.color | cls.size).ids)
+                            ],
+                            "attribute_value_ids": [(6, 0, cls.size.value_ids[:2].ids)],
+                            "target_attribute_value_ids": [
+                                (6, 0, cls.material.value_ids[1].ids)
+                            ],
+                        },
+                    ),
+                ],
+            }
+        )
+
+    @classmethod
+    def _attribute_lines(cls, *attributes):
+        return [
+            (
+                0,
+                0,
+                {
+                    "attribute_id": attribute.id,
+                    "value_ids": [(6, 0, attribute.value_ids.ids)],
+                },
+            )
+            for attribute in attributes
+        ]
+
+    def test_match_same_as_legacy(self):
+        lines = self.bom.bom_template_line_ids
+        for product in self.finished.product_variant_ids:
+            variants = lines._match_possible_variants(product)
+            for line in lines:
+                self.assertEqual(
+                    variants[line.id], legacy_match_possible_variant(line, product)
+                )
+
+    def test_index_follows_variants(self):
+        product = self.finished.product_variant_ids[0]
+        line = self.bom.bom_template_line_ids[0]
+        variant = line._match_possible_variant(product)
+        self.assertTrue(variant)
+        variant.unlink()
+        self.assertNotEqual(line._match_possible_variant(product), variant)
+        self.assertEqual(
+            line._match_possible_variant(product),
+            legacy_match_possible_variant(line, product),
+        )
+
+    def test_index_cached(self):
+        product = self.finished.product_variant_ids[0]
+        lines = self.bom.bom_template_line_ids
+        variants = lines._match_possible_variants(product)
+        # The indexes are only built again when a variant changes
+        with self.assertQueryCount(0):
+            self.assertEqual(lines._match_possible_variants(product), variants)
+        variant = self.component.product_variant_ids[0]
+        variant.active = False
+        ordered_ids = self.component._get_variant_attribute_indexes()[
+            self.component.id
+        ][0]
+        self.assertNotIn(variant.id, ordered_ids)
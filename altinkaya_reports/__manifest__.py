@@ -1,6 +1,6 @@
 {
     "name": "Altinkaya Reports",
-    "version": "16.0.1.0.0",
+    "version": "16.0.1.1.0",
     "category": "General",
     "depends": [
         "base",
@@ -13,11 +13,13 @@
         "account_check",
         "mrp",
         "account_invoice_change_currency",
+        "queue_job",
     ],
     "license": "LGPL-3",
     "author": "Yigit Budak, MAkifOzdemir,OnurUgur,Codequarters,Altinkaya Enclosures",
     "website": "https://github.com/altinkaya-opensource/odoo-addons",
     "data": [
+        "security/ir.model.access.csv",
         "report/sale_reports.xml",
         "report/purchase_quotation_reports.xml",
         "report/purchase_order_reports.xml",
@@ -39,6 +41,7 @@
         "views/res_users_views.xml",
         "views/partner_view.xml",
         "views/utm_views.xml",
+        "views/partner_statement_mail_views.xml",
         # "data/partner_data.xml",
     ],
     "demo": [],
@@ -2,3 +2,4 @@ from . import account_move_line
 from . import res_users
 from . import partner
 from . import utm_campaign
+from . import partner_statement_mail
@@ -18,221 +18,393 @@
 #
 ##############################################################################
 
-from datetime import date, datetime
+import logging
+import time
+from datetime import date
+from itertools import groupby
+from uuid import uuid4
 
-from odoo import models
+from odoo import api, models
+from odoo.exceptions import UserError
 from odoo.tools.translate import _
 
+_logger = logging.getLogger(__name__)
+
+# Statements always start from this date so that the balances are right
+STATEMENT_OPENING_DATE = "2022-01-01"
+STATEMENT_FETCH_SIZE = 2000
+STATEMENT_MAIL_BATCH_SIZE = 50
+# Fields of the statement mail template rendered for each partner
+STATEMENT_MAIL_FIELDS = (
+    "subject",
+    "body_html",
+    "email_from",
+    "email_to",
+    "partner_to",
+    "email_cc",
+    "reply_to",
+)
+
+# Lines grouped per move, running balances per partner and account currency.
+# Old lines before the user start date are folded into the last of them,
+# which becomes the previous balance line.
+STATEMENT_QUERY = """
+    WITH lines AS (
+        SELECT l.partner_id,
+               l.move_id,
+               l.account_id,
+               l.date,
+               l.date_maturity,
+               l.full_reconcile_id,
+               a.code AS account_code,
+               a.currency_id AS account_currency,
+               am.name AS number,
+               COALESCE(aj.name->>p.lang, aj.name->>'en_US') AS journal_name,
+               CASE WHEN am.move_type != 'entry' THEN %(invoice_number)s END
+                   AS invoice_number,
+               l.company_currency_id,
+               CASE WHEN a.code IN %%(difference_codes)s
+                    THEN l.company_currency_id ELSE l.currency_id
+               END AS currency_id,
+               ROUND(SUM(l.debit) - SUM(l.credit), 2) AS amount,
+               CASE WHEN a.code IN %%(difference_codes)s THEN 0.0
+                    ELSE ROUND(SUM(l.amount_currency), 4)
+               END AS amount_currency,
+               CASE WHEN a.code IN %%(difference_codes)s
+                      OR ABS(SUM(l.amount_currency)) = 0 THEN 0.0
+                    ELSE ROUND(
+                        ABS(SUM(l.debit) - SUM(l.credit))
+                        / ABS(SUM(l.amount_currency)), 5)
+               END AS currency_rate
+          FROM account_move_line l
+          JOIN account_account a ON a.id = l.account_id
+          JOIN account_move am ON am.id = l.move_id
+          JOIN account_journal aj ON aj.id = am.journal_id
+          JOIN res_partner p ON p.id = l.partner_id
+         WHERE l.partner_id IN %%(partner_ids)s
+           AND l.date BETWEEN %%(date_from)s AND %%(date_to)s
+           AND a.account_type IN ('asset_receivable', 'liability_payable')
+           AND aj.code NOT IN %%(skip_journal_codes)s
+         GROUP BY am.id, a.id, aj.id, p.id, l.partner_id, l.move_id,
+                  l.account_id, l.date, l.date_maturity, l.currency_id,
+                  l.company_currency_id, l.full_reconcile_id
+    ), balances AS (
+        SELECT lines.*,
+               ROW_NUMBER() OVER w AS row_number,
+               SUM(amount) OVER w AS balance,
+               SUM(amount_currency) OVER w AS currency_balance,
+               COUNT(*) FILTER (WHERE date < %%(date_start)s)
+                   OVER (PARTITION BY partner_id, account_currency)
+                   AS previous_count
+          FROM lines
+        WINDOW w AS (
+            PARTITION BY partner_id, account_currency
+            ORDER BY date, move_id, account_id, date_maturity, currency_id,
+                     full_reconcile_id
+            ROWS UNBOUNDED PRECEDING
+        )
+    )
+    SELECT b.partner_id,
+           b.row_number - GREATEST(b.previous_count - 1, 0) AS seq,
+           b.row_number = b.previous_count AS previous_balance,
+           b.number,
+           to_char(b.date, 'DD.MM.YYYY') AS date,
+           to_char(b.date_maturity, 'DD.MM.YYYY') AS due_date,
+           LEFT(CONCAT_WS(' ', b.journal_name, b.invoice_number), 40)
+               AS description,
+           GREATEST(b.amount, 0.0) AS debit,
+           GREATEST(-b.amount, 0.0) AS credit,
+           b.account_code,
+           COALESCE(b.account_currency, %%(default_currency)s) AS account_currency,
+           b.amount,
+           ABS(b.balance) AS balance,
+           GREATEST(-b.amount_currency, 0.0) AS credit_currency,
+           GREATEST(b.amount_currency, 0.0) AS debit_currency,
+           b.amount_currency,
+           b.currency_rate,
+           ABS(b.currency_balance) AS currency_balance,
+           CASE WHEN b.currency_balance > 0.01 THEN 'B' ELSE 'A' END
+               AS currency_dc,
+           line_currency.symbol AS line_currency_id,
+           CASE WHEN b.balance > 0.01 THEN 'B' ELSE 'A' END AS dc,
+           b.balance AS total,
+           company_currency.symbol AS currency_symbol,
+           b.full_reconcile_id
+      FROM balances b
+      LEFT JOIN res_currency line_currency ON line_currency.id = b.currency_id
+      LEFT JOIN res_currency company_currency
+        ON company_currency.id = b.company_currency_id
+     WHERE b.row_number >= b.previous_count
+     ORDER BY b.partner_id, b.account_currency, b.row_number
+"""
+
 
 class Partner(models.Model):
     _inherit = "res.partner"
 
-    # use_secondary_currency = fields.Boolean(string="Ekstrede çift para birimi yazdır",default=False)
+    # use_secondary_currency = fields.Boolean(
+    #     string="Ekstrede çift para birimi yazdır", default=False
+    # )
 
     def _get_statement_data_currency(self, data=None):
         return self._get_statement_data(self)
 
-    def _get_statement_data(self, data=None):
-        # self = self.with_context(lang=self.commercial_partner_id.lang)
-        statement_data2 = {}
-        ctx = self._context.copy()
-        currency_count = 0
-        statement_data = []
-        balance, seq = 0.0, 0
-        currency_balance = 0.0
-        Currency = self.env["res.currency"]
-        end_date = ctx.get("date_end") or "%s-12-31" % date.today().year
-
+    def _get_statement_dates(self):
+        """
+        :return: tuple (start date, end date) of the statement, from the
+            context or the current year, the previous one in January and
+            February
+        """
+        ctx = self._context
+        today = date.today()
+        end_date = ctx.get("date_end") or "%s-12-31" % today.year
         if ctx.get("date_start"):
-            user_start_date = ctx.get("date_start")
+            start_date = ctx.get("date_start")
+        elif today.month < 3:
+            start_date = "%s-01-01" % (today.year - 1)
         else:
-            if date.today().month < 3:
-                user_start_date = "%s-01-01" % (int(date.today().year) - 1)
-            else:
-                user_start_date = "%s-01-01" % int(date.today().year)
-        start_date = "2022-01-01"
-        move_type = ("liability_payable", "asset_receivable")
-
-        query = f"""SELECT L.full_reconcile_id, L.DATE, A.CODE, A.CURRENCY_ID as ACCOUNT_CURRENCY,
-    	AJ.NAME AS JOURNAL,	AM.NAME,INV.NUMBER, INV.SUPPLIER_INVOICE_NuMBER,L.MOVE_ID,L.DATE_MATURITY AS DUE_DATE,
-
-    	CASE
-    					WHEN INV.SUPPLIER_INVOICE_NuMBER IS NOT NULL THEN INV.SUPPLIER_INVOICE_NuMBER
-    					ELSE INV.NUMBER
-    	END AS INNUMBER,
-
-    	CASE
-    					WHEN INV.NUMBER IS NOT NULL THEN AJ.NAME
-    					ELSE AJ.NAME
-    	END AS DESCIRIPTION,
-        CASE
-                        WHEN (SUM(L.DEBIT) - SUM(L.CREDIT)) > 0 THEN ROUND((SUM(L.DEBIT) - SUM(L.CREDIT)),2)
-                        ELSE 0.00
-        END AS DEBIT,
-        CASE
-                        WHEN SUM(L.DEBIT) - SUM(L.CREDIT) < 0 THEN -1 * ROUND((SUM(L.DEBIT) - SUM(L.CREDIT)),2)
-                        ELSE 0.00
-        END AS CREDIT,
-        CASE
-                        WHEN   ABS(SUM (L.AMOUNT_CURRENCY)) > 0 THEN  ROUND(ABS(SUM(L.DEBIT) - SUM(L.CREDIT))/ABS(SUM (L.AMOUNT_CURRENCY)),5)
-                        ELSE 0.00
-        END AS currency_rate,
-        CASE
-                        WHEN ROUND(SUM (L.AMOUNT_CURRENCY),4) > 0 THEN ROUND(SUM (L.AMOUNT_CURRENCY),4)
-                        ELSE 0.00
-        END AS DEBIT_currency,
-        CASE
-                        WHEN ROUND(SUM (L.AMOUNT_CURRENCY),4) < 0 THEN -1 * ROUND(SUM (L.AMOUNT_CURRENCY),4)
-                        ELSE 0.00
-        END AS CREDIT_currency,
-        ROUND(SUM (L.AMOUNT_CURRENCY),4) AS AMOUNT_CURRENCY,AM.STATE,L.CURRENCY_ID AS CURRENCY_ID,
-        L.COMPANY_CURRENCY_ID AS COMPANY_CURRENCY_ID,AJ.ID AS JOURNAL_ID,L.ACCOUNT_ID AS ACCOUNT_ID
-        FROM ACCOUNT_MOVE_LINE AS L
-        LEFT JOIN ACCOUNT_ACCOUNT A ON (L.ACCOUNT_ID = A.ID) LEFT JOIN ACCOUNT_MOVE AM ON (L.MOVE_ID = AM.ID)
-        LEFT JOIN ACCOUNT_JOURNAL AJ ON (AM.JOURNAL_ID = AJ.ID) LEFT JOIN ACCOUNT_ACCOUNT_TYPE AT ON (A.USER_TYPE_ID = AT.ID)
-        LEFT JOIN ACCOUNT_MOVE INV ON (L.INVOICE_ID = INV.ID)
-        WHERE (L.DATE BETWEEN '{str(start_date)}' AND '{str(end_date)}')
-        AND L.PARTNER_ID = {str(self.commercial_partner_id.id)}
-        AND AT.TYPE IN {str(move_type)}
-        GROUP BY AJ.NAME, A.CODE, A.CURRENCY_ID, L.MOVE_ID,	AM.NAME,	AM.STATE,	L.DATE,	L.DATE_MATURITY,	L.CURRENCY_ID,	L.COMPANY_CURRENCY_ID,
-        INV.NUMBER,INV.SUPPLIER_INVOICE_NUMBER,	AJ.ID,	L.ACCOUNT_ID, L.FULL_RECONCILE_ID
-        ORDER BY ACCOUNT_CURRENCY, L.DATE"""
+            start_date = "%s-01-01" % today.year
+        return start_date, end_date
+
+    def _get_statement_query(self):
+        """
+        :return: tuple (query, params) of the statement lines of the
+            commercial partners
+        """
+        start_date, end_date = self._get_statement_dates()
         skip_journal_codes = ["ADVR", "KRFRK"]
-        if ctx.get("lang") != "tr_TR":
+        if self._context.get("lang") != "tr_TR":
             skip_journal_codes.append("KRDGR")
+        if "supplier_invoice_number" in self.env["account.move"]._fields:
+            invoice_number = "COALESCE(NULLIF(am.supplier_invoice_number, ''), am.name)"
+        else:
+            invoice_number = "am.name"
+        params = {
+            "partner_ids": tuple(self.commercial_partner_id.ids),
+            "date_from": STATEMENT_OPENING_DATE,
+            "date_to": end_date,
+            "date_start": start_date,
+            "skip_journal_codes": tuple(skip_journal_codes),
+            # currency difference lines have no currency values
+            "difference_codes": ("646", "656", "646.F"),
+            "default_currency": 31,
+        }
+        return STATEMENT_QUERY % {"invoice_number": invoice_number}, params
+
+    def _iter_statement_lines(self):
+        """
+        Stream the statement lines of the partners from a server side cursor,
+        ordered by commercial partner and account currency. Only
+        STATEMENT_FETCH_SIZE rows are held in memory at a time and the
+        environment cursor stays usable while the lines are consumed.
+        :return: generator of statement line dicts
+        """
+        if not self:
+            return
+        self.env.flush_all()
+        query, params = self._get_statement_query()
+        previous_balance = _("Previous Balance")
+        cursor = self.env.cr._cnx.cursor(name="partner_statement_%s" % uuid4().hex)
+        cursor.itersize = STATEMENT_FETCH_SIZE
+        try:
+            cursor.execute(query, params)
+            columns = None
+            for row in cursor:
+                if columns is None:
+                    columns = [column[0] for column in cursor.description]
+                line = dict(zip(columns, row))
+                if line.pop("previous_balance"):
+                    line.update(
+                        date="",
+                        due_date="",
+                        description=previous_balance,
+                        debit=0.0,
+                        credit=0.0,
+                        amount=0.0,
+                        debit_currency=0.0,
+                        credit_currency=0.0,
+                        amount_currency=0.0,
+                        currency_rate=0.0,
+                    )
+                else:
+                    line["date"] = line["date"] or False
+                    line["due_date"] = line["due_date"] or False
+                yield line
+        finally:
+            cursor.close()
+
+    def _iter_statement_groups(self):
+        """
+        :return: generator of statement line lists, one per commercial
+            partner and account currency
+        """
+        for _key, lines in groupby(
+            self._iter_statement_lines(),
+            key=lambda line: (line["partner_id"], line["account_currency"]),
+        ):
+            yield list(lines)
+
+    def _get_statement_data(self, data=None):
+        """
+        :return: dict {group index: statement lines of an account currency}
+        """
+        return dict(enumerate(self._iter_statement_groups()))
+
+    def _get_statement_data_batch(self):
+        """
+        Statement data of all the partners, computed with one query.
+        :return: dict {commercial partner id: statement lines grouped per
+            account currency, as returned by _get_statement_data}
+        """
+        statements = {}
+        for lines in self._iter_statement_groups():
+            groups = statements.setdefault(lines[0]["partner_id"], {})
+            groups[len(groups)] = lines
+        return statements
+
+    def email_statement(self):
+        outcomes = self._email_statement_batch(force_send=True)
+        # Mails of other partners may already be sent, only the statement
+        # of a single partner is reported as an error
+        if len(outcomes) == 1 and outcomes.state == "failed":
+            raise UserError(
+                _("The statement of %(partner)s was not sent: %(error)s")
+                % {"partner": outcomes.partner_id.display_name, "error": outcomes.error}
+            )
+        return True
+
+    def action_email_statement_batch(self):
+        """
+        Send the statements of the selected partners from queued jobs of
+        altinkaya_reports.statement_mail_batch_size partners each.
+        """
+        self._get_statement_mail_template()
+        batch_size = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "altinkaya_reports.statement_mail_batch_size",
+                STATEMENT_MAIL_BATCH_SIZE,
+            )
+        )
+        date_start, date_end = self._get_statement_dates()
+        for index in range(0, len(self), batch_size):
+            batch = self[index : index + batch_size]
+            batch.with_delay(
+                description=_("Send statements of %s partners") % len(batch)
+            )._email_statement_batch(date_start, date_end)
+        return True
 
-        currency_difference_accounts = (
-            self.env["account.account"]
-            .search([("code", "in", ["646", "656", "646.F"])])
-            .mapped("id")
+    @api.model
+    def _get_statement_mail_template(self):
+        template = self.env.ref(
+            "altinkaya_reports.email_template_edi_send_statement",
+            raise_if_not_found=False,
         )
-        currency_difference_to_invoice_journal = (
-            self.env["account.journal"]
-            .search([("code", "in", skip_journal_codes)])
-            .mapped("id")
+        if not template or not template.report_template:
+            raise UserError(_("The statement e-mail template is missing."))
+        return template
+
+    def _email_statement_batch(self, date_start=None, date_end=None, force_send=False):
+        """
+        Render the statements of the partners and queue one mail per
+        partner, sent from a note posted on the partner. The mail values are
+        rendered by the template as send_mail would, the statement data of
+        all partners is computed with one query. A partner without
+        recipient or failing to render is recorded and skipped.
+        :param date_start: start date of the statements, see
+            _get_statement_dates
+        :param date_end: end date of the statements
+        :param force_send: send the mails right away instead of leaving
+            them to the mail queue
+        :return: partner.statement.mail records, one per partner
+        """
+        template = self._get_statement_mail_template()
+        report = template.report_template
+        context = {}
+        if date_start:
+            context["date_start"] = str(date_start)
+        if date_end:
+            context["date_end"] = str(date_end)
+        partners = self.with_context(**context)
+        date_start, date_end = partners._get_statement_dates()
+        start = time.perf_counter()
+        statements = partners._get_statement_data_batch()
+        _logger.info(
+            "Statement data of %s partners computed in %.3fs",
+            len(partners),
+            time.perf_counter() - start,
         )
-        self.env.cr.execute(query)
-        data = self.env.cr.dictfetchall()
-        if len(data) == 0:
-            return {}
-        onhand_currency_id = data[0]["account_currency"]
-        for sl in data:
-            if onhand_currency_id != sl["account_currency"]:
-                currency_count += 1
-                onhand_currency_id = sl["account_currency"]
-                statement_data = []
-                balance, seq = 0.0, 0
-                currency_balance = 0.0
-
-            if sl["journal_id"] in currency_difference_to_invoice_journal:
-                ## pass move line if item in currency difference journal
+        rendered = {partner_id: {} for partner_id in partners.ids}
+        for field in STATEMENT_MAIL_FIELDS:
+            values = template._render_field(field, partners.ids, compute_lang=True)
+            for partner_id, value in values.items():
+                rendered[partner_id][field] = value
+        template.generate_recipients(rendered, partners.ids)
+        mail_vals_list = []
+        outcome_vals_list = []
+        for partner in partners:
+            start = time.perf_counter()
+            outcome_vals = {
+                "partner_id": partner.id,
+                "date_start": date_start,
+                "date_end": date_end,
+                "job_uuid": self.env.context.get("job_uuid"),
+            }
+            outcome_vals_list.append(outcome_vals)
+            values = rendered[partner.id]
+            recipients = self.env["res.partner"].browse(values["partner_ids"])
+            if not values["email_to"] and not any(recipients.mapped("email")):
+                outcome_vals.update(state="failed", error=_("No e-mail address"))
                 continue
-            seq += 1
-            if sl["account_id"] in currency_difference_accounts:
-                # if line is currency difference currency values shall be cleared
-                sl["currency_rate"] = 0.0
-                sl["debit_currency"] = 0.0
-                sl["credit_currency"] = 0.0
-                sl["amount_currency"] = 0.0
-                sl["currency_id"] = sl["company_currency_id"]
-
-            balance = (sl["debit"] - sl["credit"]) + balance
-            currency_balance = (
-                sl["debit_currency"] - sl["credit_currency"]
-            ) + currency_balance
-            debit = 0.0
-            credit = 0.0
-
-            journal = (
-                self.env["account.journal"]
-                .browse(sl["journal_id"])
-                .with_context(lang=self.commercial_partner_id.lang)
+            groups = statements.get(partner.commercial_partner_id.id, {})
+            try:
+                with self.env.cr.savepoint():
+                    pdf, _format = self.env["ir.actions.report"]._render_qweb_pdf(
+                        report,
+                        partner.ids,
+                        data={"statements": {partner.id: list(groups.values())}},
+                    )
+            except Exception as e:
+                _logger.exception("Statement of partner %s not rendered", partner.id)
+                outcome_vals.update(
+                    state="failed",
+                    error=str(e),
+                    duration=time.perf_counter() - start,
+                )
+                continue
+            message_vals = {
+                "email_from": values["email_from"] or self.env.user.email_formatted,
+                "mail_server_id": template.mail_server_id.id,
+            }
+            if values["reply_to"]:
+                message_vals["reply_to"] = values["reply_to"]
+            message = partner.message_post(
+                body=values["body_html"],
+                subject=values["subject"],
+                message_type="comment",
+                subtype_xmlid="mail.mt_note",
+                attachments=[("%s - %s.pdf" % (report.name, partner.name), pdf)],
+                **message_vals,
             )
-
-            if sl["innumber"]:
-                description = journal.name + " " + sl["innumber"]
-            else:
-                description = journal.name
-            company_currency_id = Currency.browse(sl["company_currency_id"])
-            line_currency_id = Currency.browse(sl["currency_id"])
-            if (sl["debit"] - sl["credit"]) > 0.0:
-                debit = sl["debit"] - sl["credit"]
-            else:
-                credit = sl["credit"] - sl["debit"]
-
-            statement_data.append(
+            mail_vals_list.append(
                 {
-                    "seq": seq,
-                    "number": sl["name"],
-                    "date": sl["date"]
-                    and datetime.strptime(str(sl["date"]), "%Y-%m-%d").strftime(
-                        "%d.%m.%Y"
-                    )
-                    or False,
-                    "due_date": sl["due_date"]
-                    and datetime.strptime(str(sl["due_date"]), "%Y-%m-%d").strftime(
-                        "%d.%m.%Y"
-                    )
-                    or False,
-                    "description": len(description) >= 40
-                    and description[0:40]
-                    or description,
-                    "debit": debit,
-                    "credit": credit,
-                    "account_code": sl["code"],
-                    "account_currency": sl["account_currency"] or 31,
-                    "amount": debit - credit,
-                    "balance": abs(balance) or 0.0,
-                    "credit_currency": sl["credit_currency"],
-                    "debit_currency": sl["debit_currency"],
-                    "amount_currency": sl["debit_currency"] - sl["credit_currency"],
-                    "currency_rate": sl["currency_rate"],
-                    "currency_balance": abs(currency_balance) or 0.0,
-                    "currency_dc": currency_balance > 0.01 and "B" or "A",
-                    "line_currency_id": line_currency_id["symbol"],
-                    "dc": balance > 0.01 and "B" or "A",
-                    "total": balance or 0.0,
-                    "currency_symbol": company_currency_id["symbol"],
-                    "full_reconcile_id": sl["full_reconcile_id"],
+                    "mail_message_id": message.id,
+                    # Sending and deleting the mail keeps the posted note
+                    "is_notification": True,
+                    "body_html": values["body_html"],
+                    "email_to": values["email_to"],
+                    "email_cc": values["email_cc"],
+                    "recipient_ids": [(6, 0, recipients.ids)],
+                    "auto_delete": template.auto_delete,
                 }
             )
-            statement_data2[currency_count] = statement_data
-        # user_date'den öncekileri topla, sonrası için sequence'ları tekrar say.
-        user_start_date_date = datetime.strptime(user_start_date, "%Y-%m-%d")
-        filtered_lines = {}
-        for curr_count, statement_data3 in statement_data2.items():
-            old_lines = [
-                x
-                for x in statement_data3
-                if datetime.strptime(x["date"], "%d.%m.%Y") < user_start_date_date
-            ]
-            if not old_lines:
-                filtered_lines[curr_count] = statement_data3
-                continue
-            new_lines = [n for n in statement_data3 if n not in old_lines]
-            last_line = old_lines[-1]
-            last_line["seq"] = 1
-            last_line["date"] = ""
-            last_line["due_date"] = ""
-            last_line["description"] = _("Previous Balance")
-            last_line["currency_rate"] = 0
-            last_line["amount_currency"] = 0
-            last_line["amount"] = 0
-            last_line["debit"] = 0
-            last_line["credit"] = 0
-            new_idx = 2
-            for new in new_lines:
-                new["seq"] = new_idx
-                new_idx += 1
-            filtered_lines[curr_count] = [last_line] + new_lines
-        return filtered_lines
-
-    def email_statement(
-        self,
-    ):
-        data_model = self.env["ir.model.data"]
-        template = data_model.get_object(
-            "altinkaya_reports", "email_template_edi_send_statement"
-        )
-        mail_id = template.send_mail(self.id, force_send=True)
-        return True
+            outcome_vals.update(state="queued", duration=time.perf_counter() - start)
+        mails = self.env["mail.mail"].sudo().create(mail_vals_list)
+        queued = [vals for vals in outcome_vals_list if vals["state"] == "queued"]
+        for vals, mail in zip(queued, mails):
+            vals["mail_id"] = mail.id
+        outcomes = self.env["partner.statement.mail"].sudo().create(outcome_vals_list)
+        if force_send:
+            mails.send()
+        return outcomes
@@ -0,0 +1,39 @@
+# Copyright 2024 Ahmet Yiğit Budak (https://github.com/yibudak)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+from odoo import fields, models
+
+
+class PartnerStatementMail(models.Model):
+    _name = "partner.statement.mail"
+    _description = "Partner Statement Mail Outcome"
+    _order = "id desc"
+
+    partner_id = fields.Many2one(
+        "res.partner",
+        required=True,
+        index=True,
+        ondelete="cascade",
+    )
+    date_start = fields.Date()
+    date_end = fields.Date()
+    state = fields.Selection(
+        [("queued", "Queued"), ("failed", "Failed")],
+        required=True,
+        index=True,
+    )
+    mail_id = fields.Many2one(
+        "mail.mail",
+        string="Mail",
+        ondelete="set null",
+        help="Removed once the mail is sent when the template auto deletes it",
+    )
+    error = fields.Text()
+    duration = fields.Float(
+        digits=(16, 3),
+        help="Seconds spent rendering the statement of the partner",
+    )
+    job_uuid = fields.Char(
+        string="Job UUID",
+        index=True,
+        help="Queued job of the batch the partner was sent in",
+    )
@@ -0,0 +1,47 @@
+def clone_invoice(invoice, count, date_start, days):
+    """
+    Add count draft copies of an invoice with its receivable line, written
+    with plain SQL to generate large partner statements quickly.
+    :param invoice: account.move to copy
+    :param date_start: date of the first copy, as a "YYYY-MM-DD" string
+    :param days: the copies are spread over this many days from date_start
+    :return: the receivable account.move.line of the invoice
+    """
+    receivable_line = invoice.line_ids.filtered(
+        lambda line: line.account_id.account_type == "asset_receivable"
+    )
+    env = invoice.env
+    env.flush_all()
+    cr = env.cr
+    cr.execute(
+        """
+        SELECT table_name, column_name
+          FROM information_schema.columns
+         WHERE table_name IN ('account_move', 'account_move_line')
+           AND column_name NOT IN ('id', 'move_id', 'date', 'name', 'state')
+        """
+    )
+    columns = {"account_move": [], "account_move_line": []}
+    for table, column in cr.fetchall():
+        columns[table].append('"%s"' % column)
+    cr.execute(
+        """
+        WITH moves AS (
+            INSERT INTO account_move (date, name, state, {move_columns})
+            SELECT %s::date + n %% %s, '/', 'draft', {move_columns}
+              FROM account_move, generate_series(1, %s) n
+             WHERE id = %s
+         RETURNING id, date
+        )
+        INSERT INTO account_move_line (move_id, date, {line_columns})
+        SELECT moves.id, moves.date, {line_columns}
+          FROM moves, account_move_line
+         WHERE account_move_line.id = %s
+        """.format(
+            move_columns=", ".join(columns["account_move"]),
+            line_columns=", ".join(columns["account_move_line"]),
+        ),
+        (date_start, days, count, invoice.id, receivable_line.id),
+    )
+    env.invalidate_all()
+    return receivable_line
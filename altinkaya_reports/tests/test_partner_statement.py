@@ -0,0 +1,153 @@
+import logging
+import time
+from itertools import accumulate
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+from .common import clone_invoice
+
+_logger = logging.getLogger(__name__)
+
+# Number of statement lines of the benchmark partner
+BENCH_LINES = 100000
+
+
+class PartnerStatementCommon(AccountTestInvoicingCommon):
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.partner = cls.partner_a
+        cls.invoices = cls.env["account.move"]
+        for invoice_date, amount in (
+            ("2023-03-01", 100.0),
+            ("2023-06-01", 50.0),
+            ("2024-02-01", 30.0),
+            ("2024-05-01", 20.0),
+        ):
+            cls.invoices |= cls.init_invoice(
+                "out_invoice",
+                partner=cls.partner,
+                invoice_date=invoice_date,
+                amounts=[amount],
+                post=True,
+            )
+
+    def _statement(self, partner=None, **context):
+        partner = (partner or self.partner).with_context(
+            date_start="2024-01-01", date_end="2024-12-31", **context
+        )
+        return partner._get_statement_data()
+
+
+@tagged("post_install", "-at_install")
+class TestPartnerStatement(PartnerStatementCommon):
+    def test_statement_previous_balance(self):
+        lines = self._statement()[0]
+        self.assertEqual([line["seq"] for line in lines], [1, 2, 3])
+        totals = self.invoices.mapped("amount_total")
+        previous = lines[0]
+        self.assertEqual(previous["date"], "")
+        self.assertEqual(previous["debit"], 0.0)
+        self.assertAlmostEqual(previous["balance"], sum(totals[:2]))
+        self.assertEqual(previous["dc"], "B")
+        self.assertEqual(lines[1]["date"], "01.02.2024")
+        self.assertAlmostEqual(lines[1]["debit"], totals[2])
+        self.assertAlmostEqual(lines[2]["balance"], sum(totals))
+        self.assertIn(self.invoices[-1].name, lines[2]["description"])
+
+    def test_statement_without_previous_lines(self):
+        lines = self._statement(date_start="2023-01-01")[0]
+        self.assertEqual([line["seq"] for line in lines], [1, 2, 3, 4])
+        balances = list(accumulate(self.invoices.mapped("amount_total")))
+        for line, balance in zip(lines, balances):
+            self.assertAlmostEqual(line["balance"], balance)
+
+    def test_statement_streams_while_querying(self):
+        partner = self.partner.with_context(date_start="2024-01-01")
+        count = 0
+        for _line in partner._iter_statement_lines():
+            # The environment cursor stays usable while lines are streamed
+            self.env["res.partner"].search_count([])
+            count += 1
+        self.assertEqual(count, 3)
+
+    def _create_mail_template(self):
+        template = self.env["mail.template"].create(
+            {
+                "name": "Statement",
+                "model_id": self.env.ref("base.model_res_partner").id,
+                "subject": "Statement {{ object.name }}",
+                "body_html": "<p>Statement</p>",
+                "partner_to": "{{ object.id }}",
+                "email_cc": "accounting@example.com",
+                "reply_to": "statements@example.com",
+                "report_template": self.env.ref(
+                    "altinkaya_reports.partner_statement_altinkaya"
+                ).id,
+            }
+        )
+        self.env["ir.model.data"].create(
+            {
+                "module": "altinkaya_reports",
+                "name": "email_template_edi_send_statement",
+                "model": "mail.template",
+                "res_id": template.id,
+            }
+        )
+        return template
+
+    def test_statement_mail_batch(self):
+        self._create_mail_template()
+        self.partner.email = "partner@example.com"
+        self.partner_b.email = False
+        partners = self.partner | self.partner_b
+        outcomes = partners._email_statement_batch("2024-01-01", "2024-12-31")
+        self.assertEqual(outcomes.partner_id, partners)
+        sent = outcomes.filtered(lambda outcome: outcome.partner_id == self.partner)
+        self.assertEqual(sent.state, "queued")
+        self.assertEqual(sent.mail_id.recipient_ids, self.partner)
+        self.assertEqual(sent.mail_id.email_cc, "accounting@example.com")
+        self.assertEqual(sent.mail_id.reply_to, "statements@example.com")
+        self.assertEqual(sent.mail_id.subject, "Statement %s" % self.partner.name)
+        self.assertEqual(len(sent.mail_id.attachment_ids), 1)
+        self.assertIn(sent.mail_id.mail_message_id, self.partner.message_ids)
+        failed = outcomes - sent
+        self.assertEqual(failed.state, "failed")
+        self.assertFalse(failed.mail_id)
+
+    def test_statement_mail_failed(self):
+        self._create_mail_template()
+        self.partner_b.email = False
+        with self.assertRaises(UserError):
+            self.partner_b.email_statement()
+
+    def test_statement_mail_jobs(self):
+        self._create_mail_template()
+        self.env["ir.config_parameter"].sudo().set_param(
+            "altinkaya_reports.statement_mail_batch_size", 1
+        )
+        partners = self.partner | self.partner_b
+        partners.action_email_statement_batch()
+        jobs = self.env["queue.job"].search(
+            [("method_name", "=", "_email_statement_batch")]
+        )
+        self.assertEqual(len(jobs), 2)
+
+
+@tagged("post_install", "-at_install", "-standard", "benchmark")
+class TestPartnerStatementBenchmark(PartnerStatementCommon):
+    def test_statement_benchmark(self):
+        # Draft copies of one invoice spread over two years
+        source_line = clone_invoice(self.invoices[0], BENCH_LINES, "2023-01-01", 730)
+        start = time.perf_counter()
+        lines = self._statement()[0]
+        elapsed = time.perf_counter() - start
+        _logger.info("Partner statement of %s lines: %.3fs", BENCH_LINES + 4, elapsed)
+        self.assertAlmostEqual(
+            lines[-1]["total"],
+            sum(self.invoices.mapped("amount_total"))
+            + BENCH_LINES * source_line.balance,
+        )
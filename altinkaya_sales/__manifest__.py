@@ -38,6 +38,7 @@
         "product_attribute_types",
         "stock_picking_invoicing",  # TODO: This module needs to be migrated from our codebase.
         "sale_variant_configurator",
+        "sale_set_product",
     ],
     "author": "MAkifOzdemir,Codequarters,Acespritech Solutions Pvt. Ltd.,Yavuz Avcı",
     "description": """
@@ -52,6 +53,7 @@
         "views/product_views.xml",
         "views/res_partner.xml",
         "data/mail_data.xml",
+        "data/ir_cron.xml",
         # "views/portal_templates.xml", # TODO: migration needed
         # "data/sale_portal_data.xml",
         # "views/sale_portal_templates.xml",
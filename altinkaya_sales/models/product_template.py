@@ -133,7 +133,7 @@ class ProductTemplate(models.Model):
                 }
             )
             # Explode the phantom bom
-            dummy_sol.explode_set_contents()
+            dummy_sol.explode_set_contents(merge_set_lines=False)
             # Compute the price
             dummy_so.recalculate_prices()
             # Update the product price
@@ -155,6 +155,8 @@ class SaleOrder(models.Model):
     )
     def _compute_order_state(self):
         deadline = datetime.now() - timedelta(days=360)
+        picking_summary, ongoing_productions = self._get_order_state_summary()
+        orders_done = self.browse()
         for sale in self:
             # SALE
             if (
@@ -162,7 +164,7 @@ class SaleOrder(models.Model):
                 and sale.confirmation_date < deadline
                 and sale.state in ["sent", "sale"]
             ):
-                sale.state = "done"
+                orders_done |= sale
                 sale.order_state = "25_completed"
                 continue
             elif sale.state == "draft":
@@ -175,41 +177,27 @@ class SaleOrder(models.Model):
                 sale.order_state = "27_cancel"
                 continue
             else:
-                pass
+                sale.order_state = "25_completed"
+            summary = picking_summary.get(sale._origin.id)
             # PRODUCTION
-            ongoing_productions = sale.production_ids.filtered(
-                lambda p: p.state in ["confirmed", "planned", "progress"]
-            )
-            if ongoing_productions:
-                sale.order_state = _match_production_with_route(ongoing_productions)
-            # PICKING
-            elif sale.picking_ids.filtered(lambda p: p.state != "cancel"):
-                outgoing_pickings = sale.picking_ids.filtered(
-                    lambda p: p.picking_type_code == "outgoing" and p.state == "done"
-                )
-                incoming_pickings = sale.picking_ids.filtered(
-                    lambda p: p.picking_type_code == "incoming"
-                    and p.location_id.usage == "customer"
-                )
-                invoiced_pickings = outgoing_pickings.filtered(
-                    lambda p: p.invoice_state == "invoiced"
+            if sale._origin.id in ongoing_productions:
+                sale.order_state = _match_production_with_route(
+                    self.env["mrp.production"].browse(
+                        ongoing_productions[sale._origin.id]
+                    )
                 )
-
+            # PICKING
+            elif summary and summary["active_count"]:
                 # Check the dispatched pickings
-                if invoiced_pickings:
-                    if any(
-                        p.delivery_state == "customer_delivered"
-                        for p in invoiced_pickings
-                    ):
+                if summary["invoiced"]:
+                    if summary["delivered"]:
                         sale.order_state = "24_delivered"
-                        sale.state = "done"
+                        orders_done |= sale
                     else:
                         sale.order_state = "23_on_transit"
 
                 # Check the packaged pickings
-                elif outgoing_pickings and any(
-                    p.is_packaged for p in outgoing_pickings
-                ):
+                elif summary["packaged"]:
                     sale.order_state = "22_packaged"
                 # If there is no packaged or dispatched pickings
                 # set the order state to at_warehouse
@@ -217,11 +205,117 @@ class SaleOrder(models.Model):
                     sale.order_state = "21_at_warehouse"
 
                 # Check the returned pickings
-                if incoming_pickings and incoming_pickings.filtered(
-                    lambda p: p.state == "done"
-                ):
+                if summary["returned"]:
                     sale.order_state = "26_return"
 
+        orders_done = orders_done.filtered(lambda o: o.state != "done")
+        if orders_done:
+            orders_done.write({"state": "done"})
+        return True
+
+    def _get_order_state_summary(self):
+        """
+        Load the picking and production facts order_state is derived from,
+        for all orders at once.
+        :return: ({order_id: picking summary dict},
+            {order_id: list of ongoing mrp.production ids})
+        """
+        order_ids = self._origin.ids
+        if not order_ids:
+            return {}, {}
+        self.env["stock.picking"].flush_model(
+            [
+                "sale_id",
+                "state",
+                "picking_type_id",
+                "location_id",
+                "invoice_state",
+                "delivery_state",
+                "is_packaged",
+            ]
+        )
+        self.env["mrp.production"].flush_model(["sale_id", "state"])
+        self.env.cr.execute(
+            """
+            SELECT p.sale_id,
+                   COUNT(*) FILTER (WHERE p.state != 'cancel') AS active_count,
+                   BOOL_OR(
+                       pt.code = 'outgoing'
+                       AND p.state = 'done'
+                       AND p.invoice_state = 'invoiced'
+                   ) IS TRUE AS invoiced,
+                   BOOL_OR(
+                       pt.code = 'outgoing'
+                       AND p.state = 'done'
+                       AND p.invoice_state = 'invoiced'
+                       AND p.delivery_state = 'customer_delivered'
+                   ) IS TRUE AS delivered,
+                   BOOL_OR(
+                       pt.code = 'outgoing' AND p.state = 'done' AND p.is_packaged
+                   ) IS TRUE AS packaged,
+                   BOOL_OR(
+                       pt.code = 'incoming'
+                       AND src.usage = 'customer'
+                       AND p.state = 'done'
+                   ) IS TRUE AS returned
+              FROM stock_picking p
+              JOIN stock_picking_type pt ON pt.id = p.picking_type_id
+              JOIN stock_location src ON src.id = p.location_id
+             WHERE p.sale_id = ANY(%s)
+          GROUP BY p.sale_id
+            """,
+            (order_ids,),
+        )
+        picking_summary = {row["sale_id"]: row for row in self.env.cr.dictfetchall()}
+        self.env.cr.execute(
+            """
+            SELECT sale_id, ARRAY_AGG(id ORDER BY id)
+              FROM mrp_production
+             WHERE sale_id = ANY(%s)
+               AND state IN ('confirmed', 'planned', 'progress')
+          GROUP BY sale_id
+            """,
+            (order_ids,),
+        )
+        return picking_summary, dict(self.env.cr.fetchall())
+
+    @api.model
+    def _cron_recompute_order_state(self, batch_size=1000, max_batches=None):
+        """
+        Recompute the stored order_state of all orders in id ordered chunks,
+        committing after each chunk. The last processed id is kept in the
+        altinkaya_sales.order_state_recompute_last_id system parameter, so an
+        interrupted or limited run resumes where it stopped. Once all orders
+        are processed the parameter is set to "done" and later runs do
+        nothing, reset it to 0 to recompute all orders again.
+        :param batch_size: number of orders per chunk
+        :param max_batches: stop after this many chunks, None for no limit
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        param = "altinkaya_sales.order_state_recompute_last_id"
+        last_id = ICP.get_param(param, "0")
+        if last_id == "done":
+            return True
+        last_id = int(last_id)
+        field = self._fields["order_state"]
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            self.env.cr.execute(
+                "SELECT id FROM sale_order WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size),
+            )
+            order_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not order_ids:
+                ICP.set_param(param, "done")
+                break
+            orders = self.browse(order_ids)
+            self.env.add_to_compute(field, orders)
+            orders.flush_recordset(["order_state", "state"])
+            last_id = order_ids[-1]
+            ICP.set_param(param, last_id)
+            self.env.cr.commit()
+            self.env.invalidate_all()
+            batches += 1
         return True
 
     altinkaya_payment_url = fields.Char(
@@ -376,14 +470,15 @@ class SaleOrder(models.Model):
 
     def write(self, vals):
         res = super(SaleOrder, self).write(vals)
-        for sale in self:
-            sale.order_line.explode_set_contents()
+        # Set lines can only appear through the order lines
+        if "order_line" in vals:
+            self.order_line.explode_set_contents(merge_set_lines=False)
         return res
 
-    @api.model
-    def create(self, vals):
-        res = super(SaleOrder, self).create(vals)
-        res.order_line.explode_set_contents()
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super(SaleOrder, self).create(vals_list)
+        res.order_line.explode_set_contents(merge_set_lines=False)
         return res
 
 
@@ -391,13 +486,7 @@ class SaleOrderLine(models.Model):
     _inherit = "sale.order.line"
 
     show_custom_products = fields.Boolean("Show Custom Products")
-    set_product = fields.Boolean("Set product?", compute="_compute_set_product")
     date_order = fields.Datetime(related="order_id.date_order")
-    set_parent_product_id = fields.Many2one(
-        comodel_name="product.product",
-        string="Parent Product",
-        readonly=True,
-    )
 
     def copy_line_to_active_order(self):
         sale = self.env["sale.order"].browse(
@@ -423,17 +512,6 @@ class SaleOrderLine(models.Model):
 
             sale.order_line._compute_amount()
 
-    @api.depends("product_id")
-    def _compute_set_product(self):
-        bom_obj = self.env["mrp.bom"].sudo()
-        bom_dict = bom_obj._bom_find(products=self.product_id)
-        if not bom_dict:
-            self.set_product = False
-        else:
-            # bom_id = bom_obj.browse(bom_id.id)
-            bom_id = bom_dict[self.product_id]
-            self.set_product = bom_id.type == "phantom"
-
     @api.onchange("show_custom_products")
     def onchange_show_custom(self):
         domain = [("sale_ok", "=", True)]
@@ -451,57 +529,3 @@ class SaleOrderLine(models.Model):
             ]
 
         return {"domain": {"product_tmpl_id": domain}}
-
-    def explode_set_contents(self):
-        """Explodes order lines."""
-
-        bom_obj = self.env["mrp.bom"].sudo()
-        prod_obj = self.env["product.product"].sudo()
-        uom_obj = self.env["uom.uom"].sudo()
-        to_unlink_ids = self.env["sale.order.line"]
-        to_explode_again_ids = self.env["sale.order.line"]
-
-        for line in self.filtered(
-            lambda l: l.set_product == True and l.state in ["draft", "sent"]
-        ):
-            bom_id = bom_obj._bom_find(product=line.product_id)
-            customer_lang = line.order_id.partner_id.lang
-            if not bom_id:
-                continue
-            if bom_id.type == "phantom":
-                factor = (
-                    line.product_uom._compute_quantity(
-                        line.product_qty, bom_id.product_uom_id
-                    )
-                    / bom_id.product_qty
-                )
-                boms, lines = bom_id.explode(
-                    line.product_id, factor, picking_type=bom_id.picking_type_id
-                )
-
-                for bom_line, data in lines:
-                    product = data["target_product"]
-                    sol = self.env["sale.order.line"].new()
-                    sol.order_id = line.order_id
-                    sol.product_id = product
-                    sol.product_uom_qty = data["qty"]  # data['qty']
-                    sol.product_id_change()
-                    sol.product_uom_change()
-                    sol._onchange_discount()
-                    sol._compute_amount()
-                    sol.name = product.with_context(
-                        {"lang": customer_lang}
-                    ).display_name
-                    vals = sol._convert_to_write(sol._cache)
-
-                    sol_id = self.create(vals)
-                    to_explode_again_ids |= sol_id
-
-                to_unlink_ids |= line
-
-        # check if new moves needs to be exploded
-        if to_explode_again_ids:
-            to_explode_again_ids.explode_set_contents()
-        # delete the line with original product which is not relevant anymore
-        if to_unlink_ids:
-            to_unlink_ids.unlink()
@@ -0,0 +1 @@
+from . import test_order_state
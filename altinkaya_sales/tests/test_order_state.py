@@ -0,0 +1,132 @@
+from odoo.tests import common
+
+ONGOING_STATES = ["confirmed", "planned", "progress"]
+
+
+def legacy_order_state_summary(order):
+    """Previous implementation, filtered passes over the order pickings"""
+    pickings = order.picking_ids
+    outgoing_pickings = pickings.filtered(
+        lambda p: p.picking_type_code == "outgoing" and p.state == "done"
+    )
+    incoming_pickings = pickings.filtered(
+        lambda p: p.picking_type_code == "incoming"
+        and p.location_id.usage == "customer"
+    )
+    invoiced_pickings = outgoing_pickings.filtered(
+        lambda p: p.invoice_state == "invoiced"
+    )
+    summary = {
+        "active_count": bool(pickings.filtered(lambda p: p.state != "cancel")),
+        "invoiced": bool(invoiced_pickings),
+        "delivered": any(
+            p.delivery_state == "customer_delivered" for p in invoiced_pickings
+        ),
+        "packaged": any(p.is_packaged for p in outgoing_pickings),
+        "returned": bool(incoming_pickings.filtered(lambda p: p.state == "done")),
+    }
+    productions = order.production_ids.filtered(lambda p: p.state in ONGOING_STATES)
+    return summary, sorted(productions.ids)
+
+
+class TestOrderState(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        partner = cls.env["res.partner"].create({"name": "Order State Customer"})
+        cls.orders = cls.env["sale.order"].create(
+            [{"partner_id": partner.id} for _i in range(4)]
+        )
+        cls.product = cls.env["product.product"].create(
+            {"name": "Order State Product", "type": "product"}
+        )
+        cls.stock_location = cls.env.ref("stock.stock_location_stock")
+        cls.customer_location = cls.env.ref("stock.stock_location_customers")
+        out_type = cls.env.ref("stock.picking_type_out")
+        in_type = cls.env.ref("stock.picking_type_in")
+        order_1, order_2, order_3, _order_4 = cls.orders
+        # Delivered, with an ongoing and a done production
+        cls._create_picking(
+            order_1,
+            out_type,
+            state="done",
+            invoice_state="invoiced",
+            delivery_state="customer_delivered",
+        )
+        cls._create_picking(order_1, out_type, state="assigned")
+        cls._create_production(order_1, "confirmed")
+        cls._create_production(order_1, "done")
+        # Packaged, not invoiced, then returned
+        cls._create_picking(
+            order_2,
+            out_type,
+            state="done",
+            invoice_state="2binvoiced",
+            is_packaged=True,
+        )
+        cls._create_picking(
+            order_2,
+            in_type,
+            state="done",
+            location=cls.customer_location,
+            location_dest=cls.stock_location,
+        )
+        # Invoiced but not delivered, and a cancelled picking
+        cls._create_picking(order_3, out_type, state="done", invoice_state="invoiced")
+        cls._create_picking(order_3, out_type, state="cancel", is_packaged=True)
+        cls._create_production(order_3, "progress")
+        cls._create_production(order_3, "planned")
+
+    @classmethod
+    def _create_picking(
+        cls, order, picking_type, state, location=None, location_dest=None, **vals
+    ):
+        picking = cls.env["stock.picking"].create(
+            {
+                "partner_id": order.partner_id.id,
+                "picking_type_id": picking_type.id,
+                "location_id": (location or cls.stock_location).id,
+                "location_dest_id": (location_dest or cls.customer_location).id,
+                "sale_id": order.id,
+            }
+        )
+        picking.write(dict(vals, state=state))
+        return picking
+
+    @classmethod
+    def _create_production(cls, order, state):
+        production = cls.env["mrp.production"].create(
+            {
+                "product_id": cls.product.id,
+                "product_qty": 1.0,
+                "product_uom_id": cls.product.uom_id.id,
+            }
+        )
+        production.flush_recordset()
+        # The order of a production comes from its procurement group
+        cls.env.cr.execute(
+            "UPDATE mrp_production SET sale_id = %s, state = %s WHERE id = %s",
+            (order.id, state, production.id),
+        )
+        production.invalidate_recordset()
+        order.invalidate_recordset(["production_ids"])
+        return production
+
+    def test_summary_same_as_legacy(self):
+        picking_summary, ongoing_productions = self.orders._get_order_state_summary()
+        for order in self.orders:
+            row = picking_summary.get(order.id, {})
+            summary = {
+                key: bool(row.get(key))
+                for key in (
+                    "active_count",
+                    "invoiced",
+                    "delivered",
+                    "packaged",
+                    "returned",
+                )
+            }
+            self.assertEqual(
+                (summary, sorted(ongoing_productions.get(order.id, []))),
+                legacy_order_state_summary(order),
+            )
@@ -1,2 +1,8 @@
 from . import models
 from . import wizard
+from odoo import api, SUPERUSER_ID
+
+
+def post_init_hook(cr, registry):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["stock.reporting.location"]._create_default_locations()
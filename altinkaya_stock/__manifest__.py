@@ -1,6 +1,6 @@
 {
     "name": "Altinkaya Stock",
-    "version": "16.0.0.1.0",
+    "version": "16.0.0.2.0",
     "website": "https://www.altinkaya.com",
     "license": "LGPL-3",
     "author": "Ahmet Altınışık,OnurUgur,Codequarters,Yavuz Avcı",
@@ -14,8 +14,10 @@
         "altinkaya_sales",
         "barcodes_generator_product",
         "partner_ranking",
+        "queue_job",
     ],
     "data": [
+        "security/ir.model.access.csv",
         "views/stock_quant_view.xml",
         "views/stock_picking_views.xml",
         "views/stock_view.xml",
@@ -30,8 +32,10 @@
         "wizard/wizard_update_unreserved_quants.xml",
         "views/stock_warehouse_orderpoint_view.xml",
         "views/mrp_production_view.xml",
+        "views/stock_reporting_location_views.xml",
         "security/security_group.xml",
     ],
+    "post_init_hook": "post_init_hook",
     "installable": True,
     "auto_install": False,
 }
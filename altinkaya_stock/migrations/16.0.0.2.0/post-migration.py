@@ -0,0 +1,6 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["stock.reporting.location"]._create_default_locations()
@@ -12,3 +12,5 @@ from . import stock_location_route
 from . import stock_rule
 from . import stock_move_line
 from . import stock_inventory
+from . import stock_reporting_location
+from . import mrp_bom
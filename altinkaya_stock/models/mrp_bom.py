@@ -0,0 +1,139 @@
+from collections import defaultdict
+
+from odoo import api, models, tools
+
+# Fields the exploded kit components depend on, per model
+KIT_BOM_FIELDS = {
+    "product_id",
+    "product_tmpl_id",
+    "product_qty",
+    "product_uom_id",
+    "type",
+    "active",
+    "company_id",
+    "sequence",
+    "picking_type_id",
+    "bom_line_ids",
+    "bom_template_line_ids",
+}
+KIT_BOM_LINE_FIELDS = {
+    "bom_id",
+    "product_id",
+    "product_qty",
+    "product_uom_id",
+    "bom_product_template_attribute_value_ids",
+}
+KIT_BOM_TEMPLATE_LINE_FIELDS = {
+    "bom_id",
+    "product_tmpl_id",
+    "product_qty",
+    "product_uom_id",
+    "inherited_attribute_ids",
+    "attribute_value_ids",
+    "target_attribute_value_ids",
+    "factor_attribute_id",
+    "attribute_factor",
+}
+
+
+class MrpBom(models.Model):
+    _inherit = "mrp.bom"
+
+    @api.model
+    @tools.ormcache("product_id")
+    def _get_kit_components(self, product_id):
+        """
+        Explode the phantom BoM of a set product into its leaf components.
+        The result is cached per registry and invalidated when a field of
+        KIT_BOM_FIELDS of a phantom BoM or of its lines changes.
+        :param product_id: product.product id
+        :return: tuple of (component product id, qty per set in component uom)
+        """
+        product = self.env["product.product"].sudo().browse(product_id)
+        bom = self.sudo()._bom_find(product, bom_type="phantom")[product]
+        if not bom:
+            return ()
+        _boms, lines = bom.explode(
+            product, quantity=1, picking_type=bom.picking_type_id
+        )
+        factors = defaultdict(float)
+        for line, line_data in lines:
+            component = line_data.get("target_product") or line.product_id
+            factors[component.id] += line.product_uom_id._compute_quantity(
+                line_data["qty"] / bom.product_qty,
+                component.uom_id,
+                round=False,
+                raise_if_failure=False,
+            )
+        return tuple(factors.items())
+
+    @api.model
+    def _clear_kit_cache(self, boms):
+        """
+        Drop the cached kit components when one of the BoMs is a kit, other
+        BoMs are never exploded by _get_kit_components.
+        """
+        if any(bom.type == "phantom" for bom in boms.sudo()):
+            self.clear_caches()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._clear_kit_cache(records)
+        return records
+
+    def write(self, vals):
+        if not KIT_BOM_FIELDS & set(vals):
+            return super().write(vals)
+        boms = self.filtered(lambda bom: bom.type == "phantom")
+        res = super().write(vals)
+        self._clear_kit_cache(boms | self)
+        return res
+
+    def unlink(self):
+        self._clear_kit_cache(self)
+        return super().unlink()
+
+
+class MrpBomLine(models.Model):
+    _inherit = "mrp.bom.line"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["mrp.bom"]._clear_kit_cache(records.bom_id)
+        return records
+
+    def write(self, vals):
+        if not KIT_BOM_LINE_FIELDS & set(vals):
+            return super().write(vals)
+        boms = self.bom_id
+        res = super().write(vals)
+        self.env["mrp.bom"]._clear_kit_cache(boms | self.bom_id)
+        return res
+
+    def unlink(self):
+        self.env["mrp.bom"]._clear_kit_cache(self.bom_id)
+        return super().unlink()
+
+
+class MrpBomTemplateLine(models.Model):
+    _inherit = "mrp.bom.template.line"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["mrp.bom"]._clear_kit_cache(records.bom_id)
+        return records
+
+    def write(self, vals):
+        if not KIT_BOM_TEMPLATE_LINE_FIELDS & set(vals):
+            return super().write(vals)
+        boms = self.bom_id
+        res = super().write(vals)
+        self.env["mrp.bom"]._clear_kit_cache(boms | self.bom_id)
+        return res
+
+    def unlink(self):
+        self.env["mrp.bom"]._clear_kit_cache(self.bom_id)
+        return super().unlink()
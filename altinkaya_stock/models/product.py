@@ -1,6 +1,13 @@
 from odoo import models, fields, api, _
-from odoo.tools import float_is_zero, float_compare
+from odoo.tools import float_round
 from odoo.exceptions import UserError
+from odoo.osv import expression
+
+from .website_stock_cache import get_cache
+
+# Key of the products whose website stock cache is dropped at the end of the
+# transaction in the postcommit data of the cursor
+WEBSITE_STOCK_CACHE_KEY = "altinkaya_stock.website_stock_cache"
 
 
 class StockQuant(models.Model):
@@ -196,265 +203,453 @@ class Product(models.Model):
         action["domain"] = [("product_id", "=", self.id)]
         return action
 
-    def _search_qty_merkez(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 12})._search_qty_available(
-                    operator, value
-                ),
-            )
+    @api.model
+    def _search_location_qty(self, location_id, operator, value):
+        """
+        Search products by their on hand quantity in a location and its
+        children. Mirrors _search_qty_available, but returns a SQL subquery
+        aggregating stock_quant instead of a list of product ids.
+        :param location_id: stock.location id
+        :return: domain
+        """
+        if operator not in ("=", "!=", "<", "<=", ">", ">="):
+            raise UserError(_("Invalid domain operator %s") % operator)
+        if not isinstance(value, (float, int)):
+            raise UserError(_("Invalid domain right operand %s") % value)
+        # Products without any quant in the location have a zero quantity,
+        # include them the same way _search_qty_available_new does.
+        include_zero = (
+            value < 0.0
+            and operator in (">", ">=")
+            or value > 0.0
+            and operator in ("<", "<=")
+            or value == 0.0
+            and operator in (">=", "<=", "=")
+        )
+        self.env["stock.quant"].flush_model(
+            ["product_id", "location_id", "company_id", "quantity"]
+        )
+        quant_query = """
+            SELECT q.product_id
+              FROM stock_quant q
+             WHERE q.location_id = ANY(%s)
+               AND q.company_id IN %s
+        """
+        quant_params = [
+            list(self.env["stock.location"]._get_descendant_ids(location_id)),
+            tuple(self.env.companies.ids),
         ]
+        query = quant_query + (
+            " GROUP BY q.product_id HAVING SUM(q.quantity) %s %%s" % operator
+        )
+        params = quant_params + [value]
+        if include_zero:
+            self.env["product.product"].flush_model(["active", "product_tmpl_id"])
+            self.env["product.template"].flush_model(["type"])
+            query += """
+                UNION
+                SELECT pp.id
+                  FROM product_product pp
+                  JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                 WHERE pt.type = 'product'
+                   AND pp.active
+                   AND pp.id NOT IN ({})
+            """.format(
+                quant_query
+            )
+            params += quant_params
+        return [("id", "inselect", (query, params))]
+
+    @api.model
+    def _search_reporting_qty(self, code, operator, value):
+        location_id = self.env["stock.reporting.location"]._get_location_map().get(code)
+        if not location_id:
+            return expression.FALSE_DOMAIN
+        return self._search_location_qty(location_id, operator, value)
+
+    def _search_qty_merkez(self, operator, value):
+        return self._search_reporting_qty("merkez", operator, value)
 
     def _search_qty_sincan(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 21})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("sincan", operator, value)
 
     def _search_qty_enjek(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 29})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("enjek", operator, value)
 
     def _search_qty_montaj(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 53})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("montaj", operator, value)
 
     def _search_qty_cnc(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 61})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("cnc", operator, value)
 
     def _search_qty_boya(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 45})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("boya", operator, value)
 
     def _search_qty_metal(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 37})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("metal", operator, value)
 
     def _search_qty_maske(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 114})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("maske", operator, value)
 
     def _search_qty_baski(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 77})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("baski", operator, value)
 
     def _search_qty_torna(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 5895})._search_qty_available(
-                    operator, value
-                ),
-            )
-        ]
+        return self._search_reporting_qty("torna", operator, value)
 
     def _search_qty_kaplama(self, operator, value):
-        return [
-            (
-                "id",
-                "in",
-                self.with_context({"location": 6362})._search_qty_available(
-                    operator, value
-                ),
+        return self._search_reporting_qty("kaplama", operator, value)
+
+    def _get_location_quantities(self, location_ids, with_moves=True):
+        """
+        Compute the stock quantities of every product in self for every
+        given location, child locations included. Quants are aggregated with
+        a single grouped query, and pending moves with another one when
+        with_moves is set.
+        :param location_ids: list of stock.location ids
+        :param with_moves: also compute incoming, outgoing and virtual qty
+        :return: {product_id: {location_id: {quantity field: qty}}}
+        """
+        res = {
+            product_id: {
+                location_id: {
+                    "qty_available": 0.0,
+                    "qty_available_not_res": 0.0,
+                    "incoming_qty": 0.0,
+                    "outgoing_qty": 0.0,
+                    "virtual_available": 0.0,
+                }
+                for location_id in location_ids
+            }
+            for product_id in self._origin.ids
+        }
+        if not res or not location_ids:
+            return res
+        # Flatten the cached location trees into (root, location) pairs
+        root_ids, tree_location_ids = [], []
+        descendants = self.env["stock.location"]._get_descendant_map(location_ids)
+        for root_id, child_ids in descendants.items():
+            root_ids.extend([root_id] * len(child_ids))
+            tree_location_ids.extend(child_ids)
+        params = {
+            "product_ids": tuple(res),
+            "root_ids": root_ids,
+            "tree_location_ids": tree_location_ids,
+            "company_ids": tuple(self.env.companies.ids),
+        }
+        self.env["stock.quant"].flush_model(
+            ["product_id", "location_id", "company_id", "quantity", "reserved_quantity"]
+        )
+        self.env.cr.execute(
+            """
+            WITH tree AS (
+                SELECT * FROM unnest(%(root_ids)s::int[], %(tree_location_ids)s::int[])
+                    AS t(root_id, location_id)
+            )
+            SELECT q.product_id, tree.root_id,
+                   SUM(q.quantity),
+                   SUM(q.quantity - q.reserved_quantity)
+              FROM stock_quant q
+              JOIN tree ON tree.location_id = q.location_id
+             WHERE q.product_id IN %(product_ids)s
+               AND q.company_id IN %(company_ids)s
+          GROUP BY q.product_id, tree.root_id
+            """,
+            params,
+        )
+        for product_id, location_id, quantity, unreserved in self.env.cr.fetchall():
+            values = res[product_id][location_id]
+            values["qty_available"] = quantity or 0.0
+            values["qty_available_not_res"] = unreserved or 0.0
+
+        if with_moves:
+            self.env["stock.move"].flush_model(
+                [
+                    "product_id",
+                    "location_id",
+                    "location_dest_id",
+                    "company_id",
+                    "state",
+                    "product_qty",
+                ]
+            )
+            # Same location domains as product.product._get_domain_locations:
+            # a move is incoming when it enters the location tree from outside
+            # of it and outgoing when it leaves the tree.
+            self.env.cr.execute(
+                """
+                WITH tree AS (
+                    SELECT * FROM unnest(
+                        %(root_ids)s::int[], %(tree_location_ids)s::int[]
+                    ) AS t(root_id, location_id)
+                )
+                SELECT m.product_id, tree.root_id,
+                       SUM(m.product_qty) FILTER (
+                           WHERE dest.location_id IS NOT NULL
+                             AND src.location_id IS NULL
+                       ),
+                       SUM(m.product_qty) FILTER (
+                           WHERE src.location_id IS NOT NULL
+                             AND dest.location_id IS NULL
+                       )
+                  FROM stock_move m
+                  JOIN tree
+                    ON tree.location_id IN (m.location_id, m.location_dest_id)
+             LEFT JOIN tree src
+                    ON src.root_id = tree.root_id
+                   AND src.location_id = m.location_id
+             LEFT JOIN tree dest
+                    ON dest.root_id = tree.root_id
+                   AND dest.location_id = m.location_dest_id
+                 WHERE m.product_id IN %(product_ids)s
+                   AND m.company_id IN %(company_ids)s
+                   AND m.state IN
+                       ('waiting', 'confirmed', 'assigned', 'partially_available')
+              GROUP BY m.product_id, tree.root_id
+                """,
+                params,
             )
+            for product_id, location_id, incoming, outgoing in self.env.cr.fetchall():
+                values = res[product_id][location_id]
+                values["incoming_qty"] = incoming or 0.0
+                values["outgoing_qty"] = outgoing or 0.0
+
+        for product in self._origin.with_context(prefetch_fields=False):
+            rounding = product.uom_id.rounding
+            for values in res[product.id].values():
+                values["virtual_available"] = (
+                    values["qty_available"]
+                    + values["incoming_qty"]
+                    - values["outgoing_qty"]
+                )
+                for key, qty in values.items():
+                    values[key] = float_round(qty, precision_rounding=rounding)
+        return res
+
+    def _compute_reporting_quantities(self, codes, qty_fields):
+        """
+        Fill the qty_*_<code> fields of the given reporting location codes.
+        :param codes: list of stock.reporting.location codes
+        :param qty_fields: {_get_location_quantities key: field name pattern}
+        """
+        location_map = self.env["stock.reporting.location"]._get_location_map()
+        quantities = self._get_location_quantities(
+            [location_map[code] for code in codes if code in location_map],
+            with_moves=set(qty_fields) != {"qty_available"},
+        )
+        for product in self:
+            product_qty = quantities.get(product._origin.id, {})
+            for code in codes:
+                values = product_qty.get(location_map.get(code), {})
+                for key, field_name in qty_fields.items():
+                    product[field_name % code] = values.get(key, 0.0)
+
+    @api.model
+    def _get_reporting_codes(self, compute):
+        """
+        Codes of the reporting locations whose qty_available_<code> field is
+        filled by the given compute method, in reporting location order.
+        Fields without a reporting location come last, they are set to 0.
+        :param compute: name of the compute method
+        :return: list of stock.reporting.location codes
+        """
+        location_map = self.env["stock.reporting.location"]._get_location_map()
+        field_codes = [
+            name[len("qty_available_") :]
+            for name, field in self._fields.items()
+            if name.startswith("qty_available_") and field.compute == compute
+        ]
+        return [code for code in location_map if code in field_codes] + [
+            code for code in field_codes if code not in location_map
         ]
 
     def _compute_custom_available(self):
-        for product in self:
-            product.qty_available_sincan = product.with_context(
-                {"location": 21}
-            ).qty_available
-            product.qty_available_merkez = product.with_context(
-                {"location": 12}
-            ).qty_available
-            product.qty_incoming_sincan = product.with_context(
-                {"location": 21}
-            ).incoming_qty
-            product.qty_incoming_merkez = product.with_context(
-                {"location": 12}
-            ).incoming_qty
-            product.qty_outgoing_sincan = product.with_context(
-                {"location": 21}
-            ).outgoing_qty
-            product.qty_outgoing_merkez = product.with_context(
-                {"location": 12}
-            ).outgoing_qty
-            product.qty_virtual_sincan = product.with_context(
-                {"location": 21}
-            ).virtual_available
-            product.qty_virtual_merkez = product.with_context(
-                {"location": 12}
-            ).virtual_available
-            product.qty_unreserved_sincan = product.with_context(
-                {"location": 21}
-            ).qty_available_not_res
-            product.qty_unreserved_merkez = product.with_context(
-                {"location": 12}
-            ).qty_available_not_res
+        self._compute_reporting_quantities(
+            self._get_reporting_codes("_compute_custom_available"),
+            {
+                "qty_available": "qty_available_%s",
+                "incoming_qty": "qty_incoming_%s",
+                "outgoing_qty": "qty_outgoing_%s",
+                "virtual_available": "qty_virtual_%s",
+                "qty_available_not_res": "qty_unreserved_%s",
+            },
+        )
 
     def _compute_custom2_available(self):
-        for product in self:
-            product.qty_available_montaj = product.with_context(
-                {"location": 53}
-            ).qty_available
-            product.qty_available_enjek = product.with_context(
-                {"location": 29}
-            ).qty_available
-            product.qty_available_cnc = product.with_context(
-                {"location": 61}
-            ).qty_available
-            product.qty_available_boya = product.with_context(
-                {"location": 45}
-            ).qty_available
-            product.qty_available_metal = product.with_context(
-                {"location": 37}
-            ).qty_available
-            product.qty_available_maske = product.with_context(
-                {"location": 114}
-            ).qty_available
-            product.qty_available_baski = product.with_context(
-                {"location": 77}
-            ).qty_available
-            product.qty_available_torna = product.with_context(
-                {"location": 5895}
-            ).qty_available
-            product.qty_available_kaplama = product.with_context(
-                {"location": 6362}
-            ).qty_available
+        self._compute_reporting_quantities(
+            self._get_reporting_codes("_compute_custom2_available"),
+            {"qty_available": "qty_available_%s"},
+        )
 
     def single_product_update_quant_reservation(self):
-        StockQuant = self.env["stock.quant"]
-        StockMoveLine = self.env["stock.move.line"]
-        decimal_places = self.env["decimal.precision"].precision_get(
-            "Product Unit of Measure"
+        self.env["stock.quant"]._reconcile_reserved_quantities(self.ids)
+
+    @api.model
+    def _get_website_stock_cache(self):
+        """
+        Website stock cache of this worker. Stock changes only invalidate
+        the cache of the worker doing them: other workers are not signalled
+        and serve their cached quantities until they expire, so the ttl
+        (altinkaya_stock.website_stock_cache_ttl, in seconds) is the longest
+        time a quantity shown on the website can be stale.
+        """
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        return get_cache(
+            self.env.cr.dbname,
+            max_size=int(get_param("altinkaya_stock.website_stock_cache_size", 100000)),
+            ttl=int(get_param("altinkaya_stock.website_stock_cache_ttl", 60)),
         )
-        for product in self:
-            quants = StockQuant.search([("product_id", "=", product.id)])
-            for quant in quants:
-                move_lines = StockMoveLine.search(
-                    [
-                        ("product_id", "=", quant.product_id.id),
-                        ("location_id", "=", quant.location_id.id),
-                        ("lot_id", "=", quant.lot_id.id),
-                        ("package_id", "=", quant.package_id.id),
-                        ("owner_id", "=", quant.owner_id.id),
-                        ("product_qty", "!=", 0),
+
+    @api.model
+    def _invalidate_website_stock_cache(self, product_ids):
+        """
+        Drop the cached quantities of the given products, now and once the
+        current transaction is committed or rolled back, so that neither
+        the pre-commit value nor a value computed from the uncommitted or
+        rolled back stock is kept.
+        """
+        if not product_ids:
+            return
+        cache = self._get_website_stock_cache()
+        cache.invalidate(product_ids)
+        data = self.env.cr.postcommit.data
+        pending_ids = data.get(WEBSITE_STOCK_CACHE_KEY)
+        if pending_ids is None:
+            pending_ids = data[WEBSITE_STOCK_CACHE_KEY] = set()
+            self.env.cr.postcommit.add(lambda: cache.invalidate(pending_ids))
+            self.env.cr.postrollback.add(lambda: cache.invalidate(pending_ids))
+        pending_ids.update(product_ids)
+
+    @api.model
+    def get_website_stock_cache_stats(self):
+        """
+        :return: size, hit, miss and invalidation counters of the website
+            stock cache of this worker
+        """
+        return self._get_website_stock_cache().stats()
+
+    def _get_cached_location_quantities(self, location_ids):
+        """
+        Same as _get_location_quantities without moves, served from the
+        website stock cache. Only the missing (product, location) pairs are
+        computed, with a single batched call. Quantities depend on the
+        allowed companies, which are part of the cache key.
+        :return: {product_id: {location_id: {quantity field: qty}}}
+        """
+        cache = self._get_website_stock_cache()
+        company_ids = tuple(sorted(self.env.companies.ids))
+        keys = [
+            (product_id, location_id, company_ids)
+            for product_id in self._origin.ids
+            for location_id in location_ids
+        ]
+        res = cache.get_many(keys)
+        missing = [key for key in keys if key not in res]
+        if missing:
+            quantities = self.browse(
+                {key[0] for key in missing}
+            )._get_location_quantities(
+                list({key[1] for key in missing}), with_moves=False
+            )
+            computed = {
+                key: {
+                    "qty_available": quantities[key[0]][key[1]]["qty_available"],
+                    "qty_available_not_res": quantities[key[0]][key[1]][
+                        "qty_available_not_res"
+                    ],
+                }
+                for key in missing
+            }
+            cache.set_many(computed)
+            res.update(computed)
+        quantities = {}
+        for (product_id, location_id, _company_ids), values in res.items():
+            quantities.setdefault(product_id, {})[location_id] = values
+        return quantities
+
+    def _get_kit_availability(self, location_ids, use_cache=False):
+        """
+        Compute how many sets of each product can be built from the unreserved
+        stock of its components, for every given location. Set contents come
+        from the cached phantom BoM explosion and the stock of all components
+        is read at once. Products without a phantom BoM get their own
+        unreserved quantity.
+        :param location_ids: list of stock.location ids
+        :param use_cache: read component quantities from the website stock cache
+        :return: {product_id: {location_id: qty}}
+        """
+        MrpBom = self.env["mrp.bom"]
+        components = {
+            product_id: MrpBom._get_kit_components(product_id)
+            for product_id in self._origin.ids
+        }
+        stock_product_ids = {
+            component_id
+            for product_id, kit_components in components.items()
+            for component_id in (
+                [c[0] for c in kit_components] if kit_components else [product_id]
+            )
+        }
+        stock_products = self.browse(stock_product_ids)
+        if use_cache:
+            quantities = stock_products._get_cached_location_quantities(location_ids)
+        else:
+            quantities = stock_products._get_location_quantities(
+                location_ids, with_moves=False
+            )
+        res = {}
+        for product_id, kit_components in components.items():
+            res[product_id] = {}
+            for location_id in location_ids:
+                if not kit_components:
+                    res[product_id][location_id] = quantities[product_id][location_id][
+                        "qty_available_not_res"
                     ]
-                )
-                if quant.location_id.should_bypass_reservation():
-                    # If a quant is in a location that should bypass the reservation, its `reserved_quantity` field
-                    # should be 0.
-                    if not float_is_zero(
-                        quant.reserved_quantity, precision_digits=decimal_places
-                    ):
-                        quant.write({"reserved_quantity": 0})
-                else:
-                    raw_reserved_qty = sum(move_lines.mapped("product_qty"))
-                    if (
-                        float_compare(
-                            quant.reserved_quantity,
-                            raw_reserved_qty,
-                            precision_digits=decimal_places,
-                        )
-                        != 0
-                    ):
-                        quant.write({"reserved_quantity": raw_reserved_qty})
+                    continue
+                set_qtys = []
+                for component_id, factor in kit_components:
+                    unreserved_qty = quantities[component_id][location_id][
+                        "qty_available_not_res"
+                    ]
+                    if unreserved_qty > 0 and factor > 0:
+                        set_qtys.append(unreserved_qty / factor)
+                    else:
+                        set_qtys.append(0.0)
+                res[product_id][location_id] = min(set_qtys)
+        return res
 
     def _compute_set_quantities(self):
         # Explode set content and find unreserved quantity
-        for product in self:
-            bom_id = self.env["mrp.bom"].sudo()._bom_find(product=product)
-            if bom_id and bom_id.type == "phantom":
-                boms, lines = bom_id.explode(
-                    product, quantity=1, picking_type=bom_id.picking_type_id
-                )
-                exploded_set_qty = 0
-                for line in lines:
-                    unreserved_qty = line[1]["target_product"].qty_available_not_res
-                    factor = line[1]["qty"]
-                    if unreserved_qty > 0 and factor > 0:
-                        set_qty = unreserved_qty / factor
-                    else:
-                        set_qty = 0
-                    exploded_set_qty = (
-                        min(set_qty, exploded_set_qty) if exploded_set_qty else set_qty
-                    )
-                return exploded_set_qty
-            else:
-                return product.qty_available_not_res
+        self.ensure_one()
+        location_id = (
+            self.env.context.get("location")
+            or self.env.ref("stock.stock_location_locations").id
+        )
+        return self._get_kit_availability([location_id])[self.id][location_id]
+
+    def get_quantity_website_multi(self):
+        """
+        Unreserved Sincan and Merkez quantities of many products for the shop,
+        sets included, read through the website stock cache.
+        :return: {product_id: {"qty_unreserved_sincan": qty,
+            "qty_unreserved_merkez": qty}}
+        """
+        location_map = self.env["stock.reporting.location"]._get_location_map()
+        location_ids = [
+            location_map[code] for code in ("sincan", "merkez") if code in location_map
+        ]
+        availability = self._get_kit_availability(location_ids, use_cache=True)
+        return {
+            product_id: {
+                "qty_unreserved_%s" % code: qtys.get(location_map.get(code), 0.0)
+                for code in ("sincan", "merkez")
+            }
+            for product_id, qtys in availability.items()
+        }
 
     def get_quantity_website(self):
         self.ensure_one()
-        data = {}
-        if self.product_tmpl_id.set_product:
-            data["qty_unreserved_sincan"] = self.with_context(
-                {"location": 21}
-            )._compute_set_quantities()
-            data["qty_unreserved_merkez"] = self.with_context(
-                {"location": 12}
-            )._compute_set_quantities()
-        else:
-            data["qty_unreserved_sincan"] = self.qty_unreserved_sincan
-            data["qty_unreserved_merkez"] = self.qty_unreserved_merkez
-        return data
+        return self.get_quantity_website_multi()[self.id]
 
 
 class mrpProduction(models.Model):
@@ -1,4 +1,4 @@
-from odoo import models, fields
+from odoo import api, models, fields, tools
 
 
 class StockLocation(models.Model):
@@ -17,3 +17,53 @@ class StockLocation(models.Model):
         help="high priority locations will be reserved first",
         default=10,
     )
+
+    @api.model
+    @tools.ormcache("location_id")
+    def _get_descendant_ids(self, location_id):
+        """
+        Return the ids of a location and all of its children, the same set as
+        a child_of domain. The result is cached per registry and invalidated
+        whenever the location tree changes.
+        :param location_id: stock.location id
+        :return: tuple of stock.location ids
+        """
+        self.flush_model(["parent_path"])
+        self.env.cr.execute(
+            """
+            SELECT child.id
+              FROM stock_location child
+              JOIN stock_location root
+                ON child.parent_path LIKE root.parent_path || '%%'
+             WHERE root.id = %s
+            """,
+            (location_id,),
+        )
+        return tuple(row[0] for row in self.env.cr.fetchall())
+
+    @api.model
+    def _get_descendant_map(self, location_ids):
+        """
+        :param location_ids: list of stock.location ids
+        :return: {location_id: tuple of descendant ids}
+        """
+        return {
+            location_id: self._get_descendant_ids(location_id)
+            for location_id in location_ids
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "location_id" in vals:
+            self.clear_caches()
+        return res
+
+    def unlink(self):
+        self.clear_caches()
+        return super().unlink()
@@ -95,13 +95,40 @@ class StockMove(models.Model):
     #         return res
 
     def find_orig_move_ids(self, moves):
-        orig_moves = moves
-        for move in moves:
-            if move.move_orig_ids:
-                orig_moves |= self.find_orig_move_ids(move.move_orig_ids)
-            if move.production_id.move_raw_ids:
-                orig_moves |= self.find_orig_move_ids(move.production_id.move_raw_ids)
-        return orig_moves
+        """
+        Return the given moves and their whole upstream chain: the origin
+        moves and, for finished product moves, the raw material moves of
+        their production, recursively. Resolved with a single recursive query.
+        """
+        if not moves:
+            return moves
+        self.flush_model(
+            ["move_orig_ids", "production_id", "raw_material_production_id"]
+        )
+        self.env.cr.execute(
+            """
+            WITH RECURSIVE chain(id) AS (
+                SELECT unnest(%s::int[])
+                UNION
+                SELECT upstream.id
+                  FROM chain
+                 CROSS JOIN LATERAL (
+                    SELECT rel.move_orig_id AS id
+                      FROM stock_move_move_rel rel
+                     WHERE rel.move_dest_id = chain.id
+                    UNION ALL
+                    SELECT raw.id
+                      FROM stock_move finished
+                      JOIN stock_move raw
+                        ON raw.raw_material_production_id = finished.production_id
+                     WHERE finished.id = chain.id
+                ) upstream
+            )
+            SELECT id FROM chain
+            """,
+            (moves.ids,),
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
 
     def cancel_move_origs(self, move_id):
         moves_with_origs = self.find_orig_move_ids(move_id)
@@ -114,6 +141,6 @@ class StockMove(models.Model):
         productions = productions.filtered(
             lambda p: p.state not in ["progress", "done", "cancel"]
         )
-        for production in productions:
-            production.action_cancel()
+        if productions:
+            productions.action_cancel()
         moves_no_production._action_cancel()
@@ -1,6 +1,6 @@
 # Copyright 2023 Yiğit Budak (https://github.com/yibudak)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
-from odoo import models, fields, _
+from odoo import api, models, fields, _
 from odoo.exceptions import UserError
 
 
@@ -11,6 +11,28 @@ class StockMoveLine(models.Model):
         related="product_id.type", string="Product Type"
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        move_lines = super().create(vals_list)
+        self.env["product.product"]._invalidate_website_stock_cache(
+            move_lines.product_id.ids
+        )
+        return move_lines
+
+    def write(self, vals):
+        if {"product_id", "location_id", "reserved_uom_qty", "qty_done"} & set(vals):
+            product_ids = self.product_id.ids
+            res = super().write(vals)
+            self.env["product.product"]._invalidate_website_stock_cache(
+                product_ids + self.product_id.ids
+            )
+            return res
+        return super().write(vals)
+
+    def unlink(self):
+        self.env["product.product"]._invalidate_website_stock_cache(self.product_id.ids)
+        return super().unlink()
+
     def action_scrap_button(self):
         self.ensure_one()
         params = self._context.get("params")
@@ -6,6 +6,70 @@
 #
 from odoo import models, fields, api
 
+# Latest records of each product for the orderpoint history panels: the
+# model, the domain and the query of each panel. A query reads the records
+# of a subquery built from the domain by _search, so the record rules and the
+# companies of the user apply, and returns (product_id, id, rank) and a per
+# product summary column.
+HISTORY_QUERIES = {
+    "production_ids": (
+        "mrp.production",
+        [("state", "!=", "cancel")],
+        """
+        SELECT product_id, id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY product_id ORDER BY create_date DESC, id DESC
+               ),
+               SUM(product_qty) FILTER (WHERE state != 'done')
+                   OVER (PARTITION BY product_id)
+          FROM mrp_production
+         WHERE id IN (%s)
+        """,
+    ),
+    "transfers_to_customer_ids": (
+        "stock.move",
+        [("state", "not in", ["draft", "cancel"])],
+        """
+        SELECT m.product_id, m.id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY m.product_id ORDER BY m.create_date DESC, m.id DESC
+               ),
+               SUM(m.product_qty) FILTER (
+                   WHERE m.state != 'done' AND dest.usage = 'customer'
+               ) OVER (PARTITION BY m.product_id)
+          FROM stock_move m
+          JOIN stock_location dest ON dest.id = m.location_dest_id
+         WHERE m.id IN (%s)
+        """,
+    ),
+    "done_purchaseline_ids": (
+        "purchase.order.line",
+        [("state", "not in", ["draft", "cancel"])],
+        """
+        SELECT l.product_id, l.id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY l.product_id ORDER BY l.create_date DESC, l.id DESC
+               ),
+               NULL
+          FROM purchase_order_line l
+         WHERE l.id IN (%s)
+        """,
+    ),
+    "done_orderline_ids": (
+        "sale.order.line",
+        [("state", "not in", ["draft", "cancel"])],
+        """
+        SELECT product_id, id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY product_id ORDER BY create_date DESC, id DESC
+               ),
+               NULL
+          FROM sale_order_line
+         WHERE id IN (%s)
+        """,
+    ),
+}
+
 
 class StockWarehouseOrderpoint(models.Model):
     _inherit = "stock.warehouse.orderpoint"
@@ -18,64 +82,108 @@ class StockWarehouseOrderpoint(models.Model):
     transfers_to_customer_ids = fields.Many2many(
         "stock.move",
         string="Transfers to Customers",
-        compute="_compute_customer_transfers",
+        compute="_compute_history",
     )
 
     production_ids = fields.Many2many(
-        "mrp.production", string="Manufacturing Orders", compute="_compute_productions"
+        "mrp.production", string="Manufacturing Orders", compute="_compute_history"
     )
 
     done_purchaseline_ids = fields.Many2many(
         "purchase.order.line",
         string="Previous Purchases",
-        compute="_compute_done_purchaselines",
+        compute="_compute_history",
     )
 
     done_orderline_ids = fields.Many2many(
-        "sale.order.line", string="Done Orders", compute="_compute_done_orderlines"
+        "sale.order.line", string="Done Orders", compute="_compute_history"
     )
 
-    @api.depends("product_id")
-    def _compute_productions(self):
-        for wizard in self:
-            wizard.production_ids = self.env["mrp.production"].search(
-                [
-                    ("product_id", "=", wizard.product_id.id),
-                    ("state", "not in", ["cancel"]),
-                ],
-                order="create_date desc",
-            )
+    open_production_qty = fields.Float(
+        string="Open Manufacturing Qty",
+        digits="Product Unit of Measure",
+        compute="_compute_history",
+    )
+    pending_customer_qty = fields.Float(
+        string="Pending Customer Qty",
+        digits="Product Unit of Measure",
+        compute="_compute_history",
+    )
+    last_purchase_price = fields.Monetary(
+        string="Last Purchase Price",
+        currency_field="last_purchase_currency_id",
+        compute="_compute_history",
+    )
+    last_purchase_currency_id = fields.Many2one(
+        "res.currency", string="Last Purchase Currency", compute="_compute_history"
+    )
+    last_purchase_date = fields.Datetime(
+        string="Last Purchase Date", compute="_compute_history"
+    )
 
-    @api.depends("product_id")
-    def _compute_customer_transfers(self):
-        for wizard in self:
-            wizard.transfers_to_customer_ids = self.env["stock.move"].search(
-                [
-                    ("product_id", "=", wizard.product_id.id),
-                    ("state", "not in", ["draft", "cancel"]),
-                ],
-                order="create_date desc",
-            )
+    @api.model
+    def _get_history_limit(self):
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("altinkaya_stock.orderpoint_history_limit", 80)
+        )
 
     @api.depends("product_id")
-    def _compute_done_purchaselines(self):
-        for wizard in self:
-            wizard.done_purchaseline_ids = self.env["purchase.order.line"].search(
-                [
-                    ("product_id", "=", wizard.product_id.id),
-                    ("state", "not in", ["draft", "cancel"]),
-                ],
-                limit=40,
-                order="create_date desc",
+    def _compute_history(self):
+        """
+        Fill the history panels and summaries of all orderpoints with one
+        query per panel, keeping the latest records of each product only.
+        A panel whose model the user cannot read stays empty.
+        """
+        product_ids = list(set(self.product_id.ids))
+        limits = dict.fromkeys(HISTORY_QUERIES, self._get_history_limit())
+        limits["done_purchaseline_ids"] = 40
+        history = {field_name: {} for field_name in HISTORY_QUERIES}
+        summary = {field_name: {} for field_name in HISTORY_QUERIES}
+        last_purchase_lines = self.env["purchase.order.line"]
+        for field_name, (model_name, domain, query) in HISTORY_QUERIES.items():
+            model = self.env[model_name]
+            if not product_ids or not model.check_access_rights(
+                "read", raise_exception=False
+            ):
+                continue
+            model.flush_model()
+            subquery, params = model._search(
+                [("product_id", "in", product_ids)] + domain
+            ).subselect()
+            self.env.cr.execute(
+                "SELECT * FROM (%s) AS history(product_id, id, rank, total) "
+                "WHERE rank <= %%s ORDER BY product_id, rank" % (query % subquery),
+                list(params) + [limits[field_name]],
             )
-
-    @api.depends("product_id")
-    def _compute_done_orderlines(self):
-        for wizard in self:
-            wizard.done_orderline_ids = self.env["sale.order.line"].search(
-                [
-                    ("product_id", "=", wizard.product_id.id),
-                    ("state", "not in", ["draft", "cancel"]),
-                ],
-                order="create_date desc",
+            for product_id, res_id, _rank, total in self.env.cr.fetchall():
+                history[field_name].setdefault(product_id, []).append(res_id)
+                summary[field_name][product_id] = total or 0.0
+        if history["done_purchaseline_ids"]:
+            last_purchase_lines = last_purchase_lines.browse(
+                [ids[0] for ids in history["done_purchaseline_ids"].values()]
+            )
+        last_purchases = {line.product_id.id: line for line in last_purchase_lines}
+        for orderpoint in self:
+            product_id = orderpoint.product_id.id
+            for field_name in HISTORY_QUERIES:
+                orderpoint[field_name] = [
+                    (6, 0, history[field_name].get(product_id, []))
+                ]
+            orderpoint.open_production_qty = summary["production_ids"].get(
+                product_id, 0.0
+            )
+            orderpoint.pending_customer_qty = summary["transfers_to_customer_ids"].get(
+                product_id, 0.0
+            )
+            last_purchase = last_purchases.get(product_id)
+            orderpoint.last_purchase_price = (
+                last_purchase.price_unit if last_purchase else 0.0
+            )
+            orderpoint.last_purchase_currency_id = (
+                last_purchase.currency_id if last_purchase else False
+            )
+            orderpoint.last_purchase_date = (
+                last_purchase.date_order if last_purchase else False
             )
@@ -1,5 +1,9 @@
+import logging
+
 from odoo import api, fields, models
 
+_logger = logging.getLogger(__name__)
+
 
 class StockQuant(models.Model):
     _inherit = "stock.quant"
@@ -11,6 +15,28 @@ class StockQuant(models.Model):
         store=True,
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        quants = super().create(vals_list)
+        self.env["product.product"]._invalidate_website_stock_cache(
+            quants.product_id.ids
+        )
+        return quants
+
+    def write(self, vals):
+        if {"product_id", "location_id", "quantity", "reserved_quantity"} & set(vals):
+            product_ids = self.product_id.ids
+            res = super().write(vals)
+            self.env["product.product"]._invalidate_website_stock_cache(
+                product_ids + self.product_id.ids
+            )
+            return res
+        return super().write(vals)
+
+    def unlink(self):
+        self.env["product.product"]._invalidate_website_stock_cache(self.product_id.ids)
+        return super().unlink()
+
     def action_show_reserved_moves(self):
         action = self.env.ref("altinkaya_stock.stock_move_line_action").read()[0]
         action["domain"] = [
@@ -24,3 +50,123 @@ class StockQuant(models.Model):
         if removal_strategy == "priorityfifo":
             return "priority, in_date ASC NULLS FIRST, id"
         return super(StockQuant, self)._get_removal_strategy_order(removal_strategy)
+
+    @api.model
+    def _reconcile_reserved_quantities(self, product_ids=None, dry_run=False):
+        """
+        Set the reserved quantity of every quant to the quantity reserved by
+        the move lines sharing its product, location, lot, package and owner.
+        Quants of locations bypassing the reservation get no reservation.
+        Expected quantities are computed with one grouped query and the
+        corrections are written with one bulk update.
+        See:
+        https://gist.github.com/amoyaux/279aee13eaddacbddb435dafbc0a6295
+        :param product_ids: restrict to these product ids, all products if None
+        :param dry_run: only compute the differences, do not update quants
+        :return: list of dicts (quant_id, product_id, location_id,
+            reserved_quantity, expected_quantity) of the fixed quants
+        """
+        digits = self.env["decimal.precision"].precision_get("Product Unit of Measure")
+        self.env["stock.move.line"].flush_model(
+            [
+                "product_id",
+                "location_id",
+                "lot_id",
+                "package_id",
+                "owner_id",
+                "reserved_qty",
+            ]
+        )
+        self.flush_model(
+            [
+                "product_id",
+                "location_id",
+                "lot_id",
+                "package_id",
+                "owner_id",
+                "reserved_quantity",
+            ]
+        )
+        move_line_clause = quant_clause = ""
+        if product_ids:
+            move_line_clause = "AND product_id = ANY(%(product_ids)s)"
+            quant_clause = "AND q.product_id = ANY(%(product_ids)s)"
+        # should_bypass_reservation() of stock.location, in SQL
+        self.env.cr.execute(
+            """
+            WITH reserved AS (
+                SELECT product_id, location_id, lot_id, package_id, owner_id,
+                       SUM(reserved_qty) AS quantity
+                  FROM stock_move_line
+                 WHERE reserved_qty != 0
+                   {move_line_clause}
+              GROUP BY product_id, location_id, lot_id, package_id, owner_id
+            ), expected AS (
+                SELECT q.id, q.product_id, q.location_id, q.reserved_quantity,
+                       CASE WHEN loc.usage IN
+                                ('supplier', 'customer', 'inventory', 'production')
+                              OR loc.scrap_location
+                              OR (loc.usage = 'transit' AND loc.company_id IS NULL)
+                            THEN 0.0
+                            ELSE COALESCE(r.quantity, 0.0)
+                       END AS expected_quantity
+                  FROM stock_quant q
+                  JOIN stock_location loc ON loc.id = q.location_id
+             LEFT JOIN reserved r
+                    ON r.product_id = q.product_id
+                   AND r.location_id = q.location_id
+                   AND r.lot_id IS NOT DISTINCT FROM q.lot_id
+                   AND r.package_id IS NOT DISTINCT FROM q.package_id
+                   AND r.owner_id IS NOT DISTINCT FROM q.owner_id
+                 WHERE TRUE {quant_clause}
+            )
+            SELECT id, product_id, location_id, reserved_quantity, expected_quantity
+              FROM expected
+             WHERE ROUND(reserved_quantity::numeric, %(digits)s)
+                   != ROUND(expected_quantity::numeric, %(digits)s)
+            """.format(
+                move_line_clause=move_line_clause, quant_clause=quant_clause
+            ),
+            {"product_ids": list(product_ids or []), "digits": digits},
+        )
+        diff = self.env.cr.dictfetchall()
+        for row in diff:
+            row["quant_id"] = row.pop("id")
+        if diff and not dry_run:
+            self.env.cr.execute(
+                """
+                UPDATE stock_quant q
+                   SET reserved_quantity = fix.quantity
+                  FROM unnest(%s::int[], %s::numeric[]) AS fix(id, quantity)
+                 WHERE q.id = fix.id
+                """,
+                (
+                    [row["quant_id"] for row in diff],
+                    [row["expected_quantity"] for row in diff],
+                ),
+            )
+            self.invalidate_model(["reserved_quantity"])
+            self.env["product.product"]._invalidate_website_stock_cache(
+                [row["product_id"] for row in diff]
+            )
+            _logger.info("Reserved quantity of %s quants is fixed.", len(diff))
+        return diff
+
+    @api.model
+    def _reconcile_reserved_quantities_delayed(self, chunk_size=1000):
+        """
+        Split the reservation reconciliation into jobs of chunk_size products.
+        :return: number of enqueued jobs
+        """
+        self.flush_model(["product_id"])
+        self.env.cr.execute("SELECT DISTINCT product_id FROM stock_quant ORDER BY 1")
+        product_ids = [row[0] for row in self.env.cr.fetchall()]
+        chunks = [
+            product_ids[i : i + chunk_size]
+            for i in range(0, len(product_ids), chunk_size)
+        ]
+        for chunk in chunks:
+            self.with_delay(
+                description="Reconcile reserved quantities of %s products" % len(chunk)
+            )._reconcile_reserved_quantities(chunk)
+        return len(chunks)
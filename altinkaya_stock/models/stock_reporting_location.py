@@ -0,0 +1,93 @@
+from odoo import api, fields, models, tools
+
+# Locations of the qty_*_<code> fields of product.product, created on install.
+DEFAULT_REPORTING_LOCATIONS = [
+    ("sincan", "Sincan Depo", 21),
+    ("merkez", "Merkez Depo", 12),
+    ("enjek", "Enjeksiyon Depo", 29),
+    ("montaj", "Montaj Depo", 53),
+    ("cnc", "CNC Depo", 61),
+    ("metal", "Metal Depo", 37),
+    ("boya", "Boya Depo", 45),
+    ("maske", "Maske Depo", 114),
+    ("baski", "Baski Depo", 77),
+    ("torna", "Torna Depo", 5895),
+    ("kaplama", "Kaplama Depo", 6362),
+]
+
+
+class StockReportingLocation(models.Model):
+    _name = "stock.reporting.location"
+    _description = "Stock Reporting Location"
+    _order = "sequence, id"
+
+    name = fields.Char(string="Name", required=True)
+    code = fields.Char(
+        string="Code",
+        required=True,
+        help="Suffix of the product quantity fields computed for this location, "
+        "e.g. 'merkez' for qty_available_merkez.",
+    )
+    location_id = fields.Many2one(
+        comodel_name="stock.location",
+        string="Location",
+        required=True,
+        ondelete="cascade",
+        help="Quantities are computed for this location and its children.",
+    )
+    sequence = fields.Integer(default=10)
+
+    _sql_constraints = [
+        ("code_uniq", "unique(code)", "The reporting location code must be unique!"),
+    ]
+
+    @api.model
+    @tools.ormcache()
+    def _get_location_map(self):
+        """
+        :return: {code: stock.location id}
+        """
+        self.flush_model(["code", "location_id", "sequence"])
+        self.env.cr.execute(
+            "SELECT code, location_id FROM stock_reporting_location ORDER BY sequence"
+        )
+        return dict(self.env.cr.fetchall())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        self.clear_caches()
+        return super().unlink()
+
+    @api.model
+    def _create_default_locations(self):
+        existing_codes = self._get_location_map()
+        location_ids = set(
+            self.env["stock.location"]
+            .with_context(active_test=False)
+            .search([("id", "in", [loc[2] for loc in DEFAULT_REPORTING_LOCATIONS])])
+            .ids
+        )
+        self.create(
+            [
+                {
+                    "code": code,
+                    "name": name,
+                    "location_id": location_id,
+                    "sequence": sequence,
+                }
+                for sequence, (code, name, location_id) in enumerate(
+                    DEFAULT_REPORTING_LOCATIONS
+                )
+                if code not in existing_codes and location_id in location_ids
+            ]
+        )
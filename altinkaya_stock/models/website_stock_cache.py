@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class WebsiteStockCache:
+    """
+    Bounded LRU cache of per-location product quantities shown on the
+    website. Entries expire after ttl seconds and are dropped per product
+    whenever its quants or reservations change in this process. Other
+    processes are not signalled, the ttl bounds how long they may serve a
+    stale value.
+    """
+
+    def __init__(self, max_size=100000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._product_keys = {}
+        self._lock = threading.RLock()
+
+    def get_many(self, keys):
+        """
+        :param keys: iterable of (product_id, location_id, company_ids)
+        :return: {key: value} of the keys found in the cache
+        """
+        now = time.monotonic()
+        res = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry and entry[0] > now:
+                    self._data.move_to_end(key)
+                    res[key] = entry[1]
+                    self.hits += 1
+                else:
+                    if entry:
+                        self._pop(key)
+                    self.misses += 1
+        return res
+
+    def set_many(self, values):
+        """
+        :param values: {(product_id, location_id, company_ids): value}
+        """
+        expiry = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in values.items():
+                self._data[key] = (expiry, value)
+                self._data.move_to_end(key)
+                self._product_keys.setdefault(key[0], set()).add(key)
+            while len(self._data) > self.max_size:
+                self._pop(next(iter(self._data)))
+
+    def invalidate(self, product_ids):
+        with self._lock:
+            for product_id in product_ids:
+                for key in self._product_keys.pop(product_id, ()):
+                    if self._data.pop(key, None):
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._product_keys.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+    def _pop(self, key):
+        self._data.pop(key, None)
+        keys = self._product_keys.get(key[0])
+        if keys:
+            keys.discard(key)
+            if not keys:
+                del self._product_keys[key[0]]
+
+
+# One cache per database
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(dbname, max_size=100000, ttl=60):
+    with _caches_lock:
+        cache = _caches.get(dbname)
+        if cache is None:
+            cache = _caches[dbname] = WebsiteStockCache(max_size, ttl)
+        cache.max_size = max_size
+        cache.ttl = ttl
+        return cache
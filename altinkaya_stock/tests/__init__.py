@@ -0,0 +1,6 @@
+from . import test_product_location_qty
+from . import test_stock_quant_reservation
+from . import test_kit_availability
+from . import test_website_stock_cache
+from . import test_stock_move_chain
+from . import test_stock_orderpoint
@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+from odoo.tests import common
+
+
+class TestKitAvailability(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Product = cls.env["product.product"]
+        cls.location = cls.env.ref("stock.stock_location_stock")
+        cls.kit = Product.create({"name": "Test Set", "type": "consu"})
+        cls.component_1 = Product.create({"name": "Component 1", "type": "product"})
+        cls.component_2 = Product.create({"name": "Component 2", "type": "product"})
+        cls.bom = cls.env["mrp.bom"].create(
+            {
+                "product_tmpl_id": cls.kit.product_tmpl_id.id,
+                "product_id": cls.kit.id,
+                "type": "phantom",
+                "bom_line_ids": [
+                    (0, 0, {"product_id": cls.component_1.id, "product_qty": 2.0}),
+                    (0, 0, {"product_id": cls.component_2.id, "product_qty": 1.0}),
+                ],
+            }
+        )
+        Quant = cls.env["stock.quant"]
+        Quant._update_available_quantity(cls.component_1, cls.location, 10.0)
+        Quant._update_available_quantity(cls.component_2, cls.location, 3.0)
+
+    def test_kit_availability(self):
+        products = self.kit | self.component_1
+        availability = products._get_kit_availability([self.location.id])
+        self.assertEqual(availability[self.kit.id][self.location.id], 3.0)
+        self.assertEqual(availability[self.component_1.id][self.location.id], 10.0)
+        self.assertEqual(
+            self.kit.with_context(location=self.location.id)._compute_set_quantities(),
+            3.0,
+        )
+
+    def test_kit_components_invalidation(self):
+        MrpBom = self.env["mrp.bom"]
+        self.assertEqual(
+            dict(MrpBom._get_kit_components(self.kit.id)),
+            {self.component_1.id: 2.0, self.component_2.id: 1.0},
+        )
+        self.bom.bom_line_ids[0].product_qty = 4.0
+        self.assertEqual(
+            dict(MrpBom._get_kit_components(self.kit.id))[self.component_1.id], 4.0
+        )
+        availability = self.kit._get_kit_availability([self.location.id])
+        self.assertEqual(availability[self.kit.id][self.location.id], 2.5)
+
+    def test_kit_cache_cleared_on_kit_changes_only(self):
+        MrpBom = self.env["mrp.bom"]
+        normal_bom = MrpBom.create(
+            {
+                "product_tmpl_id": self.component_1.product_tmpl_id.id,
+                "bom_line_ids": [(0, 0, {"product_id": self.component_2.id})],
+            }
+        )
+        with patch.object(type(MrpBom), "clear_caches") as clear_caches:
+            normal_bom.bom_line_ids.product_qty = 2.0
+            self.bom.code = "SET"
+            clear_caches.assert_not_called()
+            self.bom.bom_line_ids[1].product_qty = 2.0
+            clear_caches.assert_called()
@@ -0,0 +1,94 @@
+from odoo.tests import common
+
+
+class TestProductLocationQty(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Product = cls.env["product.product"]
+        cls.Quant = cls.env["stock.quant"]
+        stock_location = cls.env.ref("stock.stock_location_stock")
+        cls.location = cls.env["stock.location"].create(
+            {"name": "Test Depo", "location_id": stock_location.id}
+        )
+        cls.sublocation = cls.env["stock.location"].create(
+            {"name": "Test Raf", "location_id": cls.location.id}
+        )
+        cls.products = cls.Product.create(
+            [{"name": "Test Product %s" % i, "type": "product"} for i in range(4)]
+        )
+        cls.Quant._update_available_quantity(cls.products[0], cls.location, 10.0)
+        cls.Quant._update_available_quantity(cls.products[1], cls.sublocation, 5.0)
+        cls.Quant._update_available_quantity(cls.products[2], cls.location, 3.0)
+        cls.Quant._update_available_quantity(cls.products[2], cls.sublocation, -3.0)
+
+    def test_search_location_qty(self):
+        for operator in ("=", "!=", "<", "<=", ">", ">="):
+            for value in (-1.0, 0.0, 5.0, 10.0):
+                expected = self.Product.browse(
+                    self.Product.with_context(
+                        location=self.location.id
+                    )._search_qty_available(operator, value)[0][2]
+                )
+                domain = self.Product._search_location_qty(
+                    self.location.id, operator, value
+                )
+                self.assertEqual(
+                    self.Product.search(domain),
+                    self.Product.search([("id", "in", expected.ids)]),
+                    "Mismatch for qty %s %s" % (operator, value),
+                )
+
+    def test_location_quantities(self):
+        quantities = self.products._get_location_quantities([self.location.id])
+        for product in self.products:
+            self.assertEqual(
+                quantities[product.id][self.location.id]["qty_available"],
+                product.with_context(location=self.location.id).qty_available,
+            )
+
+    def test_descendant_ids(self):
+        Location = self.env["stock.location"]
+        self.assertEqual(
+            set(Location._get_descendant_ids(self.location.id)),
+            {self.location.id, self.sublocation.id},
+        )
+        new_location = Location.create(
+            {"name": "Test Raf 2", "location_id": self.sublocation.id}
+        )
+        self.assertIn(new_location.id, Location._get_descendant_ids(self.location.id))
+        new_location.location_id = self.env.ref("stock.stock_location_stock")
+        self.assertNotIn(
+            new_location.id, Location._get_descendant_ids(self.location.id)
+        )
+
+    def test_reporting_location_fields(self):
+        ReportingLocation = self.env["stock.reporting.location"]
+        ReportingLocation.search([("code", "=", "merkez")]).unlink()
+        ReportingLocation.create(
+            {"name": "Merkez", "code": "merkez", "location_id": self.location.id}
+        )
+        self.assertEqual(self.products[0].qty_available_merkez, 10.0)
+        self.assertEqual(self.products[1].qty_unreserved_merkez, 5.0)
+        self.assertEqual(
+            self.Product.search(
+                [("id", "in", self.products.ids), ("qty_available_merkez", ">", 0)]
+            ),
+            self.products[:2],
+        )
+
+    def test_reporting_location_codes(self):
+        ReportingLocation = self.env["stock.reporting.location"]
+        ReportingLocation.search([("code", "=", "cnc")]).unlink()
+        self.assertIn(
+            "cnc", self.Product._get_reporting_codes("_compute_custom2_available")
+        )
+        self.assertEqual(self.products[0].qty_available_cnc, 0.0)
+        ReportingLocation.create(
+            {"name": "CNC", "code": "cnc", "location_id": self.location.id}
+        )
+        self.products.invalidate_recordset(["qty_available_cnc"])
+        self.assertEqual(self.products[0].qty_available_cnc, 10.0)
+        self.assertNotIn(
+            "merkez", self.Product._get_reporting_codes("_compute_custom2_available")
+        )
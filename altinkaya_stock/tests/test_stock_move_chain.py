@@ -0,0 +1,137 @@
+import logging
+import time
+
+from odoo.tests import common
+
+_logger = logging.getLogger(__name__)
+
+
+class TestStockMoveChain(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        product = cls.env["product.product"].create(
+            {"name": "Test Product", "type": "product"}
+        )
+        stock_location = cls.env.ref("stock.stock_location_stock")
+        customer_location = cls.env.ref("stock.stock_location_customers")
+        # Synthetic 10 level MTO chain: every move is fed by the next one
+        cls.chain = cls.env["stock.move"]
+        for level in range(10):
+            cls.chain |= cls.env["stock.move"].create(
+                {
+                    "name": "Level %s" % level,
+                    "product_id": product.id,
+                    "product_uom": product.uom_id.id,
+                    "product_uom_qty": 1.0,
+                    "location_id": stock_location.id,
+                    "location_dest_id": customer_location.id,
+                    "move_dest_ids": [(6, 0, cls.chain[-1:].ids)],
+                }
+            )
+        # Chain through a manufacturing order: customer move, finished move,
+        # raw material moves and the moves feeding them
+        component = cls.env["product.product"].create(
+            {"name": "Test Component", "type": "product"}
+        )
+        finished = cls.env["product.product"].create(
+            {"name": "Test Finished", "type": "product"}
+        )
+        bom = cls.env["mrp.bom"].create(
+            {
+                "product_tmpl_id": finished.product_tmpl_id.id,
+                "bom_line_ids": [
+                    (0, 0, {"product_id": component.id, "product_qty": 2.0})
+                ],
+            }
+        )
+        cls.production = cls.env["mrp.production"].create(
+            {
+                "product_id": finished.id,
+                "product_qty": 1.0,
+                "product_uom_id": finished.uom_id.id,
+                "bom_id": bom.id,
+            }
+        )
+        cls.production.action_confirm()
+        cls.customer_move = cls.env["stock.move"].create(
+            {
+                "name": "Deliver Finished",
+                "product_id": finished.id,
+                "product_uom": finished.uom_id.id,
+                "product_uom_qty": 1.0,
+                "location_id": stock_location.id,
+                "location_dest_id": customer_location.id,
+                "move_orig_ids": [(6, 0, cls.production.move_finished_ids.ids)],
+            }
+        )
+        cls.feeding_move = cls.env["stock.move"].create(
+            {
+                "name": "Feed Component",
+                "product_id": component.id,
+                "product_uom": component.uom_id.id,
+                "product_uom_qty": 2.0,
+                "location_id": cls.env.ref("stock.stock_location_suppliers").id,
+                "location_dest_id": stock_location.id,
+                "move_dest_ids": [(6, 0, cls.production.move_raw_ids.ids)],
+            }
+        )
+        cls.production_chain = (
+            cls.customer_move
+            | cls.production.move_finished_ids
+            | cls.production.move_raw_ids
+            | cls.feeding_move
+        )
+
+    def _find_orig_move_ids_python(self, moves):
+        orig_moves = moves
+        for move in moves:
+            if move.move_orig_ids:
+                orig_moves |= self._find_orig_move_ids_python(move.move_orig_ids)
+            if move.production_id.move_raw_ids:
+                orig_moves |= self._find_orig_move_ids_python(
+                    move.production_id.move_raw_ids
+                )
+        return orig_moves
+
+    def test_find_orig_move_ids(self):
+        StockMove = self.env["stock.move"]
+        start = time.perf_counter()
+        expected = self._find_orig_move_ids_python(self.chain[0])
+        python_time = time.perf_counter() - start
+        self.env.invalidate_all()
+        start = time.perf_counter()
+        result = StockMove.find_orig_move_ids(self.chain[0])
+        sql_time = time.perf_counter() - start
+        _logger.info(
+            "10 level move chain: recursive walk %.4fs, recursive query %.4fs",
+            python_time,
+            sql_time,
+        )
+        self.assertEqual(result, expected)
+        self.assertEqual(result, self.chain)
+        self.assertEqual(StockMove.find_orig_move_ids(self.chain[5]), self.chain[5:])
+
+    def test_find_orig_move_ids_production(self):
+        StockMove = self.env["stock.move"]
+        expected = self._find_orig_move_ids_python(self.customer_move)
+        self.env.invalidate_all()
+        result = StockMove.find_orig_move_ids(self.customer_move)
+        self.assertEqual(result, expected)
+        self.assertEqual(result, self.production_chain)
+        self.assertEqual(
+            StockMove.find_orig_move_ids(self.production.move_raw_ids),
+            self.production.move_raw_ids | self.feeding_move,
+        )
+
+    def test_cancel_move_origs_production(self):
+        (self.customer_move | self.feeding_move)._action_confirm(merge=False)
+        self.env["stock.move"].cancel_move_origs(self.customer_move)
+        self.assertEqual(self.production.state, "cancel")
+        self.assertEqual(set(self.production_chain.mapped("state")), {"cancel"})
+
+    def test_cancel_move_origs(self):
+        self.chain._action_confirm(merge=False)
+        self.env["stock.move"].cancel_move_origs(self.chain[3])
+        self.assertEqual(set(self.chain[3:].mapped("state")), {"cancel"})
+        self.assertNotIn("cancel", self.chain[:3].mapped("state"))
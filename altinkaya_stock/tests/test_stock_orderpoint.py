@@ -0,0 +1,71 @@
+from odoo.tests import common
+
+
+class TestStockOrderpoint(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.other_company = cls.env["res.company"].create({"name": "Other Company"})
+        cls.product = cls.env["product.product"].create(
+            {"name": "Orderpoint Product", "type": "product"}
+        )
+        cls.warehouse = cls.env["stock.warehouse"].search(
+            [("company_id", "=", cls.company.id)], limit=1
+        )
+        cls.orderpoint = cls.env["stock.warehouse.orderpoint"].create(
+            {
+                "product_id": cls.product.id,
+                "warehouse_id": cls.warehouse.id,
+                "location_id": cls.warehouse.lot_stock_id.id,
+            }
+        )
+        cls.productions = cls._create_production(cls.company, 3.0)
+        cls.productions |= cls._create_production(cls.company, 4.0)
+        cls.other_production = cls._create_production(cls.other_company, 5.0)
+        cls.user = cls.env["res.users"].create(
+            {
+                "name": "Orderpoint User",
+                "login": "orderpoint_user",
+                "company_id": cls.company.id,
+                "company_ids": [(6, 0, cls.company.ids)],
+                "groups_id": [
+                    (
+                        6,
+                        0,
+                        [
+                            cls.env.ref("stock.group_stock_user").id,
+                            cls.env.ref("mrp.group_mrp_user").id,
+                        ],
+                    )
+                ],
+            }
+        )
+
+    @classmethod
+    def _create_production(cls, company, quantity):
+        return (
+            cls.env["mrp.production"]
+            .with_company(company)
+            .create(
+                {
+                    "product_id": cls.product.id,
+                    "product_qty": quantity,
+                    "product_uom_id": cls.product.uom_id.id,
+                    "company_id": company.id,
+                }
+            )
+        )
+
+    def test_history_companies(self):
+        orderpoint = self.orderpoint.with_user(self.user)
+        self.assertEqual(orderpoint.production_ids, self.productions)
+        self.assertEqual(orderpoint.open_production_qty, 7.0)
+        # The user has no access to the purchases
+        self.assertFalse(orderpoint.done_purchaseline_ids)
+        self.assertFalse(orderpoint.last_purchase_price)
+        self.orderpoint.invalidate_recordset()
+        self.assertEqual(
+            self.orderpoint.production_ids,
+            self.productions | self.other_production,
+        )
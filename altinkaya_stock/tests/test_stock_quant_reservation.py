@@ -0,0 +1,44 @@
+from odoo.tests import common
+
+
+class TestStockQuantReservation(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Quant = cls.env["stock.quant"]
+        cls.stock_location = cls.env.ref("stock.stock_location_stock")
+        cls.customer_location = cls.env.ref("stock.stock_location_customers")
+        cls.product = cls.env["product.product"].create(
+            {"name": "Test Product", "type": "product"}
+        )
+        cls.Quant._update_available_quantity(cls.product, cls.stock_location, 10.0)
+        cls.move = cls.env["stock.move"].create(
+            {
+                "name": "Test Move",
+                "product_id": cls.product.id,
+                "product_uom": cls.product.uom_id.id,
+                "product_uom_qty": 4.0,
+                "location_id": cls.stock_location.id,
+                "location_dest_id": cls.customer_location.id,
+            }
+        )
+        cls.move._action_confirm()
+        cls.move._action_assign()
+        cls.quant = cls.Quant.search(
+            [
+                ("product_id", "=", cls.product.id),
+                ("location_id", "=", cls.stock_location.id),
+            ]
+        )
+
+    def test_reconcile_reserved_quantities(self):
+        self.assertEqual(self.quant.reserved_quantity, 4.0)
+        self.assertFalse(self.Quant._reconcile_reserved_quantities(self.product.ids))
+        self.quant.sudo().write({"reserved_quantity": 7.0})
+        diff = self.Quant._reconcile_reserved_quantities(self.product.ids, dry_run=True)
+        self.assertEqual(len(diff), 1)
+        self.assertEqual(diff[0]["quant_id"], self.quant.id)
+        self.assertEqual(diff[0]["expected_quantity"], 4.0)
+        self.assertEqual(self.quant.reserved_quantity, 7.0)
+        self.Quant._reconcile_reserved_quantities(self.product.ids)
+        self.assertEqual(self.quant.reserved_quantity, 4.0)
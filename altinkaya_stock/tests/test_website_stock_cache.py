@@ -0,0 +1,69 @@
+from odoo.tests import common
+
+
+class TestWebsiteStockCache(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.location = cls.env.ref("stock.stock_location_stock")
+        ReportingLocation = cls.env["stock.reporting.location"]
+        ReportingLocation.search([("code", "in", ("sincan", "merkez"))]).unlink()
+        ReportingLocation.create(
+            {"name": "Merkez", "code": "merkez", "location_id": cls.location.id}
+        )
+        cls.products = cls.env["product.product"].create(
+            [{"name": "Test Product %s" % i, "type": "product"} for i in range(2)]
+        )
+        cls.env["stock.quant"]._update_available_quantity(
+            cls.products[0], cls.location, 5.0
+        )
+
+    def test_get_quantity_website_multi(self):
+        Product = self.env["product.product"]
+        Product._get_website_stock_cache().clear()
+        data = self.products.get_quantity_website_multi()
+        self.assertEqual(data[self.products[0].id]["qty_unreserved_merkez"], 5.0)
+        self.assertEqual(data[self.products[1].id]["qty_unreserved_merkez"], 0.0)
+        self.assertEqual(data[self.products[0].id]["qty_unreserved_sincan"], 0.0)
+
+        stats = Product.get_website_stock_cache_stats()
+        self.assertEqual(
+            self.products[0].get_quantity_website(), data[self.products[0].id]
+        )
+        self.assertEqual(
+            Product.get_website_stock_cache_stats()["hits"], stats["hits"] + 1
+        )
+
+        self.env["stock.quant"]._update_available_quantity(
+            self.products[0], self.location, 2.0
+        )
+        self.assertEqual(
+            self.products[0].get_quantity_website()["qty_unreserved_merkez"], 7.0
+        )
+
+    def test_cache_key_per_companies(self):
+        Product = self.env["product.product"]
+        Product._get_website_stock_cache().clear()
+        company = self.env["res.company"].create({"name": "Other Company"})
+        self.assertEqual(
+            self.products[0].get_quantity_website()["qty_unreserved_merkez"], 5.0
+        )
+        other_product = self.products[0].with_context(allowed_company_ids=company.ids)
+        self.assertEqual(
+            other_product.get_quantity_website()["qty_unreserved_merkez"], 0.0
+        )
+
+    def test_invalidated_on_rollback(self):
+        Product = self.env["product.product"]
+        Product._get_website_stock_cache().clear()
+        self.addCleanup(self.env.cr.postcommit.clear)
+        self.env["stock.quant"]._update_available_quantity(
+            self.products[0], self.location, 2.0
+        )
+        # Cached from the stock of the transaction
+        self.assertEqual(
+            self.products[0].get_quantity_website()["qty_unreserved_merkez"], 7.0
+        )
+        self.assertTrue(Product.get_website_stock_cache_stats()["size"])
+        self.env.cr.postrollback.run()
+        self.assertFalse(Product.get_website_stock_cache_stats()["size"])
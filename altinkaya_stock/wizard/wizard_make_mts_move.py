@@ -16,27 +16,12 @@ class MakeMtsMove(models.TransientModel):
 
     move_id = fields.Many2one('stock.move','Move', readonly=True)
 
-    def find_orig_move_ids(self,moves):
-        orig_moves = moves
-        for move in moves:
-            if move.move_orig_ids:
-                orig_moves |= self.find_orig_move_ids(move.move_orig_ids)
-            if move.production_id.move_raw_ids:
-                orig_moves |= self.find_orig_move_ids(move.production_id.move_raw_ids)
-        return orig_moves
+    def find_orig_move_ids(self, moves):
+        return self.env['stock.move'].find_orig_move_ids(moves)
 
     def cancel_move_origs(self, move_id):
-        moves_with_origs = self.find_orig_move_ids(move_id)
-        moves_with_origs = moves_with_origs.filtered(lambda m: m.state not in ['done', 'cancel'])
+        self.env['stock.move'].cancel_move_origs(move_id)
 
-        moves_no_production = moves_with_origs.filtered(lambda m: not m.production_id)
-        productions = moves_with_origs.mapped('production_id')
-        productions = productions.filtered(lambda p: p.state not in ['progress', 'done', 'cancel'])
-        for production in productions:
-            production.action_cancel()
-        moves_no_production._action_cancel()
-
-    
     def action_confirm(self):
         self.ensure_one()
         propagate = self.move_id.propagate
@@ -1,8 +1,6 @@
 # Copyright 2022 Yiğit Budak (https://github.com/yibudak)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
-from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError, UserError
-from odoo.tools import float_compare, float_is_zero
+from odoo import models, fields, _
 
 
 class UpdateUnreservedQuants(models.TransientModel):
@@ -12,49 +10,36 @@ class UpdateUnreservedQuants(models.TransientModel):
     https://gist.github.com/ryanc-me/632fd59639a8a68e041c876abe87168f
     """
 
-    _name = 'update.unreserved.quants'
-    _description = 'Update Unreserved Quants'
+    _name = "update.unreserved.quants"
+    _description = "Update Unreserved Quants"
+
+    use_jobs = fields.Boolean(
+        string="Run in Background",
+        help="Split the products into background jobs running in parallel.",
+    )
+    chunk_size = fields.Integer(string="Products per Job", default=1000)
 
-    
     def action_update_unreserved_quants(self):
         """
         Fix unreserved quants.
         """
-        decimal_places = self.env['decimal.precision'].precision_get('Product Unit of Measure')
-
-        self.env.cr.execute("""
-            SELECT product_id, location_id, owner_id, lot_id, package_id, reserved_quantity, id
-            FROM stock_quant
-        """)
-        quant_keys = ['reserved_quantity', 'id']
-        quants = self.env.cr.dictfetchall()
-
-        self.env.cr.execute("""
-            SELECT id, usage, scrap_location from stock_location
-        """)
-        locations = {loc['id']: {'usage': loc['usage'], 'scrap_location': loc['scrap_location']} for loc in
-                     self.env.cr.dictfetchall()}
-        for quant in self.web_progress_iter(quants, msg="Quantlar düzeltiliyor..."):
-            quant = {k: v for k, v in quant.items() if v is not None}
-            location = locations[quant['location_id']]
-            ml_query = f"""
-                SELECT product_qty from stock_move_line
-                 WHERE {' AND '.join("%s = %s" % (k, v) for k, v in quant.items() if k not in quant_keys)}
-                    AND product_qty > 0
-            """
-            self.env.cr.execute(ml_query)
-            move_lines = self.env.cr.dictfetchall()
-            if move_lines:
-                ml_qty = sum(ml['product_qty'] for ml in move_lines)
-
-                if location.get('usage') in ('supplier', 'customer', 'inventory', 'production') or\
-                        location.get('scrap_location'):
-                    if not float_is_zero(quant['reserved_quantity'], precision_digits=decimal_places):
-                        self.env.cr.execute(f"UPDATE stock_quant SET reserved_quantity = 0.0 where id = {quant['id']}")
-
-                else:
-                    if float_compare(quant['reserved_quantity'], ml_qty, precision_digits=decimal_places) != 0:
-                        self.env.cr.execute(f"UPDATE stock_quant SET reserved_quantity = {ml_qty}"
-                                            f"where id = {quant['id']}")
-
-        self.env.cr.commit()
+        self.ensure_one()
+        StockQuant = self.env["stock.quant"]
+        if self.use_jobs:
+            job_count = StockQuant._reconcile_reserved_quantities_delayed(
+                chunk_size=self.chunk_size or 1000
+            )
+            message = _("%s jobs are enqueued.") % job_count
+        else:
+            diff = StockQuant._reconcile_reserved_quantities()
+            message = _("Reserved quantity of %s quants is fixed.") % len(diff)
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Update Quant Reservations"),
+                "message": message,
+                "sticky": False,
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
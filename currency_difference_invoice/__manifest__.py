@@ -13,8 +13,15 @@
     "category": "Accounting",
     "version": "0.1",
     "license": "LGPL-3",
-    "depends": ["base", "account", "change_partner_accounts"],
+    "depends": [
+        "base",
+        "account",
+        "change_partner_accounts",
+        "currency_rate_turkey",
+        "queue_job",
+    ],
     "data": [
+        "security/ir.model.access.csv",
         "views/res_partner_view.xml",
         "views/res_company_view.xml",
         "views/account_move_view.xml",
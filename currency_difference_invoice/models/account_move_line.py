@@ -110,18 +110,31 @@ class AccountMoveLine(models.Model):
         maxdate = date.min
         to_balance = {}
         cash_basis_partial = self.env["account.partial.reconcile"]
+        # Convert in currency if we only have one currency and no amount_currency
+        to_convert = currency and amls.filtered(lambda l: not l.amount_currency)
+        if to_convert:
+            multiple_currency = True
+            total_amount_currency += sum(
+                self.env["res.currency"]._convert_bulk(
+                    [
+                        (
+                            aml.balance,
+                            aml.company_id.currency_id,
+                            currency,
+                            aml.company_id,
+                            aml.date,
+                            False,
+                        )
+                        for aml in to_convert
+                    ]
+                )
+            )
         for aml in amls:
             cash_basis_partial |= aml.move_id.tax_cash_basis_rec_id
             total_debit += aml.debit
             total_credit += aml.credit
             maxdate = max(aml.date, maxdate)
             total_amount_currency += aml.amount_currency
-            # Convert in currency if we only have one currency and no amount_currency
-            if not aml.amount_currency and currency:
-                multiple_currency = True
-                total_amount_currency += aml.company_id.currency_id._convert(
-                    aml.balance, currency, aml.company_id, aml.date
-                )
             # If we still have residual value, it means that this move might need to be balanced using an exchange rate entry
             if aml.amount_residual != 0 or aml.amount_residual_currency != 0:
                 if not to_balance.get(aml.currency_id):
@@ -1,16 +1,106 @@
 # -*- coding: utf-8 -*-
 import logging
+from collections import defaultdict
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 from odoo.tools import float_is_zero
 
 _logger = logging.getLogger(__name__)
 
+DIFFERENCE_TAX_RATES = (20, 10, 18, 8)
+
+# Foreign currency receivable and payable balances of the partners by
+# company, account and currency, company currency amounts rounded per move
+CURRENCY_VALUATION_QUERY = """
+    SELECT company_id, account_id, partner_id, currency_id,
+           SUM(balance) AS old_balance,
+           SUM(amount_currency) AS amount_currency
+      FROM (
+        SELECT l.company_id, l.account_id, l.partner_id, l.currency_id,
+               ROUND(SUM(l.balance), 2) AS balance,
+               ROUND(SUM(l.amount_currency), 4) AS amount_currency
+          FROM account_move_line l
+          JOIN account_account a ON a.id = l.account_id
+          JOIN res_company c ON c.id = l.company_id
+          JOIN res_partner p ON p.id = l.partner_id
+         WHERE l.date <= %(date)s
+           AND l.partner_id IN %(partner_ids)s
+           AND a.account_type IN ('asset_receivable', 'liability_payable')
+           AND l.currency_id != c.currency_id
+           AND p.country_id != %(country_id)s
+         GROUP BY l.company_id, l.move_id, l.account_id, l.partner_id,
+                  l.currency_id
+      ) moves
+     GROUP BY company_id, account_id, partner_id, currency_id
+     ORDER BY company_id, partner_id, account_id, currency_id
+"""
+
+# Last forex buying rate of each currency up to the valuation date, rates of
+# the company before the shared ones. Rates without a forex buying value are
+# skipped instead of being read as 1.0.
+CURRENCY_VALUATION_RATE_QUERY = """
+    SELECT DISTINCT ON (currency_id) currency_id, tcmb_forex_buying
+      FROM res_currency_rate
+     WHERE currency_id IN %(currency_ids)s
+       AND (company_id = %(company_id)s OR company_id IS NULL)
+       AND name <= %(date)s
+       AND tcmb_forex_buying IS NOT NULL
+       AND tcmb_forex_buying != 0
+     ORDER BY currency_id, company_id IS NULL, name DESC
+"""
+
+# Difference lines of the exchange journal with the untaxed amount, numbers
+# and tax amounts by rate of the invoices in the same full reconcile
+DIFFERENCE_LINES_QUERY = """
+    WITH diff AS (
+        SELECT l.id, l.partner_id, l.full_reconcile_id, l.debit, l.credit
+          FROM account_move_line l
+         WHERE l.partner_id IN %%(partner_ids)s
+           AND l.journal_id = %%(journal_id)s
+           AND l.full_reconcile_id IS NOT NULL
+           AND l.difference_checked IS NOT TRUE
+    ), invoices AS (
+        SELECT DISTINCT r.full_reconcile_id, m.id AS move_id,
+               %(invoice_number)s AS number, m.amount_untaxed
+          FROM account_move_line r
+          JOIN account_move m ON m.id = r.move_id
+         WHERE r.full_reconcile_id IN (SELECT full_reconcile_id FROM diff)
+           AND m.move_type != 'entry'
+    ), invoice_totals AS (
+        SELECT full_reconcile_id,
+               SUM(amount_untaxed) AS amount_untaxed,
+               string_agg(number, ', ' ORDER BY move_id) AS numbers
+          FROM invoices
+         GROUP BY full_reconcile_id
+    ), tax_totals AS (
+        SELECT i.full_reconcile_id, t.amount AS rate,
+               SUM(ABS(tl.amount_currency)) AS tax_amount
+          FROM invoices i
+          JOIN account_move_line tl ON tl.move_id = i.move_id
+          JOIN account_tax t ON t.id = tl.tax_line_id
+         WHERE t.amount IN %%(rates)s
+         GROUP BY i.full_reconcile_id, t.amount
+    )
+    SELECT diff.id, diff.partner_id, diff.debit, diff.credit,
+           it.amount_untaxed, it.numbers,
+           COALESCE(
+               json_object_agg(tt.rate, tt.tax_amount)
+                   FILTER (WHERE tt.rate IS NOT NULL),
+               '{}'
+           ) AS tax_amounts
+      FROM diff
+      LEFT JOIN invoice_totals it ON it.full_reconcile_id = diff.full_reconcile_id
+      LEFT JOIN tax_totals tt ON tt.full_reconcile_id = diff.full_reconcile_id
+     GROUP BY diff.id, diff.partner_id, diff.debit, diff.credit,
+              it.amount_untaxed, it.numbers
+     ORDER BY diff.partner_id, diff.id
+"""
+
 
 class ResPartner(models.Model):
     _inherit = "res.partner"
 
-    
     def _compute_currency_difference_amls(self):
         difference_aml_domain = [
             ("partner_id", "=", self.id),
@@ -25,7 +115,6 @@ class ResPartner(models.Model):
         else:
             self.currency_difference_amls = False
 
-    
     @api.depends("currency_difference_amls")
     def _compute_difference_to_invoice(self):
         for partner in self:
@@ -34,7 +123,6 @@ class ResPartner(models.Model):
             else:
                 partner.difference_to_invoice = False
 
-    
     def _value_search_diff_check(self, operator, value):
         AccountMoveLine = self.env["account.move.line"]
         domain = [
@@ -86,188 +174,209 @@ class ResPartner(models.Model):
                 reconciled_amls.remove_move_reconcile()
 
     def calc_difference_invoice(self, date, payment_term, billing_point):
-        if (
-            self.property_account_receivable_id.currency_id
-            and self.property_account_payable_id.currency_id
-        ):
-            inv_obj = self.env["account.invoice"]
-            diff_inv_journal = self.env["account.journal"].search(
-                [("code", "=", "KFARK")], limit=1
-            )
-            draft_dif_inv = inv_obj.search(
-                [
-                    ("state", "=", "draft"),
-                    ("journal_id", "=", diff_inv_journal.id),
-                    ("partner_id", "=", self.id),
-                    ("currency_id", "=", self.env.company.currency_id.id),
-                ]
-            )
-            if draft_dif_inv:
-                for x in draft_dif_inv:
-                    x.action_invoice_cancel()
+        invoices = self._create_currency_difference_invoices(
+            date, payment_term, billing_point
+        )
+        return invoices[:1] or False
 
-            difference_aml_domain = [
-                ("partner_id", "=", self.id),
-                ("journal_id", "=", self.company_id.currency_exchange_journal_id.id),
-                ("difference_checked", "=", False),
-                ("full_reconcile_id", "!=", False),
-            ]
+    @api.model
+    def _get_currency_difference_taxes(self, company):
+        """
+        Sale taxes the currency differences are spread over, by rate.
+        :return: dict {rate: account.tax}
+        """
+        taxes = self.env["account.tax"].search(
+            [
+                ("type_tax_use", "=", "sale"),
+                ("amount", "in", DIFFERENCE_TAX_RATES),
+                ("include_base_amount", "=", False),
+                ("company_id", "=", company.id),
+            ],
+            order="sequence, id",
+        )
+        taxes_dict = {}
+        for tax in taxes:
+            taxes_dict.setdefault(int(tax.amount), tax)
+        for rate in DIFFERENCE_TAX_RATES:
+            if rate not in taxes_dict:
+                raise UserError(_("KDV %s oranlı vergi tanımlanmamış!") % rate)
+        return taxes_dict
+
+    def _get_currency_difference_lines(self, journal):
+        """
+        Unchecked and reconciled currency difference lines of the partners,
+        with the untaxed amount, numbers and tax amounts by rate of the
+        invoices reconciled with them, computed with one query.
+        :param journal: currency exchange journal
+        :return: dict {partner id: [line dict]}
+        """
+        if "supplier_invoice_number" in self.env["account.move"]._fields:
+            invoice_number = "COALESCE(NULLIF(m.supplier_invoice_number, ''), m.name)"
+        else:
+            invoice_number = "m.name"
+        self.env.flush_all()
+        self.env.cr.execute(
+            DIFFERENCE_LINES_QUERY % {"invoice_number": invoice_number},
+            {
+                "partner_ids": tuple(self.ids),
+                "journal_id": journal.id,
+                "rates": DIFFERENCE_TAX_RATES,
+            },
+        )
+        lines = defaultdict(list)
+        for line in self.env.cr.dictfetchall():
+            line["tax_amounts"] = {
+                float(rate): amount for rate, amount in line["tax_amounts"].items()
+            }
+            lines[line["partner_id"]].append(line)
+        return lines
 
-            difference_amls = self.env["account.move.line"].search(
-                difference_aml_domain
-            )
-            if (
-                difference_amls
-                and round(
-                    (
-                        sum(difference_amls.mapped("debit"))
-                        - sum(difference_amls.mapped("credit"))
-                    ),
-                    2,
+    @api.model
+    def _prepare_currency_difference_invoice_lines(self, line, inv_type, taxes, vals):
+        """
+        Spread a currency difference line over the tax rates of the invoices
+        reconciled with it, or over the 20% tax when there is none.
+        :param line: line dict of _get_currency_difference_lines
+        :param vals: values shared by the invoice lines
+        :return: list of invoice line values
+        """
+        amount = line["debit"] or line["credit"]
+        sign = 1
+        if (inv_type == "out_refund" and line["debit"] > 0) or (
+            inv_type == "out_invoice" and line["credit"] > 0
+        ):
+            sign = -1
+        if not line["numbers"]:
+            # If there is no invoice, then it is a difference between
+            # the exchange rate of the invoice and the payment
+            tax = taxes[20]
+            return [
+                dict(
+                    vals,
+                    price_unit=sign * amount / (1 + tax.amount / 100.0),
+                    tax_ids=[(6, 0, tax.ids)],
                 )
-                < 0
-            ):
-                inv_type = "out_refund"
-            else:
-                inv_type = "out_invoice"
-            if difference_amls:
-                # Get taxes
-                created_inv_lines = self.env["account.invoice.line"]
-                kdv_rates = [20, 10, 18, 8]
-                taxes_dict = {}
-                for kdv_rate in kdv_rates:
-                    tax = self.env["account.tax"].search(
-                        [
-                            ("type_tax_use", "=", "sale"),
-                            ("amount", "=", kdv_rate),
-                            ("include_base_amount", "=", False),
-                        ],
-                        limit=1,
-                    )
-                    if tax:
-                        taxes_dict[kdv_rate] = tax
-                    else:
-                        raise UserError(
-                            _("KDV %s oranlı vergi tanımlanmamış!") % kdv_rate
-                        )
-
-                comment_einvoice = "Aşağıdaki faturaların kur farkıdır:\n"
-                for diff_aml in difference_amls:
-                    inv_lines_to_create = []
-                    base_ail_dict = {
-                        "difference_base_aml_id": diff_aml.id,
-                        "name": _("Currency Difference"),
-                        "uom_id": 1,
-                        "account_id": self.env.company.currency_diff_inv_account_id.id,
-                    }
-                    amount_untaxed = diff_aml.debit or diff_aml.credit
-                    inv_ids = diff_aml.full_reconcile_id.reconciled_line_ids.filtered(
-                        lambda r: r.invoice_id
-                    ).mapped("invoice_id")
-                    if len(inv_ids) > 0:
-                        comment_einvoice += ", ".join(
-                            inv_id.supplier_invoice_number
-                            if inv_id.supplier_invoice_number
-                            else inv_id.number
-                            for inv_id in inv_ids
-                        )
-
-                        # Calculate tax distribution
-                        total_amount = amount_untaxed
-                        for rate in kdv_rates:
-                            total_tax_amount = sum(
-                                inv_ids.mapped("tax_line_ids")
-                                .filtered(lambda r: r.tax_id.amount == rate)
-                                .mapped("amount")
-                            )
-                            tax_rate = round(
-                                100.0
-                                * (total_tax_amount / rate)
-                                / sum(inv_ids.mapped("amount_untaxed")),
-                                4,
-                            )
-                            if tax_rate > 0:
-                                tax_id = taxes_dict[rate]
-                                amount_untaxed = round(
-                                    total_amount
-                                    * tax_rate
-                                    / (1 + tax_id.amount / 100.0),
-                                    2,
-                                )
-                                tax_ids = [(6, False, [tax_id.id])]
-                                # else:
-                                #     tax_ids = [(6, False, [taxes_dict[20].id])]
-                                #     amount_untaxed = amount_untaxed / (
-                                #         1 + taxes_dict[20].amount / 100.0
-                                #     )
-
-                                if inv_type == "out_refund" and diff_aml.debit > 0:
-                                    amount_untaxed = -amount_untaxed
-
-                                if inv_type == "out_invoice" and diff_aml.credit > 0:
-                                    amount_untaxed = -amount_untaxed
-
-                                inv_lines_to_create.append(
-                                    dict(
-                                        **base_ail_dict,
-                                        **{
-                                            "price_unit": amount_untaxed,
-                                            "invoice_line_tax_ids": tax_ids,
-                                        },
-                                    )
-                                )
-                    else:
-                        # If there is no invoice, then it is a difference between
-                        # the exchange rate of the invoice and the payment
-                        # Set the tax rate to 20%
-                        comment_einvoice = ""
-                        amount_untaxed = amount_untaxed / (
-                            1 + taxes_dict[20].amount / 100.0
-                        )
-                        tax_ids = [(6, False, [taxes_dict[20].id])]
-
-                        if inv_type == "out_refund" and diff_aml.debit > 0:
-                            amount_untaxed = -amount_untaxed
-
-                        if inv_type == "out_invoice" and diff_aml.credit > 0:
-                            amount_untaxed = -amount_untaxed
-
-                        inv_lines_to_create.append(
-                            dict(
-                                **base_ail_dict,
-                                **{
-                                    "price_unit": amount_untaxed,
-                                    "invoice_line_tax_ids": tax_ids,
-                                },
-                            )
-                        )
-
-                    diff_aml.write({"difference_checked": True})
-
-                    created_inv_lines |= self.env["account.invoice.line"].create(
-                        inv_lines_to_create
+            ]
+        if not line["amount_untaxed"]:
+            return []
+        invoice_lines = []
+        for rate in DIFFERENCE_TAX_RATES:
+            tax_rate = round(
+                100.0
+                * (line["tax_amounts"].get(float(rate), 0.0) / rate)
+                / line["amount_untaxed"],
+                4,
+            )
+            if tax_rate > 0:
+                tax = taxes[rate]
+                invoice_lines.append(
+                    dict(
+                        vals,
+                        price_unit=sign
+                        * round(amount * tax_rate / (1 + tax.amount / 100.0), 2),
+                        tax_ids=[(6, 0, tax.ids)],
                     )
+                )
+        return invoice_lines
 
-                dif_inv = inv_obj.create(
+    def _create_currency_difference_invoices(self, date, payment_term, billing_point):
+        """
+        Create the currency difference invoices of the partners whose
+        accounts are in foreign currency, one per partner. Previous draft
+        difference invoices are cancelled and their lines computed again.
+        :return: created account.move records
+        """
+        company = self.env.company
+        partners = self.filtered(
+            lambda p: p.property_account_receivable_id.currency_id
+            and p.property_account_payable_id.currency_id
+        )
+        Move = self.env["account.move"]
+        if not partners:
+            return Move
+        diff_inv_journal = self.env["account.journal"].search(
+            [("code", "=", "KFARK")], limit=1
+        )
+        draft_dif_invs = Move.search(
+            [
+                ("state", "=", "draft"),
+                ("journal_id", "=", diff_inv_journal.id),
+                ("partner_id", "in", partners.ids),
+                ("currency_id", "=", company.currency_id.id),
+            ]
+        )
+        if draft_dif_invs:
+            draft_dif_invs.line_ids.difference_base_aml_id.write(
+                {"difference_checked": False}
+            )
+            draft_dif_invs.button_cancel()
+        lines_by_partner = partners._get_currency_difference_lines(
+            company.currency_exchange_journal_id
+        )
+        if not lines_by_partner:
+            return Move
+        taxes = self._get_currency_difference_taxes(company)
+        account = company.currency_diff_inv_account_id
+        invoice_vals_list = []
+        checked_ids = []
+        for partner in partners:
+            lines = lines_by_partner.get(partner.id)
+            if not lines:
+                continue
+            balance = round(sum(line["debit"] - line["credit"] for line in lines), 2)
+            inv_type = "out_refund" if balance < 0 else "out_invoice"
+            invoice_lines = []
+            for line in lines:
+                invoice_lines += self._prepare_currency_difference_invoice_lines(
+                    line,
+                    inv_type,
+                    taxes,
                     {
-                        "partner_id": self.id,
-                        "date_invoice": date,
-                        "journal_id": diff_inv_journal.id,
-                        "currency_id": self.env.company.currency_id.id,
-                        "type": inv_type,
-                        "billing_point_id": billing_point.id,
-                        "payment_term_id": payment_term.id,
-                        "comment_einvoice": comment_einvoice,
-                    }
+                        "difference_base_aml_id": line["id"],
+                        "name": _("Currency Difference"),
+                        "product_uom_id": 1,
+                        "account_id": account.id,
+                    },
                 )
+                checked_ids.append(line["id"])
+            numbers = ", ".join(line["numbers"] for line in lines if line["numbers"])
+            invoice_vals_list.append(
+                {
+                    "partner_id": partner.id,
+                    "invoice_date": date,
+                    "journal_id": diff_inv_journal.id,
+                    "currency_id": company.currency_id.id,
+                    "move_type": inv_type,
+                    "billing_point_id": billing_point.id,
+                    "invoice_payment_term_id": payment_term.id,
+                    "comment_einvoice": numbers
+                    and "Aşağıdaki faturaların kur farkıdır:\n%s" % numbers,
+                    "invoice_line_ids": [(0, 0, vals) for vals in invoice_lines],
+                }
+            )
+        invoices = Move.create(invoice_vals_list)
+        AccountMoveLine = self.env["account.move.line"]
+        AccountMoveLine.flush_model(["difference_checked"])
+        self.env.cr.execute(
+            "UPDATE account_move_line SET difference_checked = TRUE WHERE id IN %s",
+            (tuple(checked_ids),),
+        )
+        AccountMoveLine.invalidate_model(["difference_checked"])
+        return invoices
 
-                dif_inv.invoice_line_ids = [
-                    (6, False, [x.id for x in created_inv_lines])
-                ]
-                dif_inv._onchange_invoice_line_ids()
-                return dif_inv
-
-        return False
+    def _enqueue_currency_difference_invoices(
+        self, date, payment_term, billing_point, batch_size
+    ):
+        """
+        Create the currency difference invoices from queued jobs of
+        batch_size partners each.
+        """
+        for index in range(0, len(self), batch_size):
+            batch = self[index : index + batch_size]
+            batch.with_delay(
+                description=_("Currency difference invoices of %s partners")
+                % len(batch)
+            )._create_currency_difference_invoices(date, payment_term, billing_point)
 
     def action_generate_currency_diff_invoice(self):
         view = self.env.ref(
@@ -285,151 +394,184 @@ class ResPartner(models.Model):
             "context": self.env.context,
         }
 
-    def calc_currency_valuation(self, move_date):
+    def _get_currency_valuation_rows(self, move_date):
         """
-        Yabancı müşteriler için kur değerleme fonksiyonu.
-        :param move_date:
-        :return:
-        """
-        query = """
-            select partner_id,
-                   currency_id,
-                   account_id,
-                   sum(try_debit) as total_try_debit,
-                   sum(try_credit) as total_try_credit,
-                   sum(amount_currency) as total_currency_amount
-            from
-            (
-                SELECT
-                       L.partner_id,
-                       L.account_id,
-                       CASE
-                           WHEN (Sum(L.debit) - Sum(L.credit)) > 0 THEN
-                               Round((Sum(L.debit) - Sum(L.credit)), 2)
-                           ELSE
-                               0.00
-                       END AS TRY_DEBIT,
-                       CASE
-                           WHEN Sum(L.debit) - Sum(L.credit) < 0 THEN
-                               -1 * Round((Sum(L.debit) - Sum(L.credit)), 2)
-                           ELSE
-                               0.00
-                       END AS TRY_CREDIT,
-                       Round(Sum(L.amount_currency), 4) AS AMOUNT_CURRENCY,
-                       L.currency_id AS CURRENCY_ID
-                FROM account_move_line AS L
-                    LEFT JOIN account_account A
-                        ON (L.account_id = A.id)
-                    LEFT JOIN account_move AM
-                        ON (L.move_id = AM.id)
-                    LEFT JOIN account_journal AJ
-                        ON (AM.journal_id = AJ.id)
-                    LEFT JOIN account_account_type AT
-                        ON (A.user_type_id = AT.id)
-                    LEFT JOIN account_invoice INV
-                        ON (L.invoice_id = INV.id)
-                    LEFT JOIN res_partner RP
-                        ON (L.partner_id = RP.id)
-                WHERE L.DATE <= {date}
-                      AND L.partner_id in ({partner_ids})
-                      AND AT.type IN ( 'payable', 'receivable' )
-                      AND L.currency_id IS NOT NULL
-                      AND L.currency_id != 31 -- TRY
-                      AND RP.country_id != 224 -- Türkiye
-                GROUP BY AJ.NAME,
-                         A.code,
-                         A.currency_id,
-                         L.move_id,
-                         AM.NAME,
-                         L.DATE,
-                         L.currency_id,
-                         L.partner_id,
-                         AJ.id,
-                         L.account_id
-            ) sub
-            group by partner_id, currency_id, account_id;
+        Unrealised exchange differences of the foreign currency receivable
+        and payable balances of the partners up to the date, computed for
+        every (company, account, partner, currency) in one query. Balances
+        are valued at the last forex buying rate up to the date.
+        :param move_date: valuation date
+        :return: list of dicts with company_id, account_id, partner_id,
+            currency_id, amount_currency, old_balance, rate, balance and
+            difference
         """
+        if not self:
+            return []
+        self.env["account.move.line"].flush_model()
         self.env.cr.execute(
-            query.format(
-                date="'%s'" % move_date,
-                partner_ids=",".join([str(x) for x in self.ids]),
-            )
+            CURRENCY_VALUATION_QUERY,
+            {
+                "date": move_date,
+                "partner_ids": tuple(self.ids),
+                "country_id": self.env.ref("base.tr").id,
+            },
         )
         result = self.env.cr.dictfetchall()
-        rates = self.env["res.currency.rate"].search_read(
-            [("name", "=", move_date)], ["currency_id", "tcmb_forex_buying"]
+        rates = self._get_currency_valuation_rates(result, move_date)
+        rows = []
+        for row in result:
+            rate = rates[row["company_id"], row["currency_id"]]
+            balance = row["amount_currency"] / rate
+            difference = round(balance - row["old_balance"], 2)
+            if float_is_zero(difference, precision_rounding=2):
+                continue
+            row.update(rate=rate, balance=balance, difference=difference)
+            rows.append(row)
+        return rows
+
+    @api.model
+    def _get_currency_valuation_rates(self, rows, move_date):
+        """
+        :param rows: rows with company_id and currency_id
+        :param move_date: valuation date
+        :return: dict {(company id, currency id): forex buying rate}
+        :raise UserError: a currency has no forex buying rate up to the date
+        """
+        self.env["res.currency.rate"].flush_model(
+            ["name", "currency_id", "company_id", "tcmb_forex_buying"]
         )
-        if not rates:
-            raise UserError(
-                _("No exchange rate information found for the selected day!")
+        currency_ids = defaultdict(set)
+        for row in rows:
+            currency_ids[row["company_id"]].add(row["currency_id"])
+        rates = {}
+        for company_id, company_currency_ids in currency_ids.items():
+            self.env.cr.execute(
+                CURRENCY_VALUATION_RATE_QUERY,
+                {
+                    "currency_ids": tuple(company_currency_ids),
+                    "company_id": company_id,
+                    "date": move_date,
+                },
             )
-        rate_dict = {x["currency_id"][0]: x["tcmb_forex_buying"] for x in rates}
-        diff_journal = self.env["account.journal"].search(
-            [("code", "=", "KRDGR")], limit=1
-        )
+            company_rates = dict(self.env.cr.fetchall())
+            missing = company_currency_ids - company_rates.keys()
+            if missing:
+                currencies = self.env["res.currency"].browse(sorted(missing))
+                raise UserError(
+                    _("No exchange rate information found for %s on or before %s!")
+                    % (", ".join(currencies.mapped("name")), move_date)
+                )
+            for currency_id, rate in company_rates.items():
+                rates[company_id, currency_id] = rate
+        return rates
 
-        move_vals = {
-            "name": "%s %s"
-            % (move_date.strftime("%d.%m.%Y"), _("Currency Valuation")),
-            "journal_id": diff_journal.id,
-            "date": move_date,
-            "state": "draft",
-            "currency_id": self.env.company.currency_id.id,
+    @api.model
+    def _prepare_currency_valuation_moves(self, rows, move_date):
+        """
+        Values of one valuation move per company, the differences of all
+        the partners are balanced on the exchange gain (646) and loss (656)
+        accounts of the company.
+        :param rows: rows of _get_currency_valuation_rows
+        :param move_date: valuation date
+        :return: list of account.move values
+        """
+        company_ids = sorted({row["company_id"] for row in rows})
+        journals = {
+            journal.company_id.id: journal
+            for journal in self.env["account.journal"].search(
+                [("code", "=", "KRDGR"), ("company_id", "in", company_ids)]
+            )
         }
-
-        difference_aml_list = []
-        for res in result:
-            old_try_balance = res["total_try_debit"] - res["total_try_credit"]
-            current_try_balance = (
-                res["total_currency_amount"] / rate_dict[res["currency_id"]]
+        accounts = {
+            (account.company_id.id, account.code): account
+            for account in self.env["account.account"].search(
+                [("code", "in", ("646", "656")), ("company_id", "in", company_ids)]
             )
-            difference = round(current_try_balance - old_try_balance, 2)
-            if float_is_zero(difference, precision_rounding=2):
-                continue
-            difference_aml_list.append(
+        }
+        lines_by_company = defaultdict(list)
+        for row in rows:
+            difference = row["difference"]
+            lines_by_company[row["company_id"]].append(
                 {
-                    "partner_id": res["partner_id"],
-                    "account_id": res["account_id"],
+                    "partner_id": row["partner_id"],
+                    "account_id": row["account_id"],
                     "name": _("Currency Valuation"),
                     "debit": difference if difference > 0 else 0,
                     "credit": abs(difference) if difference < 0 else 0,
-                    "currency_id": res["currency_id"],
-                    "amount_currency": 0.00001,  # Hack for currency rate calculation
+                    "currency_id": row["currency_id"],
+                    # Only the company currency balance is valued
+                    "amount_currency": 0.0,
                 }
             )
+        move_vals_list = []
+        for company in self.env["res.company"].browse(company_ids):
+            journal = journals.get(company.id)
+            gain_account = accounts.get((company.id, "646"))
+            loss_account = accounts.get((company.id, "656"))
+            if not (journal and gain_account and loss_account):
+                raise UserError(
+                    _(
+                        "Currency valuation journal (KRDGR) and exchange accounts"
+                        " (646, 656) must be defined for company %s!"
+                    )
+                    % company.name
+                )
+            lines = lines_by_company[company.id]
+            total_debit = sum(line["debit"] for line in lines)
+            total_credit = sum(line["credit"] for line in lines)
+            if total_debit > 0:
+                lines.append(
+                    {
+                        "name": _("Currency Diff. Counterpart"),
+                        "account_id": gain_account.id,
+                        "debit": 0,
+                        "credit": total_debit,
+                        "currency_id": company.currency_id.id,
+                    }
+                )
+            if total_credit > 0:
+                lines.append(
+                    {
+                        "name": _("Currency Diff. Counterpart"),
+                        "account_id": loss_account.id,
+                        "debit": total_credit,
+                        "credit": 0,
+                        "currency_id": company.currency_id.id,
+                    }
+                )
+            move_vals_list.append(
+                {
+                    "move_type": "entry",
+                    "ref": "%s %s"
+                    % (move_date.strftime("%d.%m.%Y"), _("Currency Valuation")),
+                    "journal_id": journal.id,
+                    "company_id": company.id,
+                    "date": move_date,
+                    "currency_id": company.currency_id.id,
+                    "line_ids": [(0, 0, line) for line in lines],
+                }
+            )
+        return move_vals_list
 
-        if not difference_aml_list:
+    def calc_currency_valuation(self, move_date, dry_run=False):
+        """
+        Yabancı müşteriler için kur değerleme fonksiyonu. Creates and posts
+        one valuation move per company for the selected partners.
+        :param move_date: valuation date
+        :param dry_run: return the computed differences without creating
+            any move
+        :return: account.move recordset, or the rows of
+            _get_currency_valuation_rows in dry run mode
+        """
+        rows = self._get_currency_valuation_rows(move_date)
+        if dry_run:
+            return rows
+        if not rows:
             raise UserError(
                 _("No records found to calculate exchange rate difference!")
             )
-
-        total_debit = sum(x["debit"] for x in difference_aml_list)
-        total_credit = sum(x["credit"] for x in difference_aml_list)
-
-        # 426: 646 Kambiyo Karları Hesabı
-        # 429: 656 Kambiyo Zararları Hesabı
-
-        if total_debit > 0:
-            debit_counterpart_aml = {
-                "name": _("Currency Diff. Counterpart"),
-                "account_id": 426,
-                "debit": 0,
-                "credit": total_debit,
-                "currency_id": self.env.company.currency_id.id,
-            }
-            difference_aml_list.append(debit_counterpart_aml)
-
-        if total_credit > 0:
-            credit_counterpart_aml = {
-                "name": _("Currency Diff. Counterpart"),
-                "account_id": 429,
-                "debit": total_credit,
-                "credit": 0,
-                "currency_id": self.env.company.currency_id.id,
-            }
-            difference_aml_list.append(credit_counterpart_aml)
-
-        move_vals["line_ids"] = [(0, 0, x) for x in difference_aml_list]
-        move = self.env["account.move"].create(move_vals)
-        move.post()
-        return move
+        moves = self.env["account.move"].create(
+            self._prepare_currency_valuation_moves(rows, move_date)
+        )
+        moves.action_post()
+        return moves
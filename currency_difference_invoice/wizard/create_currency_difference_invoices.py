@@ -1,6 +1,8 @@
 from odoo import models, api, fields, _
 from odoo.exceptions import UserError
 
+DIFFERENCE_INVOICE_BATCH_SIZE = 100
+
 
 class CreateCurrencyDifferenceInvoices(models.TransientModel):
     _name = 'create.currency.difference.invoices'
@@ -15,28 +17,32 @@ class CreateCurrencyDifferenceInvoices(models.TransientModel):
         context = dict(self._context or {})
         active_ids = context.get('active_ids', []) or []
         partners = self.env['res.partner'].browse(active_ids)
-        invoices = self.env['account.invoice']
-        for record in self.web_progress_iter(partners, msg="Müşterilerin kur farkı faturaları oluşturuluyor..."):
-            inv_id = record.calc_difference_invoice(self.invoice_date, self.payment_term_id, self.billing_point_id)
-            if inv_id:
-                invoices |= inv_id
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'currency_difference_invoice.batch_size', DIFFERENCE_INVOICE_BATCH_SIZE))
+        if len(partners) > batch_size:
+            partners._enqueue_currency_difference_invoices(
+                self.invoice_date, self.payment_term_id, self.billing_point_id, batch_size)
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'type': 'info',
+                    'message': _('Currency difference invoices of %s partners are created in the background.')
+                    % len(partners),
+                    'next': {'type': 'ir.actions.act_window_close'},
+                },
+            }
+        invoices = partners._create_currency_difference_invoices(
+            self.invoice_date, self.payment_term_id, self.billing_point_id)
 
         if not invoices:
             raise UserError(_('No invoice created!'))
-        action = self.env.ref("account.action_invoice_tree1")
-        action_dict = action.read()[0]
+        action_dict = self.env['ir.actions.act_window']._for_xml_id('account.action_move_out_invoice_type')
 
         if len(invoices) > 1:
             action_dict['domain'] = [('id', 'in', invoices.ids)]
-        elif len(invoices) == 1:
-            if invoices.type in ["out_invoice", "out_refund"]:
-                form_view = [(self.env.ref('account.invoice_form').id, 'form')]
-            else:
-                form_view = [(self.env.ref('account.invoice_supplier_form').id, 'form')]
-            if 'views' in action_dict:
-                action_dict['views'] = form_view + [(state,  view) for state, view in action['views'] if view != 'form']
-            else:
-                action_dict['views'] = form_view
+        else:
+            action_dict['views'] = [(self.env.ref('account.view_move_form').id, 'form')]
             action_dict['res_id'] = invoices.id
 
         return action_dict
@@ -9,21 +9,94 @@ class CreateCurrencyValuationMove(models.TransientModel):
     move_date = fields.Date(
         string="Move Date", required=True, default=fields.Date.context_today
     )
+    dry_run = fields.Boolean(
+        string="Dry Run",
+        help="Only compute the differences, no move is created.",
+    )
+    line_ids = fields.One2many(
+        "create.currency.valuation.move.line", "wizard_id", string="Differences"
+    )
 
-    
     def create_move(self):
         context = dict(self._context or {})
         active_ids = context.get("active_ids", []) or []
         partners = self.env["res.partner"].browse(active_ids)
-        created_move = partners.calc_currency_valuation(self.move_date)
+        if self.dry_run:
+            rows = partners.calc_currency_valuation(self.move_date, dry_run=True)
+            self.line_ids = [(5, 0, 0)] + [
+                (
+                    0,
+                    0,
+                    {
+                        key: row[key]
+                        for key in (
+                            "company_id",
+                            "account_id",
+                            "partner_id",
+                            "currency_id",
+                            "amount_currency",
+                            "old_balance",
+                            "rate",
+                            "balance",
+                            "difference",
+                        )
+                    },
+                )
+                for row in rows
+            ]
+            return {
+                "type": "ir.actions.act_window",
+                "res_model": self._name,
+                "view_mode": "form",
+                "res_id": self.id,
+                "views": [(False, "form")],
+                "target": "new",
+                "context": context,
+            }
+        created_moves = partners.calc_currency_valuation(self.move_date)
 
-        action = self.env.ref("account.action_move_journal_line")
-        action_dict = action.read()[0]
-        form_view = [(self.env.ref("account.view_move_form").id, "form")]
-        if "views" in action_dict:
-            action_dict["views"] = form_view + [(state, view) for state, view in action["views"] if view != "form"]
+        action_dict = self.env["ir.actions.act_window"]._for_xml_id(
+            "account.action_move_journal_line"
+        )
+        if len(created_moves) == 1:
+            form_view = [(self.env.ref("account.view_move_form").id, "form")]
+            if "views" in action_dict:
+                action_dict["views"] = form_view + [
+                    (state, view)
+                    for state, view in action_dict["views"]
+                    if view != "form"
+                ]
+            else:
+                action_dict["views"] = form_view
+            action_dict["res_id"] = created_moves.id
         else:
-            action_dict["views"] = form_view
-        action_dict["res_id"] = created_move.id
+            action_dict["domain"] = [("id", "in", created_moves.ids)]
 
         return action_dict
+
+
+class CreateCurrencyValuationMoveLine(models.TransientModel):
+    _name = "create.currency.valuation.move.line"
+    _description = "Computed Currency Valuation Difference"
+
+    wizard_id = fields.Many2one(
+        "create.currency.valuation.move", required=True, ondelete="cascade"
+    )
+    company_id = fields.Many2one("res.company", string="Company")
+    account_id = fields.Many2one("account.account", string="Account")
+    partner_id = fields.Many2one("res.partner", string="Partner")
+    currency_id = fields.Many2one("res.currency", string="Currency")
+    company_currency_id = fields.Many2one(related="company_id.currency_id")
+    amount_currency = fields.Monetary(
+        string="Amount Currency", currency_field="currency_id"
+    )
+    old_balance = fields.Monetary(
+        string="Book Balance", currency_field="company_currency_id"
+    )
+    rate = fields.Float(string="Closing Rate", digits=(12, 6))
+    balance = fields.Monetary(
+        string="Valued Balance", currency_field="company_currency_id"
+    )
+    difference = fields.Monetary(
+        string="Difference", currency_field="company_currency_id"
+    )
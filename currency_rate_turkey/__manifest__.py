@@ -3,14 +3,14 @@
 
 {
     "name": "Currency Rate Turkey",
-    "version": "16.0.1.0.0",
+    "version": "16.0.1.1.0",
     "website": "https://github.com/altinkaya-opensource/odoo-addons",
     "author": "yibudak, Altinkaya Enclosures",
     "category": "Currency",
     "license": "LGPL-3",
     "summary": """This module adds currency rate fields and providers.""",
     "depends": ["currency_rate_update", "currency_rate_update_tcmb"],
-    "python-dependencies": ["requests", "bs4"],
+    "python-dependencies": ["requests", "lxml"],
     "data": [
         "views/res_currency_view.xml",
         "views/res_currency_rate_view.xml",
@@ -0,0 +1,21 @@
+from odoo.addons.currency_rate_turkey.models.res_currency_rate import (
+    INVERSE_RATE_FIELDS,
+)
+
+
+def migrate(cr, version):
+    """Create the stored inverse rate columns and fill them in one UPDATE,
+    so the ORM does not compute them row by row."""
+    for inverse_field in INVERSE_RATE_FIELDS.values():
+        cr.execute(
+            "ALTER TABLE res_currency_rate ADD COLUMN IF NOT EXISTS %s numeric"
+            % inverse_field
+        )
+    cr.execute(
+        "UPDATE res_currency_rate SET %s"
+        % ", ".join(
+            f"{inverse_field} = CASE WHEN COALESCE({field}, 0) != 0 "
+            f"THEN 1 / {field} ELSE 0 END"
+            for field, inverse_field in INVERSE_RATE_FIELDS.items()
+        )
+    )
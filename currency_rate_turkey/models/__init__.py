@@ -12,3 +12,4 @@ from . import account_payment
 from . import sale_order
 from . import account_move
 from . import altinkaynak_connector
+from . import res_currency_rate_provider_rate_server
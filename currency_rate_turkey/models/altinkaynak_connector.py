@@ -4,10 +4,21 @@
 # Copyright 2025 Ismail Cagan Yilmaz (https://github.com/milleniumkid)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from requests.adapters import HTTPAdapter
+
+ENDPOINT = "https://www.altinkaynak.com/Doviz/Kur"
+DATE_INPUT = "ctl00$ctl00$cphMain$cphSubContent$dateInput"
+TOKEN_INPUT_IDS = (
+    "cphMain_cphSubContent_pcHintWS",
+    "__VIEWSTATE",
+    "__VIEWSTATEGENERATOR",
+)
 
 
 class AltinkaynakConnector:
@@ -15,14 +26,20 @@ class AltinkaynakConnector:
     Base class for altinkaynak.com connector
     """
 
-    def __init__(self):
-        self.endpoint = "https://www.altinkaynak.com/Doviz/Kur"
+    def __init__(self, endpoint=None, max_workers=4, timeout=10):
+        """
+        :param endpoint: rate page url, altinkaynak.com by default
+        :param max_workers: number of dates fetched at the same time, each
+            worker keeps its own connection alive
+        :param timeout: timeout of each request in seconds
+        """
+        self.endpoint = endpoint or ENDPOINT
+        self.max_workers = max_workers
+        self.timeout = timeout
         self.main_data = {
             "ctl00$ctl00$ScriptManager1": "ctl00$ctl00$cphMain$cphSubContent$upValues|"
             "ctl00$ctl00$cphMain$cphSubContent$btnSearch",
-            "ctl00$ctl00$cphMain$cphSubContent$dateInput": datetime.now().strftime(
-                "%d/%m/%Y"
-            ),
+            DATE_INPUT: datetime.now().strftime("%d/%m/%Y"),
             "ctl00$ctl00$cphMain$cphSubContent$wccRange$CallbackState": "",
             "__EVENTTARGET": "",
             "__EVENTARGUMENT": "",
@@ -35,31 +52,68 @@ class AltinkaynakConnector:
             "X-MicrosoftAjax": "Delta=true",
             "X-Requested-With": "XMLHttpRequest",
         }
-        self.cookies = None
+        # Sessions keep the cookies and the connection alive. Sessions are
+        # not thread safe, so each worker thread gets its own one, starting
+        # with the cookies received with the tokens.
+        self._local = threading.local()
+        self._session = self._new_session()
         self.main_data.update(self._get_tokens())
 
+    def _new_session(self):
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _get_session(self):
+        """
+        :return: requests session of the current thread
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._new_session()
+            session.cookies.update(self._session.cookies)
+        return session
+
+    def _find_elements(self, response, tag, element_ids):
+        """
+        Parse the response while it is downloaded and stop parsing as soon
+        as all the elements are found. The rest of the response is still
+        read, a connection is only given back to the pool once its response
+        is fully read.
+        :param response: streamed requests response
+        :param tag: tag of the elements
+        :param element_ids: ids of the elements
+        :return: dict {element id: element}
+        """
+        parser = etree.HTMLPullParser(events=("end",))
+        found = {}
+        chunks = response.iter_content(chunk_size=8192)
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _event, element in parser.read_events():
+                element_id = element.get("id")
+                if element.tag == tag and element_id in element_ids:
+                    found[element_id] = element
+            if len(found) == len(element_ids):
+                break
+        for _chunk in chunks:
+            pass
+        return found
+
     def _get_tokens(self):
         """
         Get tokens from altinkaynak.com
         :return:
         """
-        resp = requests.get(self.endpoint, headers=self.headers, timeout=10)
-
-        # Set cookies
-        self.cookies = resp.cookies
-
-        soup = BeautifulSoup(resp.content, "html.parser")
-        return {
-            "cphMain_cphSubContent_pcHintWS": soup.find(
-                "input", attrs={"id": "cphMain_cphSubContent_pcHintWS"}
-            ).attrs["value"],
-            "__VIEWSTATE": soup.find("input", attrs={"id": "__VIEWSTATE"}).attrs[
-                "value"
-            ],
-            "__VIEWSTATEGENERATOR": soup.find(
-                "input", attrs={"id": "__VIEWSTATEGENERATOR"}
-            ).attrs["value"],
-        }
+        with self._session.get(
+            self.endpoint, timeout=self.timeout, stream=True
+        ) as response:
+            response.raise_for_status()
+            inputs = self._find_elements(response, "input", TOKEN_INPUT_IDS)
+        return {input_id: inputs[input_id].get("value") for input_id in TOKEN_INPUT_IDS}
 
     def _get_rate(self, currencies, date):
         """
@@ -68,29 +122,46 @@ class AltinkaynakConnector:
         :param date: "dd/mm/yyyy" format
         :return:
         """
-        self.main_data["ctl00$ctl00$cphMain$cphSubContent$dateInput"] = date
-        response = requests.post(
-            self.endpoint,
-            data=self.main_data,
-            cookies=self.cookies,
-            headers=self.headers,
-            timeout=10,
-        )
-        soup = BeautifulSoup(response.content, "html.parser")
+        data = dict(self.main_data, **{DATE_INPUT: date})
+        cell_ids = {
+            f"td{currency.upper()}{side}"
+            for currency in currencies
+            for side in ("Buy", "Sell")
+        }
+        with self._get_session().post(
+            self.endpoint, data=data, timeout=self.timeout, stream=True
+        ) as response:
+            response.raise_for_status()
+            cells = self._find_elements(response, "td", cell_ids)
+
+        def cell_rate(cell_id):
+            return 1 / float(cells[cell_id].text.replace(",", "."))
+
         res = {}
         for currency in currencies:
             res[currency] = {
-                "AltinkaynakBuying": 1
-                / float(
-                    soup.find(
-                        "td", attrs={"id": f"td{currency.upper()}Buy"}
-                    ).next.replace(",", ".")
-                ),
-                "AltinkaynakSelling": 1
-                / float(
-                    soup.find(
-                        "td", attrs={"id": f"td{currency.upper()}Sell"}
-                    ).next.replace(",", ".")
-                ),
+                "AltinkaynakBuying": cell_rate(f"td{currency.upper()}Buy"),
+                "AltinkaynakSelling": cell_rate(f"td{currency.upper()}Sell"),
             }
         return res
+
+    def _get_rates(self, currencies, dates):
+        """
+        Fetch the rates of many dates with at most max_workers requests at
+        the same time.
+        :param currencies: EUR, USD, GBP, etc.
+        :param dates: list of "dd/mm/yyyy" dates
+        :return: dict {date: rates of _get_rate, or the exception raised}
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                date: executor.submit(self._get_rate, currencies, date)
+                for date in dates
+            }
+        results = {}
+        for date, future in futures.items():
+            try:
+                results[date] = future.result()
+            except Exception as e:
+                results[date] = e
+        return results
@@ -5,9 +5,11 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 import logging
+from bisect import bisect_right
 from datetime import timedelta
 
-from odoo import fields, models
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import UserError
 
 _logger = logging.getLogger(__name__)
 
@@ -75,21 +77,117 @@ class ResCurrency(models.Model):
     def _get_rates_single(self, company, date):
         rates_dict = {}
         for rec in self:
-            query = """SELECT c.id,
-                              COALESCE((SELECT r.rate_field FROM res_currency_rate r
-                                      WHERE r.currency_id = c.id AND r.name <= %s
-                                        AND (r.company_id IS NULL OR r.company_id = %s)
-                                   ORDER BY r.company_id, r.name DESC
-                                      LIMIT 1), 1.0) AS rate
-                       FROM res_currency c
-                       WHERE c.id IN %s"""
-
             if self._context.get("rate_type"):
                 rate_type = self._context.get("rate_type")
             else:
                 rate_type = rec.main_rate_field or "rate"
-
-            query = query.replace("r.rate_field", f"r.{rate_type}")
-            self._cr.execute(query, (date, company.id, tuple(rec.ids)))
-            rates_dict.update(dict(self._cr.fetchall()))
+            rates_dict[rec.id] = self._get_cached_rate(
+                company.id, rate_type, rec.id, date
+            )
         return rates_dict
+
+    @api.model
+    @tools.ormcache("company_id", "rate_type")
+    def _get_rate_table(self, company_id, rate_type):
+        """
+        Rate history of all currencies for a company and a rate field,
+        loaded in one query. Cleared with the registry caches when a rate
+        changes, which also signals the other workers.
+        :param company_id: res.company id
+        :param rate_type: rate field of res.currency.rate
+        :return: dict {currency id: (company rates, shared rates)}, rates
+            are a tuple of sorted dates and a tuple of the matching rates.
+        """
+        field = self.env["res.currency.rate"]._fields.get(rate_type)
+        if not field or field.type != "float" or not field.store:
+            raise UserError(_("Unknown currency rate type: %s") % rate_type)
+        self.env["res.currency.rate"].flush_model(
+            ["name", "currency_id", "company_id", rate_type]
+        )
+        self.env.cr.execute(
+            """
+            SELECT currency_id, company_id IS NOT NULL, name,
+                   COALESCE(%s, 1.0)
+              FROM res_currency_rate
+             WHERE company_id = %%s OR company_id IS NULL
+             ORDER BY currency_id, name
+            """
+            % rate_type,
+            (company_id or None,),
+        )
+        history = {}
+        for currency_id, own_rate, name, rate in self.env.cr.fetchall():
+            dates, rates = history.setdefault((currency_id, own_rate), ([], []))
+            dates.append(name)
+            rates.append(rate)
+        table = {}
+        for currency_id in {key[0] for key in history}:
+            table[currency_id] = tuple(
+                tuple(map(tuple, history.get((currency_id, own_rate), ((), ()))))
+                for own_rate in (True, False)
+            )
+        return table
+
+    @api.model
+    def _get_cached_rate(self, company_id, rate_type, currency_id, date):
+        """
+        Rate of a currency effective on a date: the last rate of the company
+        up to the date, else the last shared rate, else 1.0.
+        """
+        table = self._get_rate_table(company_id, rate_type)
+        date = fields.Date.to_date(date)
+        if not date:
+            return 1.0
+        for dates, rates in table.get(currency_id, ()):
+            index = bisect_right(dates, date)
+            if index:
+                return rates[index - 1]
+        return 1.0
+
+    @api.model
+    def _invalidate_rate_cache(self):
+        self.clear_caches()
+
+    @api.model
+    def _convert_bulk(self, rows, round=True):
+        """
+        Convert many amounts at once, giving the same results as _convert
+        row by row. Rows are grouped by currencies, company, date and rate
+        type so that each distinct conversion rate is resolved once.
+        :param rows: list of (amount, from_currency, to_currency, company,
+            date, rate_type), a falsy rate_type keeps the rate field of the
+            context or of the currencies
+        :param round: round the amounts in the target currency
+        :return: list of converted amounts, in the order of rows
+        """
+        conversion_rates = {}
+        for _amount, from_currency, to_currency, company, date, rate_type in rows:
+            from_currency = from_currency or to_currency
+            to_currency = to_currency or from_currency
+            key = (from_currency, to_currency, company, date, rate_type)
+            if from_currency != to_currency and key not in conversion_rates:
+                conversion_rates[key] = None
+        for key in conversion_rates:
+            from_currency, to_currency, company, date, rate_type = key
+            # As _get_conversion_rate, the rates are read with the context of
+            # the currencies, which carries the rate type
+            currencies = from_currency | to_currency
+            if rate_type:
+                currencies = currencies.with_context(rate_type=rate_type)
+            rates = currencies._get_rates(company, date)
+            conversion_rates[key] = rates[to_currency.id] / rates[from_currency.id]
+
+        amounts = []
+        for from_amount, from_currency, to_currency, company, date, rate_type in rows:
+            from_currency = from_currency or to_currency
+            to_currency = to_currency or from_currency
+            if from_currency == to_currency:
+                to_amount = from_amount
+            elif from_amount:
+                key = (from_currency, to_currency, company, date, rate_type)
+                to_amount = from_amount * conversion_rates[key]
+            else:
+                amounts.append(0.0)
+                continue
+            amounts.append(to_currency.round(to_amount) if round else to_amount)
+        return amounts
@@ -6,7 +6,7 @@
 
 import logging
 
-from odoo import fields, models
+from odoo import api, fields, models
 
 _logger = logging.getLogger(__name__)
 
@@ -20,6 +20,19 @@ RATE_FIELD_MAPPING = {
     "AltinkaynakSelling": "altinkaynak_selling",
 }
 
+# Rate fields with a stored inverse rate field
+INVERSE_RATE_FIELDS = {
+    field: f"{field}_inverse"
+    for field in (
+        "tcmb_forex_buying",
+        "tcmb_forex_selling",
+        "tcmb_banknote_buying",
+        "tcmb_banknote_selling",
+        "altinkaynak_buying",
+        "altinkaynak_selling",
+    )
+}
+
 
 class ResCurrencyRateSecond(models.Model):
     _inherit = "res.currency.rate"
@@ -70,40 +83,131 @@ class ResCurrencyRateSecond(models.Model):
     tcmb_forex_buying_inverse = fields.Float(
         digits=(12, 6),
         compute="_compute_inverse_rates",
+        store=True,
         string="TCMB Forex Buying Inverse",
     )
     tcmb_forex_selling_inverse = fields.Float(
         digits=(12, 6),
         compute="_compute_inverse_rates",
+        store=True,
         string="TCMB Forex Selling Inverse",
     )
     tcmb_banknote_buying_inverse = fields.Float(
         digits=(12, 6),
         compute="_compute_inverse_rates",
+        store=True,
         string="TCMB Banknote Buying Inverse",
     )
     tcmb_banknote_selling_inverse = fields.Float(
         digits=(12, 6),
         compute="_compute_inverse_rates",
+        store=True,
         string="TCMB Banknote Selling Inverse",
     )
     altinkaynak_buying_inverse = fields.Float(
         digits=(12, 6),
         compute="_compute_inverse_rates",
+        store=True,
     )
     altinkaynak_selling_inverse = fields.Float(
         digits=(12, 6),
         compute="_compute_inverse_rates",
+        store=True,
     )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["res.currency"]._invalidate_rate_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env["res.currency"]._invalidate_rate_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["res.currency"]._invalidate_rate_cache()
+        return res
+
+    @api.model
+    def _upsert_rates(self, rates):
+        """
+        Create or update many rates with one query. Columns missing from the
+        values keep their current value, or get their default on new rates.
+        :param rates: dict {(company id, currency id, date): {field: value}}
+        """
+        columns = (
+            ["provider_id", "second_rate"]
+            + list(dict.fromkeys(RATE_FIELD_MAPPING.values()))
+            + list(INVERSE_RATE_FIELDS.values())
+        )
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            SELECT company_id, currency_id, name, %s
+              FROM res_currency_rate
+             WHERE (company_id, currency_id, name) IN %%s
+            """
+            % ", ".join(columns),
+            (tuple(rates),),
+        )
+        current = {
+            row[:3]: dict(zip(columns, row[3:])) for row in self.env.cr.fetchall()
+        }
+        defaults = self.default_get(columns)
+        rows = []
+        for key, vals in rates.items():
+            row_vals = current.get(key) or {
+                column: defaults.get(column, False) or None for column in columns
+            }
+            row_vals.update(vals)
+            for field, inverse_field in INVERSE_RATE_FIELDS.items():
+                row_vals[inverse_field] = self._get_inverse_rate(row_vals[field])
+            rows.append(key + tuple(row_vals[column] for column in columns))
+        arrays = [
+            "%s::int[]",
+            "%s::int[]",
+            "%s::date[]",
+            "%s::int[]",
+        ] + [
+            "%s::numeric[]"
+        ] * (len(columns) - 1)
+        self.env.cr.execute(
+            """
+            INSERT INTO res_currency_rate (
+                company_id, currency_id, name, {columns},
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT *, %s, (now() at time zone 'UTC'), %s, (now() at time zone 'UTC')
+              FROM unnest({arrays})
+            ON CONFLICT (name, currency_id, company_id) DO UPDATE
+               SET {updates},
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+            """.format(
+                columns=", ".join(columns),
+                arrays=", ".join(arrays),
+                updates=", ".join(
+                    f"{column} = EXCLUDED.{column}" for column in columns
+                ),
+            ),
+            [self.env.uid, self.env.uid] + [list(column) for column in zip(*rows)],
+        )
+        self.invalidate_model()
+        self.env["res.currency"]._invalidate_rate_cache()
+        _logger.info("Updated %s currency rates", len(rows))
+
+    @api.depends(*INVERSE_RATE_FIELDS)
     def _compute_inverse_rates(self):
         for res in self:
-            res.tcmb_forex_buying_inverse = 1 / res.tcmb_forex_buying
-            res.tcmb_forex_selling_inverse = 1 / res.tcmb_forex_selling
-            res.tcmb_banknote_buying_inverse = 1 / res.tcmb_banknote_buying
-            res.tcmb_banknote_selling_inverse = 1 / res.tcmb_banknote_selling
-            res.altinkaynak_buying_inverse = 1 / res.altinkaynak_buying
-            res.altinkaynak_selling_inverse = 1 / res.altinkaynak_selling
+            for field, inverse_field in INVERSE_RATE_FIELDS.items():
+                res[inverse_field] = res._get_inverse_rate(res[field])
+
+    @api.model
+    def _get_inverse_rate(self, rate):
+        return 1 / rate if rate else 0.0
 
     def _get_rate_fields(self):
         """
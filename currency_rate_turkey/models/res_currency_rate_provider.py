@@ -17,9 +17,9 @@ class ResCurrencyRateProviderSecondRate(models.Model):
     _inherit = "res.currency.rate.provider"
 
     def _update(self, date_from, date_to, newest_only=False):
-        Currency = self.env["res.currency"]
         CurrencyRate = self.env["res.currency.rate"]
         is_scheduled = self.env.context.get("scheduled")
+        fetched = []
         for provider in self:
             try:
                 data = provider._obtain_rates(
@@ -56,19 +56,44 @@ class ResCurrencyRateProviderSecondRate(models.Model):
                 continue
             if newest_only:
                 data = [max(data, key=lambda x: fields.Date.from_string(x[0]))]
+            fetched.append((provider, data))
 
+            if is_scheduled:
+                provider._schedule_next_run()
+
+        rates = self._prepare_rate_values(fetched)
+        if rates:
+            CurrencyRate._upsert_rates(rates)
+
+    def _prepare_rate_values(self, fetched):
+        """
+        Collect the fetched rates of all providers, resolving the currencies
+        with a single search.
+        :param fetched: list of (provider, [(date, {currency name:
+            {rate type: rate}})])
+        :return: dict {(company id, currency id, date): {field: value}}
+        """
+        currency_names = {
+            currency_name
+            for provider, data in fetched
+            for _content_date, rates in data
+            for currency_name in rates
+            if currency_name != provider.company_id.currency_id.name
+        }
+        currencies = {
+            currency.name: currency
+            for currency in self.env["res.currency"].search(
+                [("name", "in", list(currency_names))]
+            )
+        }
+        values = {}
+        for provider, data in fetched:
             for content_date, rates in data:
                 timestamp = fields.Date.from_string(content_date)
                 for currency_name, rates_dict in rates.items():
                     if currency_name == provider.company_id.currency_id.name:
                         continue
-
-                    currency = Currency.search(
-                        [
-                            ("name", "=", currency_name),
-                        ],
-                        limit=1,
-                    )
+                    currency = currencies.get(currency_name)
                     if not currency:
                         raise UserError(
                             _("Unknown currency from %(provider)s: %(rate)s")
@@ -77,39 +102,13 @@ class ResCurrencyRateProviderSecondRate(models.Model):
                                 "rate": rates_dict,
                             }
                         )
+                    vals = values.setdefault(
+                        (provider.company_id.id, currency.id, timestamp), {}
+                    )
+                    vals["provider_id"] = provider.id
                     for rate_type, rate in rates_dict.items():
                         rate = provider._process_rate(currency, rate)
-                        is_main_rate = (
-                            RATE_FIELD_MAPPING[rate_type] == currency.main_rate_field
-                        )
-
-                        record = CurrencyRate.search(
-                            [
-                                ("company_id", "=", provider.company_id.id),
-                                ("currency_id", "=", currency.id),
-                                ("name", "=", timestamp),
-                            ],
-                            limit=1,
-                        )
-                        if record:
-                            vals = {
-                                RATE_FIELD_MAPPING[rate_type]: rate,
-                                "provider_id": provider.id,
-                            }
-                            if is_main_rate:
-                                vals["rate"] = rate
-                            record.write(vals)
-                        else:
-                            vals = {
-                                "company_id": provider.company_id.id,
-                                "currency_id": currency.id,
-                                "name": timestamp,
-                                RATE_FIELD_MAPPING[rate_type]: rate,
-                                "provider_id": provider.id,
-                            }
-                            if is_main_rate:
-                                vals["rate"] = rate
-                            record = CurrencyRate.create(vals)
-
-            if is_scheduled:
-                provider._schedule_next_run()
+                        vals[RATE_FIELD_MAPPING[rate_type]] = rate
+                        if RATE_FIELD_MAPPING[rate_type] == currency.main_rate_field:
+                            vals["rate"] = rate
+        return values
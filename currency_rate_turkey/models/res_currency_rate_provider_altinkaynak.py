@@ -60,12 +60,18 @@ class ResCurrencyRateProviderTCMB(models.Model):
             "KWD",
         ]
 
+    def _get_altinkaynak_workers(self):
+        """Number of dates fetched from Altinkaynak at the same time"""
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("currency_rate_turkey.altinkaynak_workers", 4)
+        )
+
     def _obtain_rates(self, base_currency, currencies, date_from, date_to):
         self.ensure_one()
         if self.service != "altinkaynak":
-            return super()._obtain_rates(
-base_currency, currencies, date_from, date_to
-)
+            return super()._obtain_rates(base_currency, currencies, date_from, date_to)
 
         invert_calculation = False
         if base_currency != "TRY":
@@ -81,7 +87,7 @@ base_currency, currencies, date_from, date_to
                 yield start_date + timedelta(n)
 
         result = {}
-        connector = AltinkaynakConnector()
+        connector = AltinkaynakConnector(max_workers=self._get_altinkaynak_workers())
 
         if date_from == date_to and date_from == date.today():
             try:
@@ -94,17 +100,20 @@ base_currency, currencies, date_from, date_to
                     _("No currency rate on %s") % date_from.strftime("%Y-%m-%d")
                 )
         else:
-            for single_date in daterange(date_from, date_to):
-                rate_date = single_date.strftime("%d/%m/%Y")
-                try:
-                    currency_data = connector._get_rate(currencies, rate_date)
-                    result[single_date] = currency_data
-                    self._action_log_update(rate_date)
-                except Exception:
+            dates = {
+                single_date.strftime("%d/%m/%Y"): single_date
+                for single_date in daterange(date_from, date_to)
+            }
+            fetched = connector._get_rates(currencies, list(dates))
+            for rate_date, single_date in dates.items():
+                currency_data = fetched[rate_date]
+                if isinstance(currency_data, Exception):
                     _logger.error(
                         _("No currency rate on %s") % single_date.strftime("%Y-%m-%d")
                     )
                     continue
+                result[single_date] = currency_data
+                self._action_log_update(rate_date)
 
         content = result
         if invert_calculation:
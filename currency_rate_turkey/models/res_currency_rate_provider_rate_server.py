@@ -0,0 +1,74 @@
+# Copyright 2025 Ismail Cagan Yilmaz (https://github.com/milleniumkid)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import logging
+from datetime import timedelta
+
+import requests
+
+from odoo import fields, models
+from odoo.tools.translate import _
+
+_logger = logging.getLogger(__name__)
+
+
+class ResCurrencyRateProviderRateServer(models.Model):
+    """
+    Provider reading rate documents from a local server, to load test the
+    rate update without calling the TCMB or Altinkaynak services.
+    """
+
+    _inherit = "res.currency.rate.provider"
+
+    service = fields.Selection(
+        selection_add=[("rate_server", "Rate Document Server")],
+        ondelete={"rate_server": "cascade"},
+    )
+    rate_server_url = fields.Char(
+        help="Base url of a server answering GET /rates?base=&currencies=&"
+        "date_from=&date_to= with a JSON document "
+        "{date: {currency: {rate type: rate}}}",
+    )
+
+    def _get_supported_currencies(self):
+        self.ensure_one()
+        if self.service != "rate_server":
+            return super()._get_supported_currencies()
+        return (
+            self.env["res.currency"]
+            .with_context(active_test=False)
+            .search([])
+            .mapped("name")
+        )
+
+    def _obtain_rates(self, base_currency, currencies, date_from, date_to):
+        self.ensure_one()
+        if self.service != "rate_server":
+            return super()._obtain_rates(base_currency, currencies, date_from, date_to)
+
+        result = {}
+        with requests.Session() as session:
+            chunk_from = date_from
+            # One document per month, a failing month does not stop the others
+            while chunk_from <= date_to:
+                chunk_to = min(chunk_from + timedelta(days=30), date_to)
+                try:
+                    response = session.get(
+                        f"{self.rate_server_url}/rates",
+                        params={
+                            "base": base_currency,
+                            "currencies": ",".join(currencies),
+                            "date_from": fields.Date.to_string(chunk_from),
+                            "date_to": fields.Date.to_string(chunk_to),
+                        },
+                        timeout=10,
+                    )
+                    response.raise_for_status()
+                    result.update(response.json())
+                except requests.RequestException:
+                    _logger.error(
+                        _("No currency rate from %(date_from)s to %(date_to)s")
+                        % {"date_from": chunk_from, "date_to": chunk_to}
+                    )
+                chunk_from = chunk_to + timedelta(days=1)
+        return result
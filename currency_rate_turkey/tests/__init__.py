@@ -0,0 +1,3 @@
+from . import test_altinkaynak_connector
+from . import test_convert_bulk
+from . import test_rate_provider_benchmark
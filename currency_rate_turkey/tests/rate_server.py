@@ -0,0 +1,40 @@
+import json
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlparse
+
+RATE_TYPES = ("ForexBuying", "ForexSelling", "BanknoteBuying", "BanknoteSelling")
+
+
+def deterministic_rate(day, currency, rate_type):
+    """Same rate for the same day, currency and rate type on every run"""
+    seed = sum(map(ord, currency)) + RATE_TYPES.index(rate_type)
+    return round(1 / (10 + seed % 40 + (day.toordinal() % 365) / 100), 6)
+
+
+def rate_document_responder(rate_types=RATE_TYPES):
+    """
+    Answer GET /rates?base=&currencies=&date_from=&date_to= with the rate
+    document of the range, in the format of the rate_server provider.
+    """
+
+    def responder(method, path, body):
+        url = urlparse(path)
+        if method != "GET" or url.path != "/rates":
+            return 404, "text/plain", b"Not found"
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        currencies = params["currencies"].split(",")
+        day = date.fromisoformat(params["date_from"])
+        date_to = date.fromisoformat(params["date_to"])
+        document = {}
+        while day <= date_to:
+            document[day.isoformat()] = {
+                currency: {
+                    rate_type: deterministic_rate(day, currency, rate_type)
+                    for rate_type in rate_types
+                }
+                for currency in currencies
+            }
+            day += timedelta(days=1)
+        return 200, "application/json", json.dumps(document).encode()
+
+    return responder
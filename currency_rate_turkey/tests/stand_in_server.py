@@ -0,0 +1,95 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer:
+    """
+    Local HTTP server standing in for a rate service, to be used as a
+    context manager. Each request is answered by
+    responder(method, path, body) -> (status, content type, content).
+    """
+
+    def __init__(
+        self, responder, latency=0.0, fail_every=0, error_status=503, chunk_size=0
+    ):
+        """
+        :param responder: callable building the responses
+        :param latency: seconds to wait before each response
+        :param fail_every: answer every nth request with error_status
+        :param error_status: HTTP status of the injected errors
+        :param chunk_size: send the content in chunks of this size, as a
+            slow network would, in one piece by default
+        """
+        self.responder = responder
+        self.latency = latency
+        self.fail_every = fail_every
+        self.error_status = error_status
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            return getattr(self, counter)
+
+    def __enter__(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, as the real services
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                stand_in._count("connections")
+
+            def log_message(self, *args):
+                return
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                number = stand_in._count("requests")
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                if stand_in.fail_every and not number % stand_in.fail_every:
+                    status, content_type, content = (
+                        stand_in.error_status,
+                        "text/plain",
+                        b"Injected error",
+                    )
+                else:
+                    status, content_type, content = stand_in.responder(
+                        self.command, self.path, body
+                    )
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                step = stand_in.chunk_size or len(content) or 1
+                for start in range(0, len(content), step):
+                    self.wfile.write(content[start : start + step])
+                    self.wfile.flush()
+
+            do_GET = do_POST = _respond
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -0,0 +1,80 @@
+import logging
+import time
+from datetime import date, timedelta
+
+from odoo.modules.module import get_resource_path
+from odoo.tests import common
+
+from ..models.altinkaynak_connector import AltinkaynakConnector
+from .stand_in_server import StandInServer
+
+_logger = logging.getLogger(__name__)
+
+
+# The real page and rate response go on for about 150 kB after the elements
+# read by the connector
+TRAILER = b"<!--" + b" " * 150000 + b"-->"
+
+
+def replay_responder():
+    """
+    Answer with excerpts of the Altinkaynak page and rate response, padded to
+    the size of the real ones
+    """
+
+    def read(file_name):
+        path = get_resource_path("currency_rate_turkey", "tests", "data", file_name)
+        with open(path, "rb") as recorded:
+            return recorded.read()
+
+    page = read("altinkaynak_kur.html") + TRAILER
+    delta = read("altinkaynak_kur_delta.txt") + TRAILER
+
+    def responder(method, path, body):
+        if method == "GET":
+            return 200, "text/html; charset=utf-8", page
+        return 200, "text/plain; charset=utf-8", delta
+
+    return responder
+
+
+class TestAltinkaynakConnector(common.BaseCase):
+    def test_get_rate(self):
+        with StandInServer(replay_responder()) as server:
+            connector = AltinkaynakConnector(endpoint=server.url)
+            rates = connector._get_rate(["USD", "eur"], "02/01/2024")
+        self.assertEqual(connector.main_data["__VIEWSTATEGENERATOR"], "A2E6F5C1")
+        self.assertAlmostEqual(rates["USD"]["AltinkaynakBuying"], 1 / 32.15)
+        self.assertAlmostEqual(rates["eur"]["AltinkaynakSelling"], 1 / 35.18)
+
+    def test_get_rates_concurrent(self):
+        start = date(2024, 1, 1)
+        dates = [
+            (start + timedelta(days=day)).strftime("%d/%m/%Y") for day in range(30)
+        ]
+        results = {}
+        timings = {}
+        for max_workers in (1, 6):
+            with StandInServer(
+                replay_responder(), latency=0.02, chunk_size=8192
+            ) as server:
+                connector = AltinkaynakConnector(
+                    endpoint=server.url, max_workers=max_workers
+                )
+                begin = time.perf_counter()
+                results[max_workers] = connector._get_rates(["USD", "GBP"], dates)
+                timings[max_workers] = time.perf_counter() - begin
+            # One request for the tokens and one per date, without retries
+            self.assertEqual(server.requests, len(dates) + 1)
+            # Responses are fully read and connections reused: one for the
+            # tokens and one per worker
+            self.assertLessEqual(server.connections, max_workers + 1)
+            _logger.info(
+                "Fetched %s dates with %s workers in %.3fs (%.1f dates/s)",
+                len(dates),
+                max_workers,
+                timings[max_workers],
+                len(dates) / timings[max_workers],
+            )
+        # The timings depend on the machine, they are only logged
+        self.assertEqual(results[1], results[6])
@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+
+from odoo.tests import common
+
+
+class TestConvertBulk(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.company_currency = cls.company.currency_id
+        cls.usd = cls.env.ref("base.USD")
+        cls.eur = cls.env.ref("base.EUR")
+        (cls.usd | cls.eur).write(
+            {"active": True, "main_rate_field": "rate", "second_rate_field": "rate"}
+        )
+        cls.currencies = cls.usd | cls.eur
+        cls.currencies = cls.currencies.filtered(lambda c: c != cls.company_currency)
+        cls.start = date(2024, 1, 1)
+        cls.env["res.currency.rate"].search(
+            [("currency_id", "in", cls.currencies.ids)]
+        ).unlink()
+        vals_list = []
+        for day in range(0, 30, 3):
+            for index, currency in enumerate(cls.currencies):
+                vals_list.append(
+                    {
+                        "name": cls.start + timedelta(days=day),
+                        "currency_id": currency.id,
+                        "company_id": cls.company.id,
+                        "rate": 0.03 + day / 1000 + index / 100,
+                        "tcmb_forex_buying": 0.04 + day / 1000 + index / 100,
+                    }
+                )
+        cls.env["res.currency.rate"].create(vals_list)
+
+    def test_convert_bulk_same_as_convert(self):
+        Currency = self.env["res.currency"]
+        all_currencies = self.currencies | self.company_currency
+        rows = [
+            (
+                amount,
+                from_currency,
+                to_currency,
+                self.company,
+                self.start + timedelta(days=day),
+                rate_type,
+            )
+            for amount in (0.0, 1.0, 1234.567)
+            for from_currency in all_currencies
+            for to_currency in all_currencies
+            for day in (0, 1, 5, 40)
+            for rate_type in (False, "tcmb_forex_buying")
+        ]
+        expected = []
+        for amount, from_currency, to_currency, company, day, rate_type in rows:
+            currency = (
+                from_currency.with_context(rate_type=rate_type)
+                if rate_type
+                else from_currency
+            )
+            expected.append(currency._convert(amount, to_currency, company, day))
+        self.assertEqual(Currency._convert_bulk(rows), expected)
+
+    def test_rate_cache_invalidated(self):
+        currency = self.currencies[0]
+        day = self.start + timedelta(days=1)
+        rate = currency._get_rates(self.company, day)[currency.id]
+        self.env["res.currency.rate"].create(
+            {
+                "name": day,
+                "currency_id": currency.id,
+                "company_id": self.company.id,
+                "rate": rate * 2,
+            }
+        )
+        self.assertEqual(currency._get_rates(self.company, day)[currency.id], rate * 2)
+
+    def test_upsert_rates_inverse(self):
+        currency = self.currencies[0]
+        day = self.start + timedelta(days=1)
+        CurrencyRate = self.env["res.currency.rate"]
+        CurrencyRate._upsert_rates(
+            {
+                (self.company.id, currency.id, day): {"tcmb_forex_buying": 0.05},
+                (self.company.id, currency.id, self.start): {"tcmb_forex_selling": 0.5},
+            }
+        )
+        new_rate = CurrencyRate.search(
+            [("currency_id", "=", currency.id), ("name", "=", day)]
+        )
+        self.assertEqual(new_rate.rate, 1.0)
+        self.assertAlmostEqual(new_rate.tcmb_forex_buying_inverse, 20.0)
+        old_rate = CurrencyRate.search(
+            [("currency_id", "=", currency.id), ("name", "=", self.start)]
+        )
+        self.assertAlmostEqual(old_rate.rate, 0.03)
+        self.assertAlmostEqual(old_rate.tcmb_forex_selling_inverse, 2.0)
+        self.assertEqual(
+            currency.with_context(rate_type="tcmb_forex_buying_inverse")._get_rates(
+                self.company, day
+            )[currency.id],
+            20.0,
+        )
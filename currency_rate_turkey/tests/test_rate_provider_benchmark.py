@@ -0,0 +1,116 @@
+import logging
+import time
+from datetime import date, timedelta
+
+from odoo.tests import common
+
+from .rate_server import rate_document_responder
+from .stand_in_server import StandInServer
+
+_logger = logging.getLogger(__name__)
+
+# Size of the benchmark scenario
+BENCH_YEARS = 1
+BENCH_CURRENCIES = 5
+
+
+class TestRateProviderBenchmark(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.CurrencyRate = cls.env["res.currency.rate"]
+        cls.currencies = (
+            cls.env["res.currency"]
+            .with_context(active_test=False)
+            .search(
+                [
+                    ("id", "!=", cls.company.currency_id.id),
+                    ("name", "in", ["USD", "EUR", "GBP", "CHF", "JPY", "CAD", "AUD"]),
+                ],
+                limit=BENCH_CURRENCIES,
+            )
+        )
+        cls.currencies.write(
+            {
+                "active": True,
+                "main_rate_field": "tcmb_forex_buying",
+                "second_rate_field": "tcmb_forex_selling",
+            }
+        )
+        cls.provider = cls.env["res.currency.rate.provider"].create(
+            {
+                "service": "rate_server",
+                "company_id": cls.company.id,
+                "currency_ids": [(6, 0, cls.currencies.ids)],
+            }
+        )
+        cls.date_to = date(2024, 12, 31)
+        cls.date_from = date(2025 - BENCH_YEARS, 1, 1)
+        cls.days = (cls.date_to - cls.date_from).days + 1
+
+    def _provider_rate_count(self):
+        return self.CurrencyRate.search_count([("provider_id", "=", self.provider.id)])
+
+    def _run_update(self, **server_options):
+        with StandInServer(rate_document_responder(), **server_options) as server:
+            self.provider.rate_server_url = server.url
+            self.env.flush_all()
+            queries = self.env.cr.sql_log_count
+            start = time.perf_counter()
+            self.provider._update(self.date_from, self.date_to)
+            elapsed = time.perf_counter() - start
+            queries = self.env.cr.sql_log_count - queries
+        _logger.info(
+            "Rate update of %s days x %s currencies: %s requests, %s queries, " "%.3fs",
+            self.days,
+            len(self.currencies),
+            server.requests,
+            queries,
+            elapsed,
+        )
+        return server
+
+    def test_update_benchmark(self):
+        self._run_update(latency=0.001)
+        self.assertEqual(self._provider_rate_count(), self.days * len(self.currencies))
+        usd_rate = self.CurrencyRate.search(
+            [("provider_id", "=", self.provider.id)], limit=1
+        )
+        self.assertEqual(usd_rate.rate, usd_rate.tcmb_forex_buying)
+        self.assertAlmostEqual(
+            usd_rate.tcmb_forex_selling_inverse, 1 / usd_rate.tcmb_forex_selling
+        )
+
+        # Writing all the rates again is a constant number of queries
+        with StandInServer(rate_document_responder()) as server:
+            self.provider.rate_server_url = server.url
+            data = self.provider._obtain_rates(
+                self.company.currency_id.name,
+                self.currencies.mapped("name"),
+                self.date_from,
+                self.date_to,
+            )
+        rates = self.provider._prepare_rate_values([(self.provider, data.items())])
+        queries = self.env.cr.sql_log_count
+        self.CurrencyRate._upsert_rates(rates)
+        self.assertLessEqual(self.env.cr.sql_log_count - queries, 4)
+
+        # The rates of every day come from the rate table cache
+        self.currencies._get_rates(self.company, self.date_from)
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        for day in range(self.days):
+            self.currencies._get_rates(
+                self.company, self.date_from + timedelta(days=day)
+            )
+        _logger.info(
+            "Rates of %s days read in %.3fs", self.days, time.perf_counter() - start
+        )
+        self.assertLessEqual(self.env.cr.sql_log_count - queries, 2)
+
+    def test_update_with_errors(self):
+        server = self._run_update(fail_every=4)
+        count = self._provider_rate_count()
+        self.assertTrue(server.requests)
+        self.assertTrue(0 < count < self.days * len(self.currencies))
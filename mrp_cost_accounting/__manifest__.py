@@ -4,7 +4,7 @@
 {
     "name": "MRP Cost Accounting",
     "summary": "Cost accounting for MRP, Sales, Purchases, Invoices",
-    "version": "16.0.1.0.0",
+    "version": "16.0.1.1.0",
     "development_status": "Beta",
     "category": "mrp",
     "website": "https://github.com/altinkaya-opensource/odoo-addons",
@@ -12,8 +12,17 @@
     "license": "AGPL-3",
     "application": False,
     "installable": True,
-    "depends": ["purchase", "mrp", "sale", "stock", "account", "mrp_bom_cost"],
+    "depends": [
+        "purchase",
+        "mrp",
+        "sale",
+        "stock",
+        "account",
+        "mrp_bom_cost",
+        "queue_job",
+    ],
     "data": [
+        "security/ir.model.access.csv",
         "view/stock_warehouse_view.xml",
         "view/product_view.xml",
     ],
@@ -4,4 +4,5 @@ from . import stock_quant
 from . import product_product
 from . import stock_warehouse
 from . import product_price_history
+from . import product_cost_rollup
 # from . import uom_uom
@@ -0,0 +1,330 @@
+# Copyright 2022 Yiğit Budak (https://github.com/yibudak)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+import logging
+from collections import defaultdict
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class ProductCostRollup(models.Model):
+    _name = "product.cost.rollup"
+    _description = "Product BoM Cost Rollup"
+    _order = "period desc, product_id"
+
+    product_id = fields.Many2one(
+        "product.product",
+        required=True,
+        index=True,
+        ondelete="cascade",
+    )
+    period = fields.Date(
+        required=True,
+        index=True,
+        help="First day of the month the cost belongs to",
+    )
+    unit_cost = fields.Float(digits="Product Price")
+    dirty = fields.Boolean(
+        index=True,
+        help="Cost must be rolled up again, see _recompute_dirty",
+    )
+
+    _sql_constraints = [
+        (
+            "product_period_uniq",
+            "unique(product_id, period)",
+            "Only one rolled up cost per product and period is allowed.",
+        ),
+    ]
+
+    @api.model
+    def _get_period(self, date=None):
+        return fields.Date.start_of(date or fields.Date.context_today(self), "month")
+
+    @api.model
+    def _get_unit_costs(self, products, period=None):
+        """
+        Rolled up unit costs of the products. A dirty or older cost is
+        returned as is and a missing one is the standard price of the
+        product, while the rollup is done later by _recompute_dirty.
+        :param products: product.product recordset
+        :param period: date of the period, current month by default
+        :return: dict {product id: unit cost}
+        """
+        if not products:
+            return {}
+        period = self._get_period(period)
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT ON (product_id) product_id, unit_cost, dirty, period
+              FROM product_cost_rollup
+             WHERE product_id IN %s AND period <= %s
+             ORDER BY product_id, period DESC
+            """,
+            (tuple(products.ids), period),
+        )
+        costs = {}
+        stale_ids = []
+        for product_id, unit_cost, dirty, cost_period in self.env.cr.fetchall():
+            costs[product_id] = unit_cost
+            # Current dirty costs already wait for the rollup job
+            if cost_period != period:
+                stale_ids.append(product_id)
+        missing = products.filtered(lambda p: p.id not in costs)
+        if missing:
+            missing_costs = {product.id: product.standard_price for product in missing}
+            self._store_costs(missing_costs, period, dirty=True)
+            costs.update(missing_costs)
+            stale_ids += missing.ids
+        if stale_ids:
+            self._mark_dirty(self.env["product.product"].browse(stale_ids), period)
+        return costs
+
+    @api.model
+    def _mark_dirty(self, products, period=None):
+        """
+        Flag the costs of the products and of the products using them as
+        outdated, and enqueue a single rollup job for the period.
+        """
+        if not products:
+            return
+        period = self._get_period(period)
+        product_ids = set(products.ids) | set(self._get_parent_product_ids(products))
+        self.flush_model()
+        # Products never rolled up get a row when their cost is asked
+        self.env.cr.execute(
+            """
+            INSERT INTO product_cost_rollup (product_id, period, unit_cost, dirty)
+            SELECT DISTINCT ON (product_id) product_id, %s, unit_cost, TRUE
+              FROM product_cost_rollup
+             WHERE product_id = ANY(%s)
+             ORDER BY product_id, period DESC
+            ON CONFLICT (product_id, period) DO UPDATE SET dirty = TRUE
+            """,
+            (period, list(product_ids)),
+        )
+        self.invalidate_model(["dirty"])
+        self.with_delay(
+            description="Roll up BoM costs of %s" % period,
+            identity_key="product.cost.rollup,%s" % period,
+        )._recompute_dirty(period)
+
+    @api.model
+    def _mark_dirty_on_commit(self, products):
+        """
+        Collect the products whose stock changed in this transaction, they
+        are marked dirty with a single _mark_dirty call right before the
+        commit.
+        """
+        if not products:
+            return
+        data = self.env.cr.precommit.data
+        product_ids = data.get("product.cost.rollup.dirty")
+        if product_ids is None:
+            product_ids = data["product.cost.rollup.dirty"] = set()
+            self.env.cr.precommit.add(self._mark_collected_dirty)
+        product_ids.update(products.ids)
+
+    @api.model
+    def _mark_collected_dirty(self):
+        product_ids = self.env.cr.precommit.data.pop("product.cost.rollup.dirty", ())
+        self._mark_dirty(self.env["product.product"].browse(product_ids))
+        # Precommit hooks run after the last flush
+        self.env.flush_all()
+
+    @api.model
+    def _get_parent_product_ids(self, products):
+        """
+        Variants with a rolled up cost whose BoM uses, directly or through
+        other BoMs, one of the products.
+        :return: list of product.product ids
+        """
+        edges = """
+            SELECT pp.product_tmpl_id AS child_id, bom.product_tmpl_id AS parent_id
+              FROM mrp_bom_line line
+              JOIN mrp_bom bom ON bom.id = line.bom_id
+              JOIN product_product pp ON pp.id = line.product_id
+             WHERE bom.active
+        """
+        if "mrp.bom.template.line" in self.env:
+            edges += """
+            UNION
+            SELECT line.product_tmpl_id, bom.product_tmpl_id
+              FROM mrp_bom_template_line line
+              JOIN mrp_bom bom ON bom.id = line.bom_id
+             WHERE bom.active
+            """
+        self.env["mrp.bom"].flush_model()
+        self.env["mrp.bom.line"].flush_model()
+        self.env.cr.execute(
+            """
+            WITH RECURSIVE edges AS (%s),
+            parents(tmpl_id) AS (
+                SELECT edges.parent_id
+                  FROM edges
+                  JOIN product_product pp ON pp.product_tmpl_id = edges.child_id
+                 WHERE pp.id IN %%s
+                 UNION
+                SELECT edges.parent_id
+                  FROM edges
+                  JOIN parents ON parents.tmpl_id = edges.child_id
+            )
+            SELECT DISTINCT pp.id
+              FROM product_product pp
+              JOIN parents ON parents.tmpl_id = pp.product_tmpl_id
+              JOIN product_cost_rollup rollup ON rollup.product_id = pp.id
+            """
+            % edges,
+            (tuple(products.ids),),
+        )
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _recompute_dirty(self, period=None):
+        """
+        Roll up the costs of all dirty products of the period in one pass.
+        :return: number of rolled up products
+        """
+        period = self._get_period(period)
+        dirty = self.search([("period", "=", period), ("dirty", "=", True)])
+        if not dirty:
+            return 0
+        costs = self._rollup(dirty.product_id, period)
+        _logger.info("Rolled up BoM costs of %s products for %s", len(costs), period)
+        return len(costs)
+
+    @api.model
+    def _get_bom_components(self, products):
+        """
+        Flattened components of the BoMs of the products and of all their
+        components.
+        :return: tuple ({product id: (bom, [(bom line, component, qty)],
+            [operation])}, {product id: product})
+        """
+        MrpBom = self.env["mrp.bom"]
+        structure = {}
+        seen = {product.id: product for product in products}
+        pending = products
+        while pending:
+            boms = MrpBom._bom_find(pending)
+            next_ids = set()
+            for product in pending:
+                bom = boms.get(product)
+                if not bom:
+                    continue
+                boms_done, lines_done = bom.explode(product, 1.0)
+                lines = []
+                for line, values in lines_done:
+                    component = values.get("target_product") or line.product_id
+                    lines.append((line, component, values["qty"]))
+                    if component.id not in seen:
+                        seen[component.id] = component
+                        next_ids.add(component.id)
+                operations = [
+                    operation
+                    for done_bom, values in boms_done
+                    for operation in done_bom.operation_ids
+                    if not operation._skip_operation_line(product)
+                ]
+                structure[product.id] = (bom, lines, operations)
+            pending = self.env["product.product"].browse(next_ids)
+        return structure, seen
+
+    @api.model
+    def _topological_order(self, structure, product_ids):
+        """
+        Order the products so that components come before the products
+        using them. Products of a BoM cycle are left out.
+        :return: list of product ids
+        """
+        children = {
+            product_id: {component.id for _line, component, _qty in lines}
+            for product_id, (_bom, lines, _operations) in structure.items()
+        }
+        parents = defaultdict(set)
+        in_degree = dict.fromkeys(product_ids, 0)
+        for product_id, component_ids in children.items():
+            for component_id in component_ids:
+                parents[component_id].add(product_id)
+            in_degree[product_id] = len(component_ids)
+        ready = [product_id for product_id, degree in in_degree.items() if not degree]
+        order = []
+        while ready:
+            product_id = ready.pop()
+            order.append(product_id)
+            for parent_id in parents[product_id]:
+                in_degree[parent_id] -= 1
+                if not in_degree[parent_id]:
+                    ready.append(parent_id)
+        if len(order) < len(in_degree):
+            _logger.warning(
+                "BoM cycle between products %s, their cost is not rolled up.",
+                sorted(set(in_degree) - set(order)),
+            )
+        return order
+
+    @api.model
+    def _rollup(self, products, period=None):
+        """
+        Compute bottom-up unit costs of the products and of all their
+        components in topological order, store them for the period and
+        save changed costs as the standard price, as the quants did before.
+        :return: dict {product id: unit cost}
+        """
+        period = self._get_period(period)
+        structure, all_products = self._get_bom_components(products)
+        costs = {}
+        for product_id in self._topological_order(structure, list(all_products)):
+            product = all_products[product_id]
+            if product_id not in structure:
+                costs[product_id] = product.standard_price
+                continue
+            bom, lines, operations = structure[product_id]
+            total = 0.0
+            for operation in operations:
+                workcenter = operation.workcenter_id
+                duration = (
+                    workcenter.time_start + workcenter.time_stop + operation.time_cycle
+                )
+                total += duration / 60.0 * workcenter.costs_hour
+            for line, component, qty in lines:
+                total += (
+                    component.uom_id._compute_price(
+                        costs.get(component.id, component.standard_price),
+                        line.product_uom_id,
+                    )
+                    * qty
+                )
+            costs[product_id] = bom.product_uom_id._compute_price(
+                total / bom.product_qty, product.uom_id
+            )
+        # Products of a BoM cycle keep their standard price
+        for product_id, product in all_products.items():
+            costs.setdefault(product_id, product.standard_price)
+        self._store_costs(costs, period)
+        prec = self.env["decimal.precision"].precision_get("Product Price")
+        for product_id in structure:
+            product = all_products[product_id]
+            if round(product.standard_price - costs[product_id], prec):
+                product.standard_price = costs[product_id]
+        return {product.id: costs[product.id] for product in products}
+
+    @api.model
+    def _store_costs(self, costs, period, dirty=False):
+        if not costs:
+            return
+        self.flush_model()
+        product_ids, unit_costs = zip(*costs.items())
+        self.env.cr.execute(
+            """
+            INSERT INTO product_cost_rollup (product_id, period, unit_cost, dirty)
+            SELECT product_id, %s, unit_cost, %s
+              FROM unnest(%s, %s) AS costs(product_id, unit_cost)
+            ON CONFLICT (product_id, period)
+            DO UPDATE SET unit_cost = EXCLUDED.unit_cost, dirty = EXCLUDED.dirty
+            """,
+            (period, dirty, list(product_ids), list(unit_costs)),
+        )
+        self.invalidate_model(["unit_cost", "dirty"])
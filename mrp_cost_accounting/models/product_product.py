@@ -1,23 +1,23 @@
 # Copyright 2022 Yiğit Budak (https://github.com/yibudak)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
-from odoo import api, models
+from odoo import models
 
 
 class ProductProduct(models.Model):
     _inherit = "product.product"
 
-    @api.multi
     def button_compute_quants_cost(self):
         """
         This method is used to compute the cost of the quants of
-        the selected products.
+        the selected products. BoM costs of all the products are rolled
+        up once before.
         :return: bool
         """
-        for product in self:
-            quants = self.env["stock.quant"].search([("product_id", "=", product.id)])
-            for quant in quants:
-                vals = quant._compute_quant_cost()
-                quant.write(vals)
+        unit_costs = self.env["product.cost.rollup"]._rollup(self)
+        quants = self.env["stock.quant"].search([("product_id", "in", self.ids)])
+        for quant in quants:
+            vals = quant._compute_quant_cost(unit_price=unit_costs[quant.product_id.id])
+            quant.write(vals)
         return True
 
     # flake8: noqa: E501
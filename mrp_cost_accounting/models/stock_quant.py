@@ -20,12 +20,15 @@ class StockQuant(models.Model):
 
     total_cost = fields.Float(default=0.0, readonly=True)
 
-    def _quant_product_unit_price(self, prec):
+    def _quant_product_unit_price(self, prec, unit_price=None):
         """
         This method is used to get the unit price of the product and
         saves the price on product if price is changed.
+        :param unit_price: rolled up unit price, the BoM is walked if None
         :return: float
         """
+        if unit_price is not None:
+            return unit_price
         product = self.product_id
         unit_price = product._get_price_from_bom()
 
@@ -34,25 +37,38 @@ class StockQuant(models.Model):
 
         return unit_price
 
-    def _get_product_unit_price(self, prec):
+    def _get_product_unit_price(self, prec, unit_price=None):
         """
         This method is used to get the unit price of the product.
         It also calculates waiting cost.
         :return: float
         """
         date_now = fields.Datetime.now()
-        unit_price = self._quant_product_unit_price(prec=prec)
+        unit_price = self._quant_product_unit_price(prec=prec, unit_price=unit_price)
         delta = relativedelta.relativedelta(date_now, self.create_date)
         waiting_cost_factor = self.location_id.get_warehouse().waiting_cost_factor
-        for _x in range(delta.months):
-            unit_price = (1 + waiting_cost_factor / 100) * unit_price
-        return unit_price
+        return unit_price * (1 + waiting_cost_factor / 100) ** delta.months
+
+    def _get_rollup_unit_costs(self):
+        """
+        Rolled up unit costs of the products of the quants, see
+        product.cost.rollup. Set no_cost_rollup in the context to walk the
+        BoM of each quant instead.
+        :return: dict {product id: unit cost}
+        """
+        if self.env.context.get("no_cost_rollup"):
+            return {}
+        return self.env["product.cost.rollup"]._get_unit_costs(self.product_id)
+
+    def _mark_cost_dirty(self):
+        if not self.env.context.get("no_cost_rollup"):
+            self.env["product.cost.rollup"]._mark_dirty_on_commit(self.product_id)
 
-    def _compute_quant_cost(self, new_quantity=None):
+    def _compute_quant_cost(self, new_quantity=None, unit_price=None):
         self.ensure_one()
         vals = {}
         prec = self.env["decimal.precision"].precision_get("Product Unit of Measure")
-        unit_price = self._get_product_unit_price(prec=prec)
+        unit_price = self._get_product_unit_price(prec=prec, unit_price=unit_price)
 
         if new_quantity is None:  # is a new quant
             new_unit_cost = unit_price
@@ -76,12 +92,16 @@ class StockQuant(models.Model):
         )
         return vals
 
-    @api.model
+    @api.model_create_multi
     def create(self, vals_list):
         res = super().create(vals_list)
+        unit_costs = res._get_rollup_unit_costs()
         for rec in res:
-            cost_dict = rec._compute_quant_cost()
+            cost_dict = rec._compute_quant_cost(
+                unit_price=unit_costs.get(rec.product_id.id)
+            )
             rec.write(cost_dict)
+        res._mark_cost_dirty()
         return res
 
     def write(self, vals):
@@ -90,9 +110,14 @@ class StockQuant(models.Model):
         # Todo: quantları initialize etmek için bir method yazılacak.
         if "quantity" in vals:
             qty = vals["quantity"]
+            unit_costs = self._get_rollup_unit_costs()
             for rec in self:
-                cost_dict = rec._compute_quant_cost(new_quantity=qty)
+                cost_dict = rec._compute_quant_cost(
+                    new_quantity=qty, unit_price=unit_costs.get(rec.product_id.id)
+                )
                 vals.update(cost_dict)
 
         res = super().write(vals)
+        if "quantity" in vals:
+            self._mark_cost_dirty()
         return res
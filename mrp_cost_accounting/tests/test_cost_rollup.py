@@ -0,0 +1,115 @@
+import logging
+import time
+from unittest.mock import patch
+
+from odoo.tests import common, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+class CostRollupCommon(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Product = cls.env["product.product"]
+        MrpBom = cls.env["mrp.bom"]
+        cls.Rollup = cls.env["product.cost.rollup"]
+        cls.stock_location = cls.env.ref("stock.stock_location_stock")
+        cls.leaves = Product.create(
+            [
+                {"name": "Leaf %s" % i, "type": "product", "standard_price": i + 1}
+                for i in range(10)
+            ]
+        )
+        cls.sub = Product.create({"name": "Sub Assembly", "type": "product"})
+        MrpBom.create(
+            {
+                "product_tmpl_id": cls.sub.product_tmpl_id.id,
+                "product_qty": 2.0,
+                "bom_line_ids": [
+                    (0, 0, {"product_id": leaf.id, "product_qty": 2.0})
+                    for leaf in cls.leaves
+                ],
+            }
+        )
+        cls.finished = Product.create({"name": "Finished", "type": "product"})
+        MrpBom.create(
+            {
+                "product_tmpl_id": cls.finished.product_tmpl_id.id,
+                "bom_line_ids": [
+                    (0, 0, {"product_id": cls.sub.id, "product_qty": 3.0}),
+                    (0, 0, {"product_id": cls.leaves[0].id, "product_qty": 1.0}),
+                ],
+            }
+        )
+
+
+class TestCostRollup(CostRollupCommon):
+    def test_rollup(self):
+        costs = self.Rollup._rollup(self.finished)
+        # Sub assembly: 2 of each leaf for 2 units, so sum of leaf prices
+        sub_cost = sum(range(1, 11))
+        self.assertAlmostEqual(costs[self.finished.id], 3 * sub_cost + 1)
+        self.assertAlmostEqual(self.sub.standard_price, sub_cost)
+        self.assertEqual(
+            self.Rollup._get_unit_costs(self.sub | self.finished),
+            {self.sub.id: sub_cost, self.finished.id: 3 * sub_cost + 1},
+        )
+
+    def test_missing_cost(self):
+        # Asking a cost never rolled up does not walk the BoMs
+        with patch.object(type(self.Rollup), "_rollup") as rollup:
+            costs = self.Rollup._get_unit_costs(self.finished)
+        rollup.assert_not_called()
+        self.assertEqual(costs, {self.finished.id: self.finished.standard_price})
+        dirty = self.Rollup.search([("dirty", "=", True)])
+        self.assertEqual(dirty.product_id, self.finished)
+        self.assertEqual(self.Rollup._recompute_dirty(), 1)
+        sub_cost = sum(range(1, 11))
+        self.assertEqual(
+            self.Rollup._get_unit_costs(self.finished),
+            {self.finished.id: 3 * sub_cost + 1},
+        )
+
+    def test_quant_write_marks_dirty(self):
+        self.Rollup._rollup(self.finished)
+        self.env["stock.quant"]._update_available_quantity(
+            self.leaves[1], self.stock_location, 5.0
+        )
+        self.env.cr.precommit.run()
+        dirty = self.Rollup.search([("dirty", "=", True)])
+        self.assertEqual(dirty.product_id, self.leaves[1] | self.sub | self.finished)
+        self.leaves[1].standard_price = 12.0
+        self.assertEqual(self.Rollup._recompute_dirty(), 3)
+        self.assertFalse(self.Rollup.search([("dirty", "=", True)]))
+        self.assertAlmostEqual(self.sub.standard_price, sum(range(1, 11)) + 10)
+
+    def test_quant_writes_marked_once(self):
+        Rollup = type(self.Rollup)
+        Quant = self.env["stock.quant"]
+        with patch.object(Rollup, "_mark_dirty", autospec=True) as mark_dirty:
+            for leaf in self.leaves[:5]:
+                for _i in range(4):
+                    Quant._update_available_quantity(leaf, self.stock_location, 1.0)
+            mark_dirty.assert_not_called()
+            self.env.cr.precommit.run()
+        mark_dirty.assert_called_once()
+        self.assertEqual(mark_dirty.call_args[0][1], self.leaves[:5])
+
+
+@tagged("post_install", "-at_install", "-standard", "benchmark")
+class TestCostRollupBenchmark(CostRollupCommon):
+    def test_quant_write_benchmark(self):
+        self.Rollup._rollup(self.finished)
+        Quant = self.env["stock.quant"]
+        for context, label in (({"no_cost_rollup": True}, "BoM walk"), ({}, "rollup")):
+            quant_model = Quant.with_context(**context)
+            start = time.perf_counter()
+            for _i in range(20):
+                quant_model._update_available_quantity(
+                    self.finished, self.stock_location, 1.0
+                )
+            self.env.cr.precommit.run()
+            _logger.info(
+                "20 quant writes with %s: %.3fs", label, time.perf_counter() - start
+            )
@@ -0,0 +1,13 @@
+# Copyright 2023 Yiğit Budak (https://github.com/yibudak)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+{
+    "name": "Sale Set Product",
+    "summary": "Explode set products of sale orders into their components",
+    "version": "16.0.1.0.0",
+    "author": "Yiğit Budak, Altinkaya Enclosures",
+    "license": "AGPL-3",
+    "website": "https://github.com/altinkaya-opensource/odoo-addons",
+    "category": "Extensions",
+    "depends": ["sale", "mrp"],
+    "installable": True,
+}
@@ -0,0 +1,121 @@
+# Copyright 2023 Yiğit Budak (https://github.com/yibudak)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+from odoo import api, fields, models
+
+
+class SaleOrderLine(models.Model):
+    _inherit = "sale.order.line"
+
+    set_product = fields.Boolean("Set product?", compute="_compute_set_product")
+    set_parent_product_id = fields.Many2one(
+        comodel_name="product.product",
+        string="Parent Product",
+        readonly=True,
+    )
+
+    @api.depends("product_id")
+    def _compute_set_product(self):
+        bom_obj = self.env["mrp.bom"].sudo()
+        bom_dict = bom_obj._bom_find(self.product_id, bom_type="phantom")
+        for line in self:
+            line.set_product = bool(bom_dict.get(line.product_id))
+
+    def _get_set_explosion(self, bom, product, factor, memo):
+        """
+        Explode a phantom BoM once per quantity within an explosion pass.
+        :param memo: dict shared by the calls of one explode_set_contents
+        :return: list of (component product.product id, qty)
+        """
+        key = (bom.id, product.id, factor)
+        if key not in memo:
+            _boms, lines = bom.explode(
+                product, factor, picking_type=bom.picking_type_id
+            )
+            memo[key] = [
+                ((data.get("target_product") or bom_line.product_id).id, data["qty"])
+                for bom_line, data in lines
+            ]
+        return memo[key]
+
+    def explode_set_contents(self, merge_set_lines=True):
+        """
+        Explodes order lines. All set lines of all orders are exploded level
+        by level: BoMs are resolved with one _bom_find call, the component
+        lines are created with one create call and the set lines are removed
+        with one unlink call.
+        :param merge_set_lines: add the components to the lines of the same
+            product and set, and link them to their set with
+            set_parent_product_id. Otherwise one line is created per
+            component of each set line.
+        :return: first created line
+        """
+        bom_obj = self.env["mrp.bom"].sudo()
+        SaleOrderLine = self.env["sale.order.line"]
+        to_unlink_ids = SaleOrderLine
+        created_lines = SaleOrderLine
+        memo = {}
+        lines = self.filtered(
+            lambda ln: ln.set_product and ln.state in ["draft", "sent"]
+        )
+        while lines:
+            bom_dict = bom_obj._bom_find(lines.product_id, bom_type="phantom")
+            new_vals = {}
+            existing_lines = {}
+            if merge_set_lines:
+                for sol in lines.order_id.order_line - to_unlink_ids - lines:
+                    if sol.id:
+                        existing_lines.setdefault(
+                            (
+                                sol.order_id.id,
+                                sol.product_id.id,
+                                sol.set_parent_product_id.id,
+                            ),
+                            sol,
+                        )
+            for line in lines:
+                bom_id = bom_dict.get(line.product_id)
+                if not bom_id:
+                    continue
+                parent_id = line.set_parent_product_id.id or line.product_id.id
+                customer_lang = line.order_id.partner_id.lang
+                factor = (
+                    line.product_uom._compute_quantity(
+                        line.product_qty, bom_id.product_uom_id
+                    )
+                    / bom_id.product_qty
+                )
+                products = self.env["product.product"].with_context(lang=customer_lang)
+                for product_id, qty in self._get_set_explosion(
+                    bom_id, line.product_id, factor, memo
+                ):
+                    vals = {
+                        "order_id": line.order_id.id,
+                        "product_id": product_id,
+                        "product_uom_qty": qty,
+                        "name": products.browse(product_id).display_name,
+                    }
+                    if not merge_set_lines:
+                        new_vals[len(new_vals)] = vals
+                        continue
+                    key = (line.order_id.id, product_id, parent_id)
+                    if key in new_vals:
+                        new_vals[key]["product_uom_qty"] += qty
+                        continue
+                    existing_sol = existing_lines.get(key)
+                    if existing_sol:
+                        existing_sol.product_uom_qty += qty
+                        continue
+                    vals["set_parent_product_id"] = parent_id
+                    new_vals[key] = vals
+                to_unlink_ids |= line
+            new_lines = SaleOrderLine.create(list(new_vals.values()))
+            created_lines |= new_lines
+            # check if new lines needs to be exploded
+            lines = new_lines.filtered(
+                lambda ln: ln.set_product and ln.state in ["draft", "sent"]
+            )
+        # delete the lines with original product which are not relevant anymore
+        if to_unlink_ids:
+            to_unlink_ids.unlink()
+
+        return fields.first(created_lines - to_unlink_ids)
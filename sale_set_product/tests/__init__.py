@@ -0,0 +1 @@
+from . import test_explode_set_contents
@@ -0,0 +1,130 @@
+from odoo.tests import common
+
+
+class TestExplodeSetContents(common.TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Product = cls.env["product.product"]
+        cls.leaf_1 = Product.create({"name": "Leaf 1", "type": "consu"})
+        cls.leaf_2 = Product.create({"name": "Leaf 2", "type": "consu"})
+        cls.leaf_3 = Product.create({"name": "Leaf 3", "type": "consu"})
+        cls.inner_kit = Product.create({"name": "Inner Kit", "type": "consu"})
+        cls.outer_kit = Product.create({"name": "Outer Kit", "type": "consu"})
+        cls._create_kit(cls.inner_kit, [(cls.leaf_2, 2), (cls.leaf_3, 1)])
+        cls._create_kit(cls.outer_kit, [(cls.leaf_1, 1), (cls.inner_kit, 3)])
+        cls.partner = cls.env["res.partner"].create({"name": "Set Customer"})
+
+    @classmethod
+    def _create_kit(cls, product, components):
+        return cls.env["mrp.bom"].create(
+            {
+                "product_tmpl_id": product.product_tmpl_id.id,
+                "product_id": product.id,
+                "product_qty": 1,
+                "type": "phantom",
+                "bom_line_ids": [
+                    (0, 0, {"product_id": component.id, "product_qty": qty})
+                    for component, qty in components
+                ],
+            }
+        )
+
+    def _create_order(self, lines):
+        order = self.env["sale.order"].create({"partner_id": self.partner.id})
+        # The lines are created on their own, an order write could already
+        # explode its sets
+        self.env["sale.order.line"].create(
+            [
+                {
+                    "order_id": order.id,
+                    "product_id": product.id,
+                    "product_uom_qty": qty,
+                }
+                for product, qty in lines
+            ]
+        )
+        return order
+
+    def _create_orders(self):
+        order_1 = self._create_order(
+            [(self.outer_kit, 2), (self.inner_kit, 1), (self.leaf_1, 5)]
+        )
+        order_2 = self._create_order([(self.outer_kit, 1), (self.inner_kit, 2)])
+        return order_1, order_2
+
+    def _get_lines(self, order):
+        return sorted(
+            (
+                line.product_id.id,
+                line.product_uom_qty,
+                line.set_parent_product_id.id,
+            )
+            for line in order.order_line
+        )
+
+    def test_set_product(self):
+        order_1, order_2 = self._create_orders()
+        lines = (order_1 | order_2).order_line
+        self.assertEqual(lines.mapped("set_product"), [True, True, False, True, True])
+
+    def test_explode_merge_set_lines(self):
+        order_1, order_2 = self._create_orders()
+        (order_1 | order_2).order_line.explode_set_contents()
+        outer, inner = self.outer_kit.id, self.inner_kit.id
+        self.assertEqual(
+            self._get_lines(order_1),
+            sorted(
+                [
+                    (self.leaf_1.id, 5, False),
+                    (self.leaf_1.id, 2, outer),
+                    (self.leaf_2.id, 12, outer),
+                    (self.leaf_3.id, 6, outer),
+                    (self.leaf_2.id, 2, inner),
+                    (self.leaf_3.id, 1, inner),
+                ]
+            ),
+        )
+        self.assertEqual(
+            self._get_lines(order_2),
+            sorted(
+                [
+                    (self.leaf_1.id, 1, outer),
+                    (self.leaf_2.id, 6, outer),
+                    (self.leaf_3.id, 3, outer),
+                    (self.leaf_2.id, 4, inner),
+                    (self.leaf_3.id, 2, inner),
+                ]
+            ),
+        )
+        self.assertFalse((order_1 | order_2).order_line.filtered("set_product"))
+
+    def test_explode_without_merge(self):
+        order_1, order_2 = self._create_orders()
+        (order_1 | order_2).order_line.explode_set_contents(merge_set_lines=False)
+        self.assertEqual(
+            self._get_lines(order_1),
+            sorted(
+                [
+                    (self.leaf_1.id, 5, False),
+                    (self.leaf_1.id, 2, False),
+                    (self.leaf_2.id, 12, False),
+                    (self.leaf_3.id, 6, False),
+                    (self.leaf_2.id, 2, False),
+                    (self.leaf_3.id, 1, False),
+                ]
+            ),
+        )
+        self.assertEqual(
+            self._get_lines(order_2),
+            sorted(
+                [
+                    (self.leaf_1.id, 1, False),
+                    (self.leaf_2.id, 6, False),
+                    (self.leaf_3.id, 3, False),
+                    (self.leaf_2.id, 4, False),
+                    (self.leaf_3.id, 2, False),
+                ]
+            ),
+        )
+        self.assertFalse((order_1 | order_2).order_line.filtered("set_product"))
@@ -9,7 +9,7 @@
     "license": "AGPL-3",
     "website": "https://github.com/altinkaya-opensource/odoo-addons",
     "category": "Extensions",
-    "depends": ["website", "website_sale"],
+    "depends": ["website", "website_sale", "sale_set_product"],
     "data": [
         "templates/set_product_alert.xml",
         "templates/set_cart_lines.xml",
@@ -1,5 +1,4 @@
 # Copyright 2022 Yiğit Budak (https://github.com/yibudak)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
-from . import sale_order_line
 from . import product_template
 from . import sale_order
@@ -10,7 +10,8 @@ class SaleOrder(models.Model):
         order_line = super()._cart_update_order_line(
             product_id, quantity, order_line, **kwargs
         )
-        if order_line and order_line.set_product:
+        # Only the sets flagged on their template are exploded in the cart
+        if order_line and order_line.product_id.set_product:
             # since we have nothing to do with the return value of this method,
             # we can just return a dummy sale order line
             dummy_sol = order_line.explode_set_contents()